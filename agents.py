@@ -1,14 +1,25 @@
 import os
+import threading
+from types import MappingProxyType
 from dotenv import load_dotenv
+from metrics import log
+
 load_dotenv()
 
-from crewai import Agent, LLM
+# crewai is imported inside llm_for and build_agent, not here: it is slow to
+# import and the server should answer /health and auth before it has loaded.
+# See llm_stack.py.
+
+# LLM_BACKEND=fake swaps every model for fake_llm.FakeLLM (no Groq key needed),
+# for benchmarks and local runs that shouldn't spend quota
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
 
 groq_api_key = os.getenv("GROQ_API_KEY")
-if not groq_api_key:
+if not groq_api_key and LLM_BACKEND != "fake":
     raise ValueError("❌ GROQ_API_KEY not found. Check your .env file")
 
-os.environ["GROQ_API_KEY"] = groq_api_key
+if groq_api_key:
+    os.environ["GROQ_API_KEY"] = groq_api_key
 
 # All model IDs must have the groq/ prefix so CrewAI/LiteLLM routes them correctly
 MODEL_MAP = {
@@ -20,66 +31,100 @@ MODEL_MAP = {
     "GPT-OSS 20B":           "groq/openai/gpt-oss-20b",
 }
 
-def select_model(choice):
-    selected = MODEL_MAP.get(choice, "groq/llama-3.1-8b-instant")
-    print(f"✅ Using model: {selected}")
-    return LLM(model=selected, api_key=groq_api_key)
+# ─── Single source of truth for the models the UI offers ─────────────────────
+# Add new models here ONLY (plus their provider ID in MODEL_MAP above) —
+# the web app, main.py and batch.py all read from this list.
+
+MODELS = [
+    {"id": "1", "name": "Llama 3.1 8B Instant",   "description": "Fast & Lightweight"},
+    {"id": "3", "name": "Llama 3.3 70B Versatile", "description": "Most Capable"},
+    {"id": "4", "name": "Llama 4 Scout 17B",       "description": "Long Context & Smart"},
+    {"id": "5", "name": "Kimi K2",                 "description": "Strong Reasoning"},
+    {"id": "6", "name": "Qwen3 32B",               "description": "Multilingual & Sharp"},
+    {"id": "7", "name": "GPT-OSS 20B",             "description": "OpenAI Open Weight"},
+]
+
+# id -> name map used by debate and followup routes
+MODEL_CHOICE_MAP = {m["id"]: m["name"] for m in MODELS}
 
-default_llm = LLM(model="groq/llama-3.1-8b-instant", api_key=groq_api_key)
+def model_name(choice):
+    """Model name for a UI id ("3") or a name ("Llama 3.3 70B Versatile")."""
+    if choice in MODEL_MAP:
+        return choice
+    return MODEL_CHOICE_MAP.get(choice, "Llama 3.1 8B Instant")
+
+_llm_cache = {}
+_llm_lock = threading.Lock()
+
+def llm_for(model, stream=False):
+    """Shared LLM client for a provider model ID such as "groq/llama-3.1-8b-instant"."""
+    # LLM clients hold no per-request state, so one instance per model is shared
+    with _llm_lock:
+        llm = _llm_cache.get((model, stream))
+        if llm is None:
+            log("llm_client", model=model, stream=stream, backend=LLM_BACKEND)
+            if LLM_BACKEND == "fake":
+                from fake_llm import FakeLLM
+                llm = FakeLLM.from_env(model, stream=stream)
+            else:
+                from crewai import LLM
+                llm = LLM(model=model, api_key=groq_api_key, stream=stream)
+            _llm_cache[(model, stream)] = llm
+    return llm
+
+def select_model(choice, stream=False):
+    return llm_for(MODEL_MAP.get(choice, "groq/llama-3.1-8b-instant"), stream=stream)
 
 # ── Agents ────────────────────────────────────────────────────────────────────
+# Agents keep per-call executor state, so they are built per request from these
+# read-only templates instead of being shared and re-pointed at another LLM.
+
+AGENT_TEMPLATES = MappingProxyType({
+    "for": MappingProxyType({
+        "role": "Debate Advocate — Supporting Side",
+        "goal": (
+            "Present the exact number of well-structured, evidence-based arguments "
+            "that support the debate topic, following the tone and focus specified in the task."
+        ),
+        "backstory": (
+            "You are an expert advocate and researcher skilled at building compelling arguments. "
+            "You follow instructions precisely: if told to give 2 arguments, you give exactly 2. "
+            "If told to give 6, you give exactly 6. You never add or remove points. "
+            "You use evidence, examples, and logical reasoning appropriate to the requested tone and focus area."
+        ),
+    }),
+    "against": MappingProxyType({
+        "role": "Debate Analyst — Opposing Side",
+        "goal": (
+            "Present the exact number of well-structured counterarguments "
+            "that challenge the debate topic, following the tone and focus specified in the task."
+        ),
+        "backstory": (
+            "You are a critical analyst skilled at identifying weaknesses, risks, and opposing evidence. "
+            "You follow instructions precisely: if told to give 3 arguments, you give exactly 3. "
+            "You never deviate from the requested count. "
+            "You use logical reasoning, data, and real-world examples appropriate to the requested tone and focus area."
+        ),
+    }),
+    "judge": MappingProxyType({
+        "role": "Debate Judge & Verdict Deliverer",
+        "goal": "Deliver a clear, decisive verdict identifying which side won and why.",
+        "backstory": (
+            "You are an impartial judge who evaluates debate quality and picks a winner. "
+            "You are decisive — you always name a winning side and justify it clearly. "
+            "You structure your verdict with labeled sections as instructed in the task."
+        ),
+    }),
+    "followup": MappingProxyType({
+        "role": "Debate Expert & Advisor",
+        "goal": "Answer follow-up questions about the debate with clarity and depth.",
+        "backstory": (
+            "You are an expert analyst with deep knowledge of the debate that just occurred. "
+            "You answer specific questions concisely and reference the debate context directly."
+        ),
+    }),
+})
 
-agent_for = Agent(
-    role="Debate Advocate — Supporting Side",
-    goal=(
-        "Present the exact number of well-structured, evidence-based arguments "
-        "that support the debate topic, following the tone and focus specified in the task."
-    ),
-    backstory=(
-        "You are an expert advocate and researcher skilled at building compelling arguments. "
-        "You follow instructions precisely: if told to give 2 arguments, you give exactly 2. "
-        "If told to give 6, you give exactly 6. You never add or remove points. "
-        "You use evidence, examples, and logical reasoning appropriate to the requested tone and focus area."
-    ),
-    llm=default_llm,
-    verbose=False
-)
-
-agent_against = Agent(
-    role="Debate Analyst — Opposing Side",
-    goal=(
-        "Present the exact number of well-structured counterarguments "
-        "that challenge the debate topic, following the tone and focus specified in the task."
-    ),
-    backstory=(
-        "You are a critical analyst skilled at identifying weaknesses, risks, and opposing evidence. "
-        "You follow instructions precisely: if told to give 3 arguments, you give exactly 3. "
-        "You never deviate from the requested count. "
-        "You use logical reasoning, data, and real-world examples appropriate to the requested tone and focus area."
-    ),
-    llm=default_llm,
-    verbose=False
-)
-
-summarizer = Agent(
-    role="Debate Judge & Verdict Deliverer",
-    goal="Deliver a clear, decisive verdict identifying which side won and why.",
-    backstory=(
-        "You are an impartial judge who evaluates debate quality and picks a winner. "
-        "You are decisive — you always name a winning side and justify it clearly. "
-        "You structure your verdict with labeled sections as instructed in the task."
-    ),
-    llm=default_llm,
-    verbose=False
-)
-
-followup_agent = Agent(
-    role="Debate Expert & Advisor",
-    goal="Answer follow-up questions about the debate with clarity and depth.",
-    backstory=(
-        "You are an expert analyst with deep knowledge of the debate that just occurred. "
-        "You answer specific questions concisely and reference the debate context directly."
-    ),
-    llm=default_llm,
-    verbose=False
-)
+def build_agent(kind, llm):
+    from crewai import Agent
+    return Agent(**AGENT_TEMPLATES[kind], llm=llm, verbose=False)
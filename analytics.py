@@ -0,0 +1,201 @@
+"""Debate analytics: per-day rollups of verdicts, margins, latency and tokens.
+
+Every completed debate increments one rollup document per
+(day, model, tone, focus, depth) when the write-behind worker inserts it, so
+GET /api/stats reads a few hundred small documents however many debates are
+stored. Debates saved before rollups existed are counted by the backfill,
+which first re-parses debates stored with an older parsing.STRUCTURE_VERSION
+(moving any already counted to the rollups of their corrected verdict):
+
+    python analytics.py              # count debates no rollup has seen yet
+    python analytics.py --rebuild    # drop the rollups and recount everything (app stopped)
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+from parsing import STRUCTURE_VERSION, parse_judge, structure_debate
+
+load_dotenv()
+
+ROLLUP_COLLECTION = "debate_rollups"
+STATS_MAX_DAYS    = int(os.getenv("STATS_MAX_DAYS", "366"))
+BACKFILL_BATCH    = 500
+
+# The rollups count every user's debates together, so /api/stats is limited
+# to the user IDs (not usernames, which anyone can register) in STATS_ADMINS
+STATS_ADMINS      = {uid.strip() for uid in os.getenv("STATS_ADMINS", "").split(",") if uid.strip()}
+
+# Set on a debate document when it is queued, so the backfill skips debates the
+# writer counts itself. A rollup lost to a Mongo error is recovered by --rebuild.
+ANALYTICS_VERSION = 1
+
+DIMENSIONS = ("model", "tone", "focus", "depth")
+SIDES      = ("FOR", "AGAINST")
+UNKNOWN    = "unknown"    # debates saved before their settings were stored
+
+def is_stats_admin(user: dict) -> bool:
+    return user["user_id"] in STATS_ADMINS
+
+def rollup_update(doc: dict):
+    """(rollup _id, key fields, $inc fields) for one debate document."""
+    settings = doc.get("settings") or {}
+    key = {
+        "day": doc["created_at"].strftime("%Y-%m-%d"),
+        "model": doc.get("model") or UNKNOWN,
+        "tone": settings.get("tone") or UNKNOWN,
+        "focus": settings.get("focus") or UNKNOWN,
+        "depth": settings.get("depth") or UNKNOWN,
+    }
+    judge = (doc.get("structured") or {}).get("judge") or parse_judge((doc.get("results") or {}).get("summary", ""))
+    side = judge["side"] or "none"
+    inc = {"debates": 1, f"verdict.{side}": 1}
+    if judge["side"]:
+        inc[f"margin.{side}.{judge['margin']}"] = 1
+
+    usage = doc.get("usage") or {}
+    if usage.get("cached"):
+        inc["cached"] = 1
+    elif usage.get("latency_ms") is not None:
+        inc["timed"] = 1
+        inc["latency_ms"] = usage["latency_ms"]
+        inc["prompt_tokens"] = usage.get("prompt_tokens", 0)
+        inc["completion_tokens"] = usage.get("completion_tokens", 0)
+    return "|".join(key[f] for f in ("day",) + DIMENSIONS), key, inc
+
+async def record_debates(collection, docs, sign: int = 1):
+    """Add completed debates to their rollups, one upsert per rollup touched; sign=-1 takes them out again."""
+    from pymongo import UpdateOne
+
+    merged = {}
+    for doc in docs:
+        if doc.get("status") != "completed":
+            continue
+        rollup_id, key, inc = rollup_update(doc)
+        entry = merged.setdefault(rollup_id, (key, {}))[1]
+        for field, amount in inc.items():
+            entry[field] = entry.get(field, 0) + sign * amount
+    if merged:
+        await collection.bulk_write([
+            UpdateOne({"_id": rollup_id}, {"$setOnInsert": key, "$inc": inc}, upsert=True)
+            for rollup_id, (key, inc) in merged.items()
+        ], ordered=False)
+
+# ─── Reading ─────────────────────────────────────────────────────────────────
+
+def _summary(rollups) -> dict:
+    debates = sum(r.get("debates", 0) for r in rollups)
+    verdicts = {side: sum(r.get("verdict", {}).get(side, 0) for r in rollups) for side in SIDES + ("none",)}
+    decided = verdicts["FOR"] + verdicts["AGAINST"]
+    margins = {side: {} for side in SIDES}
+    for r in rollups:
+        for side, counts in r.get("margin", {}).items():
+            for margin, n in counts.items():
+                margins[side][margin] = margins[side].get(margin, 0) + n
+    timed = sum(r.get("timed", 0) for r in rollups)
+    return {
+        "debates": debates,
+        "verdicts": verdicts,
+        "for_win_rate": round(verdicts["FOR"] / decided, 3) if decided else None,
+        "margins": margins,
+        "cached": sum(r.get("cached", 0) for r in rollups),
+        "avg_latency_ms": round(sum(r.get("latency_ms", 0) for r in rollups) / timed) if timed else None,
+        "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in rollups),
+        "completion_tokens": sum(r.get("completion_tokens", 0) for r in rollups),
+    }
+
+async def debate_stats(collection, days: int = 30, group_by: str = None, **filters) -> dict:
+    """Totals over the last `days` days, optionally split by day or one of DIMENSIONS.
+
+    filters narrow by dimension, e.g. model="Qwen3 32B", tone="aggressive".
+    """
+    days = max(1, min(days, STATS_MAX_DAYS))
+    since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    filters = {f: v for f, v in filters.items() if v is not None}
+    rollups = [r async for r in collection.find({"day": {"$gte": since}, **filters}, {"_id": 0})]
+
+    stats = {"days": days, "since": since, "filters": filters, "totals": _summary(rollups)}
+    if group_by is not None:
+        groups = {}
+        for r in rollups:
+            groups.setdefault(r[group_by], []).append(r)
+        stats["group_by"] = group_by
+        stats["groups"] = {value: _summary(rows) for value, rows in sorted(groups.items())}
+    return stats
+
+# ─── Backfill ────────────────────────────────────────────────────────────────
+
+BACKFILL_PROJECTION = {"model": 1, "settings": 1, "usage": 1, "status": 1, "created_at": 1,
+                       "structured.judge": 1, "results.summary": 1}
+RESTRUCTURE_PROJECTION = {"model": 1, "settings": 1, "usage": 1, "status": 1, "created_at": 1,
+                          "structured": 1, "results": 1, "analytics": 1}
+
+async def restructure(db, batch_size: int = BACKFILL_BATCH) -> int:
+    """Re-parse debates stored with an older STRUCTURE_VERSION; returns how many were updated.
+
+    A debate that was already counted is moved out of the rollup of its old
+    verdict and into the one of its new verdict before it is marked.
+    """
+    from pymongo import UpdateOne
+
+    updated = 0
+    query = {"structured.version": {"$not": {"$gte": STRUCTURE_VERSION}}}
+    while True:
+        batch = await db.debates.find(query, RESTRUCTURE_PROJECTION).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return updated
+        fresh = [{**doc, "structured": structure_debate(doc.get("results") or {},
+                                                        (doc.get("settings") or {}).get("args_per_side"))}
+                 for doc in batch]
+        counted = [(old, new) for old, new in zip(batch, fresh) if old.get("analytics")]
+        await record_debates(db[ROLLUP_COLLECTION], [old for old, _ in counted], sign=-1)
+        await record_debates(db[ROLLUP_COLLECTION], [new for _, new in counted])
+        await db.debates.bulk_write([
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"structured": doc["structured"],
+                                                    "verdict": doc["structured"]["judge"]["side"]}})
+            for doc in fresh
+        ], ordered=False)
+        updated += len(batch)
+        print(f"🔁 {updated} debates re-parsed")
+
+async def backfill(db, rebuild: bool = False, batch_size: int = BACKFILL_BATCH) -> int:
+    """Count every debate not yet in a rollup and mark it; returns how many were counted.
+
+    Safe to re-run or interrupt: a batch is marked right after it is counted.
+    rebuild first drops the rollups and the marks, so run it with the app stopped.
+    """
+    rollups = db[ROLLUP_COLLECTION]
+    if rebuild:
+        await rollups.delete_many({})
+        await db.debates.update_many({"analytics": {"$exists": True}}, {"$unset": {"analytics": ""}})
+
+    counted = 0
+    query = {"analytics": {"$exists": False}, "status": "completed"}
+    while True:
+        batch = await db.debates.find(query, BACKFILL_PROJECTION).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return counted
+        await record_debates(rollups, batch)
+        await db.debates.update_many({"_id": {"$in": [d["_id"] for d in batch]}},
+                                     {"$set": {"analytics": ANALYTICS_VERSION}})
+        counted += len(batch)
+        print(f"📊 {counted} debates counted")
+
+async def main(args):
+    import database
+    await database.connect_db()
+    try:
+        restructured = await restructure(database.db)
+        if restructured:
+            print(f"✅ Re-parsed {restructured} debates stored before structure version {STRUCTURE_VERSION}")
+        counted = await backfill(database.db, rebuild=args.rebuild)
+        print(f"✅ Backfill done: {counted} debates added to {ROLLUP_COLLECTION}")
+    finally:
+        await database.close_db()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rebuild", action="store_true", help="drop the rollups and recount every debate")
+    asyncio.run(main(parser.parse_args()))
@@ -1,21 +1,40 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import asyncio
 import json
 import os
-from typing import AsyncGenerator
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncGenerator, List, Optional
 
 load_dotenv()
 
-if not os.getenv("GROQ_API_KEY"):
+if not os.getenv("GROQ_API_KEY") and os.getenv("LLM_BACKEND", "groq") != "fake":
     raise ValueError("❌ GROQ_API_KEY environment variable is required")
 
-from crewai import Crew
-from tasks import debate_tasks, create_followup_task
-from agents import select_model, followup_agent
-from database import connect_db, close_db, create_user, get_user_by_email, get_user_by_username, save_debate, get_user_debates, delete_debate
+from tasks import debate_tasks, create_followup_task, estimate_tokens, template_snapshot, normalize_settings
+from debate_rounds import RoundSettings, MAX_ROUNDS, transcript as round_transcript
+from pipeline import run_debate_pipeline, debate_results, cancel_stats, repair_snapshot, usage_snapshot, estimate_debate_tokens, estimate_rebuttal_cost, DEFAULT_COMPLETION_TOKENS, PROMPT_OVERHEAD_TOKENS
+from executors import run_llm, run_auth, shutdown_executors
+from cache import debate_cache, cache_key
+from topic_index import topic_index, load_recent_topics
+from search import debate_search, MAX_PAGE, MAX_OFFSET
+from export import stream_export, is_export_admin, FORMATS, EXPORT_BATCH_SIZE
+from followup_sessions import followup_sessions
+from agents import select_model, MODEL_MAP, MODELS, MODEL_CHOICE_MAP
+from scheduler import scheduler, RateLimited, is_rate_limit_error
+from routing import router
+from jobs import job_workers, TERMINAL
+from batch import run_batch, retry_rate_limited, tokens_used, BATCH_CONCURRENCY
+from parsing import structure_debate
+from analytics import debate_stats, is_stats_admin, DIMENSIONS, ROLLUP_COLLECTION
+from metrics import registry, record_llm_call, RequestMetrics
+import llm_stack
+from static_assets import static_bundle, IMMUTABLE, REVALIDATE
+from database import connect_db, close_db, create_user, get_user_by_email, get_user_by_username, save_debate, get_user_debate_summaries, get_user_debate, delete_debate, debate_writer, get_db, export_debates
 from auth import hash_password, verify_password, create_access_token, get_current_user
 
 app = FastAPI(title="Debate System API", version="2.0.0")
@@ -24,15 +43,63 @@ app = FastAPI(title="Debate System API", version="2.0.0")
 
 @app.on_event("startup")
 async def startup():
+    if llm_stack.LLM_PRELOAD:
+        llm_stack.warm()   # imports crewai in a thread while Mongo connects and requests are served
     await connect_db()
+    debate_writer.start()
+    await job_workers.start()
+    await debate_cache.setup()
+    run_in_background(load_recent_topics())
+    debate_search.start()   # builds the text index on first deploy without holding up startup
+    run_in_background(asyncio.to_thread(static_bundle.compress_brotli))
 
 @app.on_event("shutdown")
 async def shutdown():
+    await job_workers.shutdown()
+    await debate_writer.shutdown()   # flush queued debates (or spill them) before the client closes
     await close_db()
+    shutdown_executors()
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+
+app.add_middleware(RequestMetrics)
+
+registry.gauge("mads_write_queue_depth", "Debates waiting for the write-behind flush", (),
+               lambda: [((), debate_writer.queue.qsize())])
+registry.gauge("mads_scheduler_queue_depth", "Requests waiting for admission per model", ("model",),
+               lambda: [((model,), s["queue_depth"]) for model, s in scheduler.snapshot().items()])
+registry.gauge("mads_jobs_running", "Debate jobs running on this instance", (),
+               lambda: [((), job_workers.stats["running"])])
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # ─── Static Files ─────────────────────────────────────────────────────────────
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+def inject_models(html: str) -> str:
+    # Inject model list directly into the HTML so the browser never needs to
+    # fetch /api/models — completely bypasses all caching issues.
+    model_script = f"<script>window.__MODELS__ = {json.dumps(MODELS)};</script>"
+    return html.replace("<!-- MODEL_INJECTION_POINT -->", model_script)
+
+# Rendered and gzipped once, here, so no request touches the disk; see static_assets.py
+static_bundle.page("login", "login.html")
+static_bundle.page("debate", "index.html", inject_models)
+static_bundle.build()
+
+def serve_asset(request: Request, asset, cache_control: str) -> Response:
+    status, body, headers = static_bundle.respond(asset, request.headers, cache_control)
+    if request.method == "HEAD":
+        body = b""
+    return Response(content=body, status_code=status, headers=headers)
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def static_file(path: str, request: Request):
+    asset, immutable = static_bundle.asset(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return serve_asset(request, asset, IMMUTABLE if immutable else REVALIDATE)
 
 # ─── Pydantic Models ──────────────────────────────────────────────────────────
 
@@ -52,6 +119,14 @@ class DebateRequest(BaseModel):
     args_per_side: int = 4
     tone: str = "balanced"
     focus: str = "general"
+    use_cache: bool = True        # False forces a fresh debate (the result is still cached)
+    reuse_similar: bool = False   # True returns a stored debate on a near-identical topic if one exists
+    allow_fallback: bool = True   # False pins every stage to the chosen model (no fallbacks or hedges)
+    rounds: int = 1               # more than 1 adds rebuttal rounds, up to DEBATE_MAX_ROUNDS
+
+class BatchRequest(BaseModel):
+    debates: List[DebateRequest]
+    concurrency: int = BATCH_CONCURRENCY   # capped at BATCH_MAX_CONCURRENCY
 
 class DebateResponse(BaseModel):
     status: str
@@ -60,40 +135,22 @@ class DebateResponse(BaseModel):
 
 class FollowUpRequest(BaseModel):
     question: str
-    debate_context: str
     model_choice: str
-
-# ─── Single source of truth for all models ───────────────────────────────────
-# Add new models here ONLY — everything else reads from this list automatically.
-
-MODELS = [
-    {"id": "1", "name": "Llama 3.1 8B Instant",   "description": "Fast & Lightweight"},
-    {"id": "3", "name": "Llama 3.3 70B Versatile", "description": "Most Capable"},
-    {"id": "4", "name": "Llama 4 Scout 17B",       "description": "Long Context & Smart"},
-    {"id": "5", "name": "Kimi K2",                 "description": "Strong Reasoning"},
-    {"id": "6", "name": "Qwen3 32B",               "description": "Multilingual & Sharp"},
-    {"id": "7", "name": "GPT-OSS 20B",             "description": "OpenAI Open Weight"},
-]
-
-# id -> name map used by debate and followup routes
-MODEL_CHOICE_MAP = {m["id"]: m["name"] for m in MODELS}
+    debate_id: Optional[str] = None   # preferred: the server keeps the context and Q&A digest
+    debate_context: str = ""          # legacy clients that upload the whole debate every time
 
 # ─── Pages ────────────────────────────────────────────────────────────────────
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    with open("static/login.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+# Pages revalidate on every load (the ETag covers the injected model list), so
+# a deploy that changes MODELS or an asset is picked up straight away
 
-@app.get("/debate", response_class=HTMLResponse)
-async def debate_page():
-    with open("static/index.html", "r", encoding="utf-8") as f:
-        html = f.read()
-    # Inject model list directly into the HTML so the browser never needs to
-    # fetch /api/models — completely bypasses all caching issues.
-    model_script = f"<script>window.__MODELS__ = {json.dumps(MODELS)};</script>"
-    html = html.replace("<!-- MODEL_INJECTION_POINT -->", model_script)
-    return HTMLResponse(content=html, headers={"Cache-Control": "no-store"})
+@app.api_route("/", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def read_root(request: Request):
+    return serve_asset(request, static_bundle.pages["login"], REVALIDATE)
+
+@app.api_route("/debate", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def debate_page(request: Request):
+    return serve_asset(request, static_bundle.pages["debate"], REVALIDATE)
 
 # ─── Auth Routes ──────────────────────────────────────────────────────────────
 
@@ -107,7 +164,7 @@ async def register(req: RegisterRequest):
         raise HTTPException(status_code=400, detail="Email already registered")
     if await get_user_by_username(req.username):
         raise HTTPException(status_code=400, detail="Username already taken")
-    hashed = hash_password(req.password)
+    hashed = await run_auth(hash_password, req.password)
     user_id = await create_user(req.username, req.email, hashed)
     token = create_access_token({"sub": user_id, "username": req.username})
     return {"status": "success", "token": token, "username": req.username}
@@ -115,7 +172,7 @@ async def register(req: RegisterRequest):
 @app.post("/api/auth/login")
 async def login(req: LoginRequest):
     user = await get_user_by_email(req.email)
-    if not user or not verify_password(req.password, user["password"]):
+    if not user or not await run_auth(verify_password, req.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     user_id = str(user["_id"])
     token = create_access_token({"sub": user_id, "username": user["username"]})
@@ -131,109 +188,603 @@ async def health_check():
 async def get_models():
     return {"models": MODELS}
 
+@app.get("/api/pipeline/stats")
+async def pipeline_stats():
+    return {
+        "cancellation": cancel_stats,
+        "cache": debate_cache.snapshot(),
+        "persistence": debate_writer.snapshot(),
+        "scheduler": scheduler.snapshot(),
+        "routing": router.snapshot(),
+        "argument_repairs": repair_snapshot(),
+        "prompt_cache": {"templates": template_snapshot(), "provider": usage_snapshot()},
+        "jobs": job_workers.snapshot(),
+        "search": debate_search.snapshot(),
+        "llm_stack": llm_stack.snapshot(),
+    }
+
+@app.get("/api/stats")
+async def analytics_stats(days: int = 30, group_by: Optional[str] = None, model: Optional[str] = None,
+                          tone: Optional[str] = None, focus: Optional[str] = None, depth: Optional[str] = None,
+                          current_user: dict = Depends(get_current_user)):
+    """Verdicts, margins, latency and tokens across all debates, read from the daily rollups."""
+    if not is_stats_admin(current_user):
+        raise HTTPException(status_code=403, detail="Debate analytics are limited to stats admins")
+    if group_by is not None and group_by not in ("day",) + DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: day, {', '.join(DIMENSIONS)}")
+    return await debate_stats(get_db()[ROLLUP_COLLECTION], days=days, group_by=group_by,
+                              model=model, tone=tone, focus=focus, depth=depth)
+
 # ─── Debate History ───────────────────────────────────────────────────────────
 
 @app.delete("/api/history/{debate_id}")
 async def delete_debate_route(debate_id: str, current_user: dict = Depends(get_current_user)):
     success = await delete_debate(debate_id, current_user["user_id"])
     if success:
+        debate_search.remove(current_user["user_id"], debate_id)
         return {"status": "success", "message": "Debate deleted"}
     raise HTTPException(status_code=404, detail="Debate not found or not authorized")
 
 @app.get("/api/history")
-async def debate_history(current_user: dict = Depends(get_current_user)):
-    debates = await get_user_debates(current_user["user_id"])
-    return {"status": "success", "debates": debates}
+async def debate_history(limit: int = 20, cursor: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    limit = max(1, min(limit, 100))
+    try:
+        debates, next_cursor = await get_user_debate_summaries(current_user["user_id"], limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"status": "success", "debates": debates, "next_cursor": next_cursor}
+
+@app.get("/api/history/search")
+async def search_history(q: str, limit: int = 20, offset: int = 0, current_user: dict = Depends(get_current_user)):
+    """Keyword search over the user's debates, best match first, with a highlighted snippet each."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    limit = max(1, min(limit, MAX_PAGE))
+    offset = max(0, min(offset, MAX_OFFSET))
+    found = await debate_search.search(current_user["user_id"], q, limit=limit, offset=offset)
+    return {"status": "success", "query": q, **found}
+
+def _export_date(name: str, value: Optional[str]):
+    if value is None:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO date, e.g. 2025-01-31")
+    # Debates are stored with naive UTC timestamps
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+@app.get("/api/history/export")
+async def export_history(format: str = "ndjson", since: Optional[str] = None, until: Optional[str] = None,
+                         model: Optional[str] = None, scope: str = "mine", gzip: bool = False,
+                         current_user: dict = Depends(get_current_user)):
+    """Stream the user's whole history (or, for export admins, everyone's) as NDJSON or CSV.
+
+    since is inclusive and until exclusive; rows come newest first, straight off the cursor.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+    if scope not in ("mine", "all"):
+        raise HTTPException(status_code=400, detail="scope must be mine or all")
+    if scope == "all" and not is_export_admin(current_user):
+        raise HTTPException(status_code=403, detail="Exporting every user's debates is limited to export admins")
+
+    cursor = export_debates(None if scope == "all" else current_user["user_id"],
+                            since=_export_date("since", since), until=_export_date("until", until),
+                            model=model, batch_size=EXPORT_BATCH_SIZE)
+    filename = f"mads-debates-{datetime.utcnow():%Y%m%d}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(cursor, format, compress=gzip),
+        media_type="application/gzip" if gzip else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+@app.get("/api/history/{debate_id}")
+async def debate_detail(debate_id: str, current_user: dict = Depends(get_current_user)):
+    debate = await get_user_debate(debate_id, current_user["user_id"])
+    if debate is None:
+        raise HTTPException(status_code=404, detail="Debate not found or not authorized")
+    return {"status": "success", "debate": {
+        "_id": str(debate["_id"]),
+        "topic": debate["topic"],
+        "model": debate["model"],
+        "created_at": debate["created_at"].isoformat(),
+        "verdict": debate.get("verdict"),
+        "results": debate["results"],
+        # Debates saved before structured parsing are parsed on read (without the requested count)
+        "structured": debate.get("structured") or structure_debate(debate["results"]),
+        "models_used": debate.get("models_used"),
+    }}
+
+@app.get("/api/topics/similar")
+async def similar_topic(topic: str, current_user: dict = Depends(get_current_user)):
+    match = topic_index.best_match(current_user["user_id"], topic)
+    if match is None:
+        return {"status": "success", "match": None}
+    return {"status": "success", "match": {
+        "debate_id": match.debate_id, "topic": match.topic, "similarity": round(match.similarity, 3)
+    }}
 
 # ─── Debate Routes ────────────────────────────────────────────────────────────
 
-async def run_debate_stream(
-    topic: str, model_choice: str,
-    depth: str = "standard", args_per_side: int = 4,
-    tone: str = "balanced", focus: str = "general"
-) -> AsyncGenerator[str, None]:
+# How often a running debate checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Keeps fire-and-forget tasks referenced until they finish
+_background_tasks = set()
+
+def sse(event: dict, event_id: int = None) -> str:
+    if event_id is not None:
+        return f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+    return f"data: {json.dumps(event)}\n\n"
+
+def debate_cache_key(request: DebateRequest, model_name: str) -> str:
+    return cache_key(request.topic, model_name, request.depth, request.args_per_side, request.tone, request.focus,
+                     rounds=request.rounds)
+
+async def find_reusable_debate(request: DebateRequest, key: str, user_id: str):
+    """Return (results, info) from the exact-match cache or, if the request allows
+    it, one of the user's stored debates on a near-identical topic; (None, {...}) on a miss."""
+    if request.use_cache:
+        cached = await debate_cache.get(key)
+        if cached is not None:
+            return cached, {"cached": True}
+    if request.reuse_similar:
+        match = topic_index.best_match(user_id, request.topic)
+        stored = await get_user_debate(match.debate_id, user_id) if match else None
+        if stored is not None:
+            return stored["results"], {"cached": True, "similar_to": {
+                "debate_id": match.debate_id, "topic": match.topic, "similarity": round(match.similarity, 3)
+            }}
+    return None, {"cached": False}
+
+async def save_and_index_debate(user_id: str, topic: str, model: str, results: dict, models_used: dict = None,
+                                structured: dict = None, settings: dict = None, usage: dict = None) -> str:
+    debate_id = await save_debate(user_id=user_id, topic=topic, model=model, results=results,
+                                  models_used=models_used, structured=structured, settings=settings, usage=usage)
+    topic_index.add(user_id, topic, debate_id)
+    debate_search.add(user_id, debate_id, {"topic": topic, "results": results})
+    return debate_id
+
+def debate_usage(plan, results: dict, seconds: float) -> dict:
+    """Wall time and estimated tokens of a debate that was run, for the analytics rollups."""
+    prompts = sum(estimate_tokens(task.description) + PROMPT_OVERHEAD_TOKENS for task in plan.tasks)
+    prompts += sum(r["prompt_tokens"] for r in plan.transcript[1:])   # rebuttal rounds
+    prompts += estimate_tokens(results["for_arguments"] + results["against_arguments"])   # the judge's context
+    completions = sum(estimate_tokens(results[f]) for f in ("for_arguments", "against_arguments", "summary"))
+    return {"latency_ms": round(seconds * 1000), "prompt_tokens": prompts, "completion_tokens": completions}
+
+async def record_cancelled_debate(user_id: str, topic: str, model: str, partial: dict, transcript=()):
+    results = {
+        "for_arguments":     partial.get("for", ""),
+        "against_arguments": partial.get("against", ""),
+        "summary":           partial.get("judge", ""),
+    }
+    if transcript:
+        # Cancelled during rebuttals: keep every round that finished, not just the latest answer
+        results["for_arguments"] = round_transcript(transcript, "for")
+        results["against_arguments"] = round_transcript(transcript, "against")
+        results["rounds"] = [{"round": r["round"], "for": r["for"], "against": r["against"]} for r in transcript]
     try:
-        yield f"data: {json.dumps({'type': 'status', 'message': f'Selected Model: {model_choice}'})}\\n\\n"
-        llm = select_model(model_choice)
-        yield f"data: {json.dumps({'type': 'status', 'message': 'Initializing agents...'})}\\n\\n"
-        tasks = debate_tasks(topic, llm, depth=depth, args_per_side=args_per_side, tone=tone, focus=focus)
-        yield f"data: {json.dumps({'type': 'status', 'message': 'Starting debate...'})}\\n\\n"
-        crew = Crew(agents=[t.agent for t in tasks], tasks=tasks, verbose=False)
-        yield f"data: {json.dumps({'type': 'debate_start', 'topic': topic})}\\n\\n"
-        result = crew.kickoff()
-        yield f"data: {json.dumps({'type': 'debate_complete', 'result': str(result)})}\\n\\n"
-    except Exception as e:
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\\n\\n"
+        await save_debate(user_id=user_id, topic=topic, model=model, results=results, status="cancelled")
+    except Exception:
+        import traceback
+        traceback.print_exc()
 
-@app.post("/api/debate/stream")
-async def start_debate_stream(request: DebateRequest, current_user: dict = Depends(get_current_user)):
-    return StreamingResponse(
-        run_debate_stream(
-            request.topic, request.model_choice,
-            depth=request.depth, args_per_side=request.args_per_side,
-            tone=request.tone, focus=request.focus
-        ),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
-    )
+# ─── Admission control ───────────────────────────────────────────────────────
 
-@app.post("/api/debate")
-async def start_debate(request: DebateRequest, current_user: dict = Depends(get_current_user)):
+def rate_limited(e: RateLimited) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": e.retry_after_header})
+
+def admit(model_name: str, user_id: str, requests: int, tokens: int):
+    """Queue LLM work with the scheduler; the ticket's wait() blocks until it may run."""
     try:
-        model_name = MODEL_CHOICE_MAP.get(request.model_choice, "Llama 3.1 8B Instant")
-        llm = select_model(model_name)
-        tasks = debate_tasks(
+        return scheduler.submit(MODEL_MAP.get(model_name, model_name), user_id, requests, tokens)
+    except RateLimited as e:
+        raise rate_limited(e)
+
+def provider_rate_limited(model_name: str, requests: int, tokens: int) -> HTTPException:
+    # Our budgets were too generous: drain them so the queue backs off too
+    queue = scheduler.queue(MODEL_MAP.get(model_name, model_name))
+    queue.penalize()
+    return rate_limited(RateLimited(queue.retry_after(requests, tokens), f"{model_name} is rate limited by the provider"))
+
+def queue_headers(ticket) -> dict:
+    return {"X-Queue-Depth": str(ticket.position), "X-Queue-Wait": f"{ticket.waited:.3f}"}
+
+async def run_when_admitted(plan, on_event=None):
+    waited = await plan.ticket.wait()
+    if on_event is not None and waited:
+        on_event({"type": "admitted", "waited": round(waited, 3)})
+    return await run_debate_pipeline(plan.tasks, on_event=on_event, models=plan.models_used,
+                                     allow_fallback=plan.allow_fallback, args_per_side=plan.args_per_side,
+                                     rounds=plan.rounds, transcript=plan.transcript)
+
+@dataclass
+class DebatePlan:
+    model_name: str
+    key: str
+    cached: Optional[dict]
+    reuse_info: dict
+    tasks: Optional[list] = None     # only when the debate has to be run
+    ticket: Optional[object] = None
+    allow_fallback: bool = True
+    args_per_side: Optional[int] = None               # checked (and repaired) on each side's answer
+    rounds: Optional[RoundSettings] = None            # only for multi-round debates
+    transcript: list = field(default_factory=list)    # filled with one entry per round as they finish
+    models_used: dict = field(default_factory=dict)   # side -> model ID that answered it
+
+async def plan_debate(request: DebateRequest, user_id: str, stream: bool = False) -> DebatePlan:
+    """Reuse a stored debate if possible, otherwise build the tasks and queue them.
+
+    Raises a 429 HTTPException when the model's queue can't take the debate.
+    """
+    if not 1 <= request.rounds <= MAX_ROUNDS:
+        raise HTTPException(status_code=400, detail=f"rounds must be between 1 and {MAX_ROUNDS}")
+    model_name = MODEL_CHOICE_MAP.get(request.model_choice, "Llama 3.1 8B Instant")
+    key = debate_cache_key(request, model_name)
+    cached, reuse_info = await find_reusable_debate(request, key, user_id)
+    plan = DebatePlan(model_name, key, cached, reuse_info, allow_fallback=request.allow_fallback,
+                      args_per_side=int(request.args_per_side))
+    if cached is None:
+        await llm_stack.ready()
+        llm = select_model(model_name, stream=stream)
+        plan.tasks = debate_tasks(
             request.topic, llm,
             depth=request.depth, args_per_side=request.args_per_side,
             tone=request.tone, focus=request.focus
         )
-        crew = Crew(agents=[t.agent for t in tasks], tasks=tasks, verbose=False)
-        result = crew.kickoff()
-
-        task_outputs = result.tasks_output if hasattr(result, 'tasks_output') else []
-        parsed_results = {"for_arguments": "", "against_arguments": "", "summary": ""}
+        calls, tokens = len(plan.tasks), estimate_debate_tokens(plan.tasks)
+        if request.rounds > 1:
+            plan.rounds = RoundSettings(request.topic, llm, request.rounds, depth=request.depth,
+                                        args_per_side=request.args_per_side, tone=request.tone, focus=request.focus)
+            rebuttal_calls, rebuttal_tokens = estimate_rebuttal_cost(request.rounds, request.args_per_side)
+            calls += rebuttal_calls
+            tokens += rebuttal_tokens
+        plan.ticket = admit(model_name, user_id, calls, tokens)
+    return plan
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def watch_disconnect(http_request: Request, task: asyncio.Task) -> bool:
+    """Wait for task; cancel it and return True if the client disconnects first."""
+    while not task.done():
+        if await http_request.is_disconnected():
+            task.cancel()
+            await asyncio.wait({task})
+            return True
+        await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+    return False
+
+async def execute_debate(request: DebateRequest, plan: DebatePlan, user_id: str, on_event=None) -> dict:
+    """Run the planned debate (or replay the reused one), save it and return the result payload.
+
+    on_event gets the same events the stream sends, from any thread.
+    """
+    if plan.cached is not None:
+        results = plan.cached
+        usage = {"cached": True}
+        if on_event is not None:
+            for agent, result_key in (("for", "for_arguments"), ("against", "against_arguments"), ("judge", "summary")):
+                on_event({'type': 'agent_complete', 'agent': agent, 'content': results[result_key]})
+    else:
+        if on_event is not None and not plan.ticket.admitted:
+            on_event({'type': 'queued', 'position': plan.ticket.position,
+                      'estimated_wait': round(plan.ticket.estimated_wait, 1)})
+        began = time.monotonic()
+        results = debate_results(await run_when_admitted(plan, on_event=on_event), plan.transcript)
+        usage = debate_usage(plan, results, time.monotonic() - began)
+        await debate_cache.set(plan.key, results)
+
+    structured = structure_debate(results, request.args_per_side)
+    # Normalized like the prompts are, so an unknown tone can't mint new rollup series
+    tone, focus, depth = normalize_settings(request.tone, request.focus, request.depth)
+    settings = {"depth": depth, "args_per_side": request.args_per_side, "tone": tone, "focus": focus,
+                "rounds": request.rounds}
+    debate_id = await save_and_index_debate(user_id, request.topic, plan.model_name, results,
+                                            plan.models_used or None, structured, settings, usage)
+    return {"debate_id": debate_id, "topic": request.topic, "model": plan.model_name,
+            "results": results, "structured": structured, "models_used": plan.models_used or None, **plan.reuse_info}
+
+async def run_debate_stream(request: DebateRequest, plan: DebatePlan, user_id: str, http_request: Request) -> AsyncGenerator[str, None]:
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    partial = {}
+    debate = None
+
+    def on_event(event: dict):
+        # Token events arrive from LLM worker threads
+        loop.call_soon_threadsafe(events.put_nowait, event)
 
-        if len(task_outputs) >= 3:
-            parsed_results["for_arguments"]     = str(task_outputs[0].raw)
-            parsed_results["against_arguments"] = str(task_outputs[1].raw)
-            parsed_results["summary"]           = str(task_outputs[2].raw)
+    try:
+        yield sse({'type': 'status', 'message': f'Selected Model: {plan.model_name}'})
+        yield sse({'type': 'debate_start', 'topic': request.topic, **plan.reuse_info})
+
+        debate = asyncio.create_task(execute_debate(request, plan, user_id, on_event=on_event))
+        debate.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=DISCONNECT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                if await http_request.is_disconnected():
+                    return
+                continue
+            if event is None:
+                break
+            if event["type"] == "agent_complete":
+                partial[event["agent"]] = event["content"]
+            yield sse(event)
+
+        yield sse({'type': 'debate_complete', 'data': debate.result()})
+    except Exception as e:
+        if plan.tasks is not None and is_rate_limit_error(e):
+            limited = provider_rate_limited(plan.model_name, plan.ticket.requests, plan.ticket.tokens)
+            yield sse({'type': 'error', 'message': limited.detail, 'retry_after': limited.headers["Retry-After"]})
         else:
-            result_str = str(result)
-            parsed_results["for_arguments"]     = result_str
-            parsed_results["against_arguments"] = "Unable to parse arguments"
-            parsed_results["summary"]           = "Unable to parse summary"
-
-        await save_debate(
-            user_id=current_user["user_id"],
-            topic=request.topic,
-            model=model_name,
-            results=parsed_results
-        )
+            yield sse({'type': 'error', 'message': str(e)})
+    finally:
+        # Reached with the debate still running only if the client went away
+        # (disconnect poll above, or the server closing the generator)
+        if debate is not None and not debate.done():
+            debate.cancel()
+            if plan.cached is None:
+                run_in_background(record_cancelled_debate(user_id, request.topic, plan.model_name, partial,
+                                                           plan.transcript))
+
+@app.post("/api/debate/stream")
+async def start_debate_stream(request: DebateRequest, http_request: Request, current_user: dict = Depends(get_current_user)):
+    # Admission happens before the stream opens so an overloaded model can still answer 429
+    plan = await plan_debate(request, current_user["user_id"], stream=True)
+    headers = {"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    if plan.ticket is not None:
+        headers["X-Queue-Depth"] = str(plan.ticket.position)
+        headers["X-Queue-Wait-Estimate"] = f"{plan.ticket.estimated_wait:.1f}"
+    return StreamingResponse(
+        run_debate_stream(request, plan, current_user["user_id"], http_request),
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+@app.post("/api/debate")
+async def start_debate(request: DebateRequest, http_request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    plan = None
+    try:
+        plan = await plan_debate(request, current_user["user_id"])
+        # Waits for admission, then FOR and AGAINST run concurrently and the
+        # judge starts once both are done
+        debate = asyncio.create_task(execute_debate(request, plan, current_user["user_id"]))
+        if await watch_disconnect(http_request, debate):
+            if plan.cached is None:
+                await record_cancelled_debate(current_user["user_id"], request.topic, plan.model_name, {}, plan.transcript)
+            raise HTTPException(status_code=499, detail="Client closed request")
+        if plan.ticket is not None:
+            response.headers.update(queue_headers(plan.ticket))
 
         return DebateResponse(
             status="success",
             message="Debate completed successfully",
-            data={"topic": request.topic, "model": model_name, "results": parsed_results}
+            data=debate.result()
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
+        if plan is not None and plan.ticket is not None and is_rate_limit_error(e):
+            raise provider_rate_limited(plan.model_name, plan.ticket.requests, plan.ticket.tokens)
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# ─── Debate Jobs ──────────────────────────────────────────────────────────────
+# A job outlives the request that started it: the client can drop, poll
+# /api/jobs/{id}, or reattach to the event stream where it left off.
+
+# Keep-alive comment so proxies don't close a stream that is waiting on a queued job
+JOB_STREAM_KEEPALIVE_SECONDS = 15
+JOB_ADMISSION_RETRIES = 5
+MAX_BATCH_DEBATES = 500
+
+async def plan_with_retry(request: DebateRequest, user_id: str, emit=None, stream=False) -> DebatePlan:
+    # A job can wait out the model's rate limit instead of failing
+    for attempt in range(JOB_ADMISSION_RETRIES):
+        try:
+            return await plan_debate(request, user_id, stream=stream)
+        except HTTPException as e:
+            if e.status_code != 429 or attempt + 1 == JOB_ADMISSION_RETRIES:
+                raise
+            retry_after = int(e.headers["Retry-After"])
+            if emit is not None:
+                emit({'type': 'queued', 'position': None, 'estimated_wait': retry_after})
+            await asyncio.sleep(retry_after)
+
+async def run_debate_job(job: dict, emit) -> dict:
+    request = DebateRequest(**job["request"])
+    plan = await plan_with_retry(request, job["user_id"], emit, stream=True)
+    emit({'type': 'status', 'message': f'Selected Model: {plan.model_name}'})
+    emit({'type': 'debate_start', 'topic': request.topic, **plan.reuse_info})
+    data = await execute_debate(request, plan, job["user_id"], on_event=emit)
+    emit({'type': 'debate_complete', 'data': data})
+    return {"debate_id": data["debate_id"]}
+
+async def run_batch_job(job: dict, emit) -> dict:
+    batch = BatchRequest(**job["request"])
+    user_id = job["user_id"]
+    # The job's own event log is the checkpoint: a retried job skips finished debates
+    done = {event["id"] for _, event in await job_workers.store.events_after(job["_id"], 0)
+            if event.get("type") == "batch_item" and event.get("status") == "ok"}
+    rows = [(str(i), debate) for i, debate in enumerate(batch.debates) if str(i) not in done]
+
+    async def run_one(request: DebateRequest) -> dict:
+        async def attempt():
+            plan = await plan_with_retry(request, user_id)
+            return plan, await execute_debate(request, plan, user_id)
+
+        plan, data = await retry_rate_limited(attempt, MODEL_CHOICE_MAP.get(request.model_choice, "Llama 3.1 8B Instant"))
+        return {
+            "debate_id": data["debate_id"],
+            "topic": request.topic,
+            "model": plan.model_name,
+            "verdict": data["structured"]["judge"]["side"],
+            "cached": data.get("cached", False),
+            "tokens": tokens_used(plan.tasks, data["results"]),
+        }
+
+    async def on_result(record: dict):
+        emit({"type": "batch_item", **record})
+
+    stats = await run_batch(rows, run_one, on_result, concurrency=batch.concurrency)
+    report = {**stats.report(), "skipped": len(done)}
+    emit({"type": "batch_complete", **report})
+    return report
+
+job_workers.register("debate", run_debate_job)
+job_workers.register("batch", run_batch_job)
+
+async def get_user_job(job_id: str, user_id: str) -> dict:
+    job = await job_workers.store.get(job_id)
+    if job is None or job["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Job not found or not authorized")
+    return job
+
+def job_view(job: dict) -> dict:
+    def iso(value):
+        return value.isoformat() if value else None
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": iso(job["created_at"]),
+        "started_at": iso(job["started_at"]),
+        "finished_at": iso(job["finished_at"]),
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+@app.post("/api/jobs/debate", status_code=202)
+async def submit_debate_job(request: DebateRequest, current_user: dict = Depends(get_current_user)):
+    job = await job_workers.submit(current_user["user_id"], "debate", request.model_dump())
+    return {
+        "status": "success",
+        "job_id": job["_id"],
+        "status_url": f"/api/jobs/{job['_id']}",
+        "events_url": f"/api/jobs/{job['_id']}/events",
+    }
+
+@app.post("/api/jobs/batch", status_code=202)
+async def submit_batch_job(request: BatchRequest, current_user: dict = Depends(get_current_user)):
+    if not request.debates:
+        raise HTTPException(status_code=400, detail="A batch needs at least one debate")
+    if len(request.debates) > MAX_BATCH_DEBATES:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {MAX_BATCH_DEBATES} debates")
+    job = await job_workers.submit(current_user["user_id"], "batch", request.model_dump())
+    return {
+        "status": "success",
+        "job_id": job["_id"],
+        "status_url": f"/api/jobs/{job['_id']}",
+        "events_url": f"/api/jobs/{job['_id']}/events",
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await get_user_job(job_id, current_user["user_id"])
+    return {"status": "success", "job": job_view(job)}
+
+async def stream_job_events(job_id: str, after: int, http_request: Request) -> AsyncGenerator[str, None]:
+    store = job_workers.store
+    idle = 0.0
+    while True:
+        events = await store.events_after(job_id, after)
+        for seq, event in events:
+            yield sse(event, event_id=seq)
+            after = seq
+        if events:
+            idle = 0.0
+            continue
+        job = await store.get(job_id)
+        if job is None:
+            return
+        if job["status"] in TERMINAL:
+            # Events are logged before the status changes; drain anything left
+            for seq, event in await store.events_after(job_id, after):
+                yield sse(event, event_id=seq)
+            return
+        if await http_request.is_disconnected():
+            return
+        if idle >= JOB_STREAM_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            idle = 0.0
+        started = asyncio.get_running_loop().time()
+        await store.wait_for_events(job_id, after, timeout=DISCONNECT_POLL_SECONDS)
+        idle += asyncio.get_running_loop().time() - started
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, http_request: Request, last_event_id: Optional[int] = None,
+                     current_user: dict = Depends(get_current_user)):
+    await get_user_job(job_id, current_user["user_id"])
+    # Browsers resend Last-Event-ID on reconnect; fetch-based clients can use the query parameter
+    header = http_request.headers.get("last-event-id")
+    after = last_event_id if last_event_id is not None else int(header) if header and header.isdigit() else 0
+    return StreamingResponse(
+        stream_job_events(job_id, after, http_request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    )
+
 @app.post("/api/followup")
 async def ask_followup(request: FollowUpRequest, current_user: dict = Depends(get_current_user)):
     try:
+        session = None
+        if request.debate_id:
+            session = await followup_sessions.get(current_user["user_id"], request.debate_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Debate not found or not authorized")
+            context, history = session.context, session.history()
+        elif request.debate_context:
+            context, history = request.debate_context, ""
+        else:
+            raise HTTPException(status_code=400, detail="Either debate_id or debate_context is required")
+
         model_name = MODEL_CHOICE_MAP.get(request.model_choice, "Llama 3.1 8B Instant")
+        await llm_stack.ready()
+        from crewai import Crew
         llm = select_model(model_name)
-        followup_task = create_followup_task(request.question, request.debate_context, llm)
-        crew = Crew(agents=[followup_agent], tasks=[followup_task], verbose=False)
-        result = crew.kickoff()
+        followup_task = create_followup_task(request.question, context, llm, history=history)
+        prompt_tokens = estimate_tokens(followup_task.description)
+        ticket = admit(model_name, current_user["user_id"], 1,
+                       prompt_tokens + PROMPT_OVERHEAD_TOKENS + DEFAULT_COMPLETION_TOKENS)
+        await ticket.wait()
+        crew = Crew(agents=[followup_task.agent], tasks=[followup_task], verbose=False)
+        began = time.monotonic()
+        try:
+            result = await run_llm(crew.kickoff)
+            record_llm_call(MODEL_MAP[model_name], "followup", time.monotonic() - began, ok=True,
+                            prompt_tokens=prompt_tokens + PROMPT_OVERHEAD_TOKENS,
+                            completion_tokens=estimate_tokens(str(result)))
+        except Exception as e:
+            record_llm_call(MODEL_MAP[model_name], "followup", time.monotonic() - began, ok=False,
+                            prompt_tokens=prompt_tokens + PROMPT_OVERHEAD_TOKENS)
+            if is_rate_limit_error(e):
+                raise provider_rate_limited(model_name, ticket.requests, ticket.tokens)
+            raise
+
+        if session is not None:
+            session.record(request.question, str(result))
+            await followup_sessions.save(session)
         return DebateResponse(
             status="success",
             message="Follow-up answer generated",
-            data={"question": request.question, "answer": str(result)}
+            data={
+                "question": request.question,
+                "answer": str(result),
+                "prompt_tokens": prompt_tokens,
+                "turn": (session.omitted + len(session.turns)) if session else None,
+            }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -5,6 +5,8 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 
+from metrics import span
+
 SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 72
@@ -22,16 +24,19 @@ def _safe_password(password: str) -> str:
     return password.encode("utf-8")[:72].decode("utf-8", "ignore")
 
 
+@span("auth.hash_password")
 def hash_password(password: str) -> str:
     password = _safe_password(password)
     return pwd_context.hash(password)
 
 
+@span("auth.verify_password")
 def verify_password(plain: str, hashed: str) -> bool:
     plain = _safe_password(plain)
     return pwd_context.verify(plain, hashed)
 
 
+@span("auth.jwt_encode")
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
@@ -39,6 +44,7 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+@span("auth.jwt_decode")
 def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
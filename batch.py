@@ -0,0 +1,232 @@
+"""Run many debates from a JSONL file, for evaluation datasets.
+
+Each input line is a DebateRequest-shaped object (topic, model_choice, depth,
+args_per_side, tone, focus, rounds, use_cache) with an optional "id"; lines
+without one are identified by their line number. Results are appended to the
+output file as each debate finishes, and that file doubles as the checkpoint:
+rerunning the same command skips every id already recorded as "ok". A debate
+the provider rate-limits (429) is retried with backoff before it counts as
+failed.
+
+    python batch.py topics.jsonl -o results.jsonl --concurrency 4
+
+The same runner backs POST /api/jobs/batch.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BATCH_CONCURRENCY     = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+BATCH_RATE_LIMIT_RETRIES = int(os.getenv("BATCH_RATE_LIMIT_RETRIES", "5"))
+
+RATE_LIMIT_BACKOFF_BASE = 2.0    # seconds before the first retry after a provider 429, doubled each time
+RATE_LIMIT_BACKOFF_MAX  = 60.0
+
+def read_rows(path):
+    """[(id, row)] for every non-blank line of a JSONL file."""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                row = json.loads(line)
+                rows.append((str(row.get("id", line_number)), row))
+    return rows
+
+def completed_ids(path):
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue   # a line cut short when the last run was killed
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+def tokens_used(tasks, results):
+    """Estimated prompt + completion tokens of one debate; 0 when nothing was generated."""
+    from tasks import estimate_tokens
+    if not tasks:
+        return 0
+    answers = [results["for_arguments"], results["against_arguments"], results["summary"]]
+    prompts = sum(estimate_tokens(task.description) for task in tasks)
+    # The judge's prompt carries both sides' arguments as context
+    return prompts + sum(map(estimate_tokens, answers)) + estimate_tokens(answers[0]) + estimate_tokens(answers[1])
+
+class BatchStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.ok = 0
+        self.failed = 0
+        self.tokens = 0
+
+    def add(self, record):
+        if record["status"] == "ok":
+            self.ok += 1
+            self.tokens += record.get("tokens", 0)
+        else:
+            self.failed += 1
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "debates": self.ok,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 1),
+            "debates_per_min": round(self.ok * 60 / elapsed, 2) if elapsed else 0.0,
+            "tokens_per_sec": round(self.tokens / elapsed, 1) if elapsed else 0.0,
+        }
+
+async def run_batch(rows, run_one, on_result, concurrency=BATCH_CONCURRENCY):
+    """Run run_one(row) -> dict for each (id, row) with at most `concurrency` in flight.
+
+    on_result(record) is awaited as each debate finishes, in completion order.
+    A failing row is recorded with status "error" and does not stop the batch.
+    """
+    stats = BatchStats()
+    slots = asyncio.Semaphore(max(1, min(concurrency, BATCH_MAX_CONCURRENCY)))
+
+    async def one(row_id, row):
+        async with slots:
+            began = time.monotonic()
+            try:
+                record = {"id": row_id, "status": "ok", **await run_one(row)}
+            except Exception as e:
+                record = {"id": row_id, "status": "error", "error": str(e) or type(e).__name__}
+            record["elapsed_seconds"] = round(time.monotonic() - began, 2)
+        stats.add(record)
+        await on_result(record)
+
+    await asyncio.gather(*(one(row_id, row) for row_id, row in rows))
+    return stats
+
+async def retry_rate_limited(run, model_name, retries=BATCH_RATE_LIMIT_RETRIES):
+    """await run(), running it again with backoff while the provider answers 429.
+
+    Each 429 also drains the model's scheduler budgets, so the debates queued
+    behind this one back off too. run must plan (and queue) the debate afresh.
+    """
+    from agents import MODEL_MAP
+    from scheduler import scheduler, is_rate_limit_error
+
+    for attempt in range(retries):
+        try:
+            return await run()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt + 1 == retries:
+                raise
+            scheduler.queue(MODEL_MAP.get(model_name, model_name)).penalize()
+            delay = min(RATE_LIMIT_BACKOFF_MAX, RATE_LIMIT_BACKOFF_BASE * 2 ** attempt)
+            print(f"⚠️ {model_name} is rate limited by the provider, retrying in {delay:.0f}s "
+                  f"(attempt {attempt + 1}/{retries})")
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+# ─── CLI ─────────────────────────────────────────────────────────────────────
+
+async def run_debate_row(row):
+    """One debate straight through the pipeline, within the scheduler's rate limits.
+
+    Rows take the same fields as DebateRequest: "rounds" adds rebuttal rounds
+    and "use_cache": false skips the debate cache (the result is still cached).
+    """
+    from agents import MODEL_MAP, model_name, select_model
+    from cache import debate_cache, cache_key
+    from debate_rounds import RoundSettings, MAX_ROUNDS
+    from parsing import structure_debate
+    from pipeline import run_debate_pipeline, debate_results, estimate_debate_tokens, estimate_rebuttal_cost
+    from scheduler import scheduler, RateLimited
+    from tasks import debate_tasks
+
+    name = model_name(row.get("model_choice", "1"))
+    settings = {"depth": row.get("depth", "standard"), "args_per_side": int(row.get("args_per_side", 4)),
+                "tone": row.get("tone", "balanced"), "focus": row.get("focus", "general")}
+    rounds = int(row.get("rounds", 1))
+    if not 1 <= rounds <= MAX_ROUNDS:
+        raise ValueError(f"rounds must be between 1 and {MAX_ROUNDS}")
+    key = cache_key(row["topic"], name, settings["depth"], settings["args_per_side"], settings["tone"],
+                    settings["focus"], rounds=rounds)
+
+    tasks = None
+    results = await debate_cache.get(key) if row.get("use_cache", True) else None
+    cached = results is not None
+    models_used = {}
+    if not cached:
+        async def run_once():
+            nonlocal tasks
+            llm = select_model(name)
+            tasks = debate_tasks(row["topic"], llm, **settings)
+            calls, tokens = len(tasks), estimate_debate_tokens(tasks)
+            round_settings = None
+            if rounds > 1:
+                round_settings = RoundSettings(row["topic"], llm, rounds, **settings)
+                rebuttal_calls, rebuttal_tokens = estimate_rebuttal_cost(rounds, settings["args_per_side"])
+                calls += rebuttal_calls
+                tokens += rebuttal_tokens
+            while True:
+                try:
+                    ticket = scheduler.submit(MODEL_MAP[name], "batch", calls, tokens)
+                    break
+                except RateLimited as e:
+                    await asyncio.sleep(e.retry_after)
+            await ticket.wait()
+            models_used.clear()
+            transcript = []
+            outputs = await run_debate_pipeline(tasks, models=models_used, allow_fallback=row.get("allow_fallback", True),
+                                                args_per_side=settings["args_per_side"], rounds=round_settings,
+                                                transcript=transcript)
+            return debate_results(outputs, transcript)
+
+        results = await retry_rate_limited(run_once, name)
+        await debate_cache.set(key, results)
+
+    structured = structure_debate(results, settings["args_per_side"])
+    return {
+        "topic": row["topic"],
+        "model": name,
+        "models_used": models_used,
+        "verdict": structured["judge"]["side"],
+        "structured": structured,
+        "cached": cached,
+        "tokens": tokens_used(tasks, results),
+        "results": results,
+    }
+
+async def main(args):
+    rows = read_rows(args.input)
+    done = completed_ids(args.output)
+    pending = [(row_id, row) for row_id, row in rows if row_id not in done]
+    print(f"📋 {len(rows)} debates in {args.input}, {len(rows) - len(pending)} already in {args.output}")
+
+    finished = 0
+    with open(args.output, "a", encoding="utf-8") as out:
+        async def on_result(record):
+            nonlocal finished
+            finished += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            mark = "✅" if record["status"] == "ok" else "❌"
+            print(f"{mark} [{finished}/{len(pending)}] {record['id']} {record['elapsed_seconds']}s"
+                  + (f" {record['error']}" if record["status"] != "ok" else ""))
+
+        stats = await run_batch(pending, run_debate_row, on_result, concurrency=args.concurrency)
+
+    report = stats.report()
+    print(f"\n🏁 {report['debates']} debates ({report['failed']} failed) in {report['elapsed_seconds']}s: "
+          f"{report['debates_per_min']} debates/min, {report['tokens_per_sec']} tokens/s (estimated)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file of debate requests")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL results file, also the checkpoint")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="debates run at once")
+    asyncio.run(main(parser.parse_args()))
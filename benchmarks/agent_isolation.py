@@ -0,0 +1,52 @@
+"""Stress check: concurrent debates with interleaved models never share agents.
+
+Each debate gets a FakeLLM named after its model, which echoes that name in
+every reply. The run fails if any stage of any debate answers with another
+debate's model:
+
+    python benchmarks/agent_isolation.py --debates 60 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")
+
+from agents import MODEL_MAP
+from fake_llm import FakeLLM
+from pipeline import run_debate_pipeline
+from tasks import debate_tasks
+
+
+async def one_debate(i, llms, models):
+    model = models[i % len(models)]
+    tasks = debate_tasks(f"Topic number {i}", llms[model], args_per_side=1 + i % 6)
+    outputs = await run_debate_pipeline(tasks)
+    wrong = [str(o.raw) for o in outputs if f"fake/{model}" not in str(o.raw)]
+    return model, wrong
+
+
+async def main(args):
+    models = list(MODEL_MAP.values())
+    llms = {m: FakeLLM(model=f"fake/{m}", latency=args.latency) for m in models}
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one_debate(i, llms, models) for i in range(args.debates)))
+    elapsed = time.perf_counter() - start
+
+    leaks = [(model, wrong) for model, wrong in results if wrong]
+    print(f"{args.debates} debates across {len(models)} models in {elapsed:.2f}s")
+    for model, wrong in leaks:
+        print(f"❌ {model} debate answered by another model: {wrong[0][:120]!r}")
+    if leaks:
+        sys.exit(1)
+    print("✅ every stage used the model its debate asked for")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--debates", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake LLM call")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+"""Prompt size and latency per round of a multi-round debate: compacted digests vs. the full transcript.
+
+Runs run_debate_pipeline against FakeLLM, whose answers are padded to a
+realistic length. --prompt-rate makes each call's time to first token grow
+with its prompt, the way a provider's does. For every round it prints the
+rebuttal prompts actually sent (both sides, from the round_complete events),
+what they would have been had each side been resent the whole transcript so
+far, and how long the round took:
+
+    python benchmarks/debate_rounds.py --rounds 5 --args 4 --prompt-rate 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")
+
+from debate_rounds import RoundSettings, transcript
+from fake_llm import FakeLLM
+from pipeline import run_debate_pipeline
+from tasks import debate_tasks, estimate_tokens, rebuttal_task
+
+TOPIC = "Should artificial intelligence be regulated by governments?"
+EVIDENCE = " Several independent studies and recent policy experience support this in detail."
+
+
+class VerboseFakeLLM(FakeLLM):
+    """FakeLLM whose arguments run to a few sentences each, like a real model's."""
+
+    def _reply(self, prompt):
+        reply = super()._reply(prompt)
+        if "VERDICT:" in prompt:
+            return reply
+        return "\n".join(line + EVIDENCE * 3 if line[:1].isdigit() else line for line in reply.split("\n"))
+
+
+def naive_tokens(settings, rounds, round_no):
+    # Both sides resent everything said so far, plus the opponent's last round in full
+    total = 0
+    for side, other in (("for", "against"), ("against", "for")):
+        task = rebuttal_task(
+            settings.topic, side, settings.llm, round_no, settings.rounds,
+            transcript(rounds, side), transcript(rounds, other), rounds[-1][other],
+            depth=settings.depth, args_per_side=settings.args_per_side,
+        )
+        total += estimate_tokens(task.description)
+    return total
+
+
+async def run(args):
+    llm = VerboseFakeLLM(latency=args.latency, prompt_rate=args.prompt_rate)
+    settings = RoundSettings(topic=TOPIC, llm=llm, rounds=args.rounds, args_per_side=args.args)
+    finished = {}
+    started = time.perf_counter()
+
+    def on_event(event):
+        if event["type"] == "round_complete":
+            finished[event["round"]] = time.perf_counter()
+
+    rounds = []
+    await run_debate_pipeline(debate_tasks(TOPIC, llm, args_per_side=args.args), on_event=on_event,
+                              args_per_side=args.args, rounds=settings, transcript=rounds)
+
+    print(f"{'round':>5}  {'compacted':>9}  {'full':>7}  {'seconds':>7}")
+    previous = started
+    for i, entry in enumerate(rounds):
+        full = entry["prompt_tokens"] if i == 0 else naive_tokens(settings, rounds[:i], entry["round"])
+        elapsed = finished[entry["round"]] - previous
+        previous = finished[entry["round"]]
+        print(f"{entry['round']:>5}  {entry['prompt_tokens']:>9}  {full:>7}  {elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--args", type=int, default=4, help="arguments per side")
+    parser.add_argument("--latency", type=float, default=0.2, help="fixed seconds per fake LLM call")
+    parser.add_argument("--prompt-rate", type=float, default=2000, help="prompt tokens read per second")
+    asyncio.run(run(parser.parse_args()))
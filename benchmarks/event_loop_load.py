@@ -0,0 +1,82 @@
+"""Load test: /health and /api/auth/login latency while N debates are in flight.
+
+Boots app.py in-process on a local port with FakeLLM standing in for Groq, so
+only MONGODB_URI needs to point at a reachable database:
+
+    python benchmarks/event_loop_load.py --debates 8 --latency 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")
+
+import uvicorn
+
+import app as app_module
+from fake_llm import FakeLLM
+
+
+def request(base, method, path, body=None, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base + path, data=data, headers=headers, method=method)
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=600) as res:
+        payload = json.loads(res.read() or b"null")
+    return time.perf_counter() - start, payload
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<8} n={len(ms):<4} p50={percentile(ms, 50):8.1f}ms  p95={percentile(ms, 95):8.1f}ms  max={max(ms):8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--debates", type=int, default=8, help="debates kept in flight")
+    parser.add_argument("--latency", type=float, default=5.0, help="seconds per fake LLM call")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    app_module.select_model = lambda choice, stream=False: FakeLLM(latency=args.latency)
+    server = uvicorn.Server(uvicorn.Config(app_module.app, port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    base = f"http://127.0.0.1:{args.port}"
+
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    creds = {"username": name, "email": f"{name}@example.com", "password": "benchmark-pass"}
+    _, reg = request(base, "POST", "/api/auth/register", creds)
+    token = reg["token"]
+
+    debate = {"topic": "Should cities ban cars downtown?", "model_choice": "1"}
+    health, logins = [], []
+    with ThreadPoolExecutor(max_workers=args.debates) as pool:
+        futures = [pool.submit(request, base, "POST", "/api/debate", debate, token) for _ in range(args.debates)]
+        while not all(f.done() for f in futures):
+            health.append(request(base, "GET", "/health")[0])
+            logins.append(request(base, "POST", "/api/auth/login",
+                                  {"email": creds["email"], "password": creds["password"]})[0])
+        debate_times = [f.result()[0] for f in futures]
+
+    print(f"{args.debates} debates in flight, {args.latency:.1f}s per LLM call")
+    report("debate", debate_times)
+    report("health", health)
+    report("login", logins)
+    server.should_exit = True
@@ -0,0 +1,95 @@
+"""Peak memory and throughput of a history export as the number of debates grows.
+
+Streams synthetic debates from a stand-in for a Motor cursor (an async
+iterator that hands out documents the way a batched cursor does) through
+export.stream_export and discards the output, tracking the Python heap's
+peak with tracemalloc. With constant-memory streaming the peak stays flat
+from a few hundred debates to a million:
+
+    python benchmarks/export_memory.py --debates 100 1000 100000 1000000
+    python benchmarks/export_memory.py --format csv --gzip
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+import zlib
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import EXPORT_BATCH_SIZE, stream_export
+
+ARGUMENT = "Several independent studies and recent policy experience support this point in some detail. "
+
+
+class MockCursor:
+    """Yields `total` debate documents, building one batch at a time like a server-side cursor."""
+
+    def __init__(self, total, batch_size=EXPORT_BATCH_SIZE):
+        self.total = total
+        self.batch_size = batch_size
+        self.closed = False
+
+    def _debate(self, i):
+        side = "FOR" if i % 2 else "AGAINST"
+        return {
+            "_id": f"{i:024x}",
+            "user_id": f"user-{i % 50}",
+            "topic": f"Should topic number {i} be regulated by governments?",
+            "model": "Llama 3.1 8B Instant",
+            "created_at": datetime(2025, 1, 1) + timedelta(seconds=i),
+            "status": "completed",
+            "verdict": side,
+            "settings": {"depth": "standard", "args_per_side": 4, "tone": "neutral", "focus": "balanced", "rounds": 1},
+            "usage": {"latency_ms": 4200, "prompt_tokens": 1800, "completion_tokens": 900},
+            "results": {
+                "for_arguments": "\n".join(f"{n}. {ARGUMENT * 3}" for n in range(1, 5)),
+                "against_arguments": "\n".join(f"{n}. {ARGUMENT * 3}" for n in range(1, 5)),
+                "summary": f"VERDICT: {side} wins narrowly. REASONING: {ARGUMENT * 2}",
+            },
+            "structured": {"judge": {"side": side, "margin": "narrow"}},
+        }
+
+    async def __aiter__(self):
+        for start in range(0, self.total, self.batch_size):
+            batch = [self._debate(i) for i in range(start, min(start + self.batch_size, self.total))]
+            await asyncio.sleep(0)   # the round trip for the next batch
+            for doc in batch:
+                yield doc
+
+    def close(self):
+        self.closed = True
+
+
+async def measure(total, fmt, compress):
+    cursor = MockCursor(total)
+    tracemalloc.start()
+    start = time.perf_counter()
+    size, check = 0, zlib.decompressobj(31) if compress else None
+    async for chunk in stream_export(cursor, fmt, compress=compress):
+        size += len(chunk)
+        if check is not None:
+            check.decompress(chunk)   # the gzip stream is well formed as it goes
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert cursor.closed
+    print(f"{total:>9}  {size / 1e6:>9.1f}  {peak / 1e6:>9.2f}  {total / elapsed:>9.0f}")
+
+
+async def run(args):
+    print(f"format {args.format}{' + gzip' if args.gzip else ''}, batches of {EXPORT_BATCH_SIZE}")
+    print(f"{'debates':>9}  {'output MB':>9}  {'peak MB':>9}  {'debates/s':>9}")
+    for total in args.debates:
+        await measure(total, args.format, args.gzip)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--debates", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="compress the export on the fly")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,50 @@
+"""Prompt size per follow-up turn: resending the debate vs. a server-side session.
+
+No LLM is called; answers are synthetic and prompts are measured with
+tasks.estimate_tokens, the same estimate /api/followup reports:
+
+    python benchmarks/followup_prompt.py --turns 20 --args 6
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")
+
+from followup_sessions import FollowUpSession, compact_context
+from tasks import create_followup_task, estimate_tokens
+from fake_llm import FakeLLM
+
+
+def side(label, n):
+    return "\n".join(
+        f"{i}. {label} argument {i}: " + "Evidence from several studies supports this claim in detail. " * 6
+        for i in range(1, n + 1)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--args", type=int, default=6, help="arguments per side in the debate")
+    args = parser.parse_args()
+
+    topic = "Should governments regulate artificial intelligence?"
+    results = {
+        "for_arguments": side("Supporting", args.args),
+        "against_arguments": side("Opposing", args.args),
+        "summary": "VERDICT: FOR wins narrowly. REASONING: " + "Stronger evidence overall. " * 20,
+    }
+    full_context = (f"Topic: {topic}\n\nArguments For:\n{results['for_arguments']}\n\n"
+                    f"Arguments Against:\n{results['against_arguments']}\n\nConclusion:\n{results['summary']}")
+    llm = FakeLLM()
+    session = FollowUpSession("benchmark", compact_context(topic, results))
+
+    print(f"{'turn':>4}  {'legacy':>8}  {'session':>8}")
+    for turn in range(1, args.turns + 1):
+        question = f"Question {turn}: how does argument {turn % args.args + 1} hold up against the other side?"
+        legacy = estimate_tokens(create_followup_task(question, full_context, llm).description)
+        bounded = estimate_tokens(create_followup_task(question, session.context, llm, history=session.history()).description)
+        print(f"{turn:>4}  {legacy:>8}  {bounded:>8}")
+        session.record(question, "It holds up reasonably well. The evidence is strong but contested. " * 4)
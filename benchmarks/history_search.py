@@ -0,0 +1,137 @@
+"""Search latency over one user's history of thousands of synthetic debates.
+
+Times the local inverted-index backend (build, query, snippets) in-process.
+With --mongo it also loads the corpus into a scratch database on MONGODB_URI,
+builds the same text index the app uses and times ranked $text pages:
+
+    python benchmarks/history_search.py --debates 5000 --queries 500
+    python benchmarks/history_search.py --debates 5000 --mongo
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import FIELD_PATHS, FIELD_WEIGHTS, LocalSearchIndex, document_fields, snippet, terms
+
+SUBJECTS = ["artificial intelligence", "nuclear energy", "remote work", "universal basic income", "social media",
+            "electric vehicles", "space exploration", "genetic engineering", "cryptocurrency", "school uniforms",
+            "carbon taxes", "rent control", "self-driving cars", "homework", "video games", "public transport"]
+VERBS = ["be regulated", "be banned", "be subsidized", "be taxed", "be mandatory", "replace teachers",
+         "be taught in schools", "be publicly funded"]
+ACTORS = ["governments", "cities", "schools", "employers", "the EU", "universities"]
+FILLER = ("evidence studies economic costs benefits public health privacy jobs markets innovation safety "
+          "fairness inequality emissions regulation research communities families trust accountability "
+          "productivity wages access education infrastructure competition risk oversight transparency").split()
+
+
+def synthetic_debate(rng, i):
+    subject = rng.choice(SUBJECTS)
+    topic = f"Should {subject} {rng.choice(VERBS)} by {rng.choice(ACTORS)}?"
+
+    def side(label):
+        return "\n".join(
+            f"{n}. {label} point on {subject}: " + " ".join(rng.choice(FILLER) for _ in range(45)) + "."
+            for n in range(1, 5)
+        )
+
+    winner = rng.choice(["FOR", "AGAINST"])
+    return {
+        "_id": f"{i:024x}",
+        "topic": topic,
+        "model": "Llama 3.1 8B Instant",
+        "created_at": datetime(2025, 1, 1) + timedelta(minutes=i),
+        "verdict": winner,
+        "results": {
+            "for_arguments": side("Supporting"),
+            "against_arguments": side("Opposing"),
+            "summary": f"VERDICT: {winner} wins narrowly. REASONING: " + " ".join(rng.choice(FILLER) for _ in range(40)),
+        },
+    }
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000
+    return pct(50), pct(95), pct(99)
+
+
+def queries(rng, n):
+    words = [w for s in SUBJECTS for w in s.split()] + FILLER
+    return [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(n)]
+
+
+def bench_local(corpus, qs, limit):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    index = LocalSearchIndex()
+    for doc in corpus:
+        index.add(doc["_id"], document_fields(doc))
+    build = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    by_id = {doc["_id"]: doc for doc in corpus}
+    samples = []
+    for q in qs:
+        start = time.perf_counter()
+        query_terms = terms(q)
+        page = index.search(query_terms, limit)
+        for debate_id, _ in page:
+            snippet(document_fields(by_id[debate_id]), query_terms)
+        samples.append(time.perf_counter() - start)
+    p50, p95, p99 = percentiles(samples)
+    print(f"local   build {build:6.2f}s  ~{(rss_after - rss_before) / 1024:5.0f} MB  "
+          f"query+snippets p50 {p50:6.2f}ms  p95 {p95:6.2f}ms  p99 {p99:6.2f}ms")
+
+
+async def bench_mongo(corpus, qs, limit):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(os.environ["MONGODB_URI"], tls=True, tlsAllowInvalidCertificates=True)
+    db = client["mads_search_benchmark"]
+    try:
+        await db.debates.drop()
+        await db.debates.insert_many([{**doc, "_id": i, "user_id": "bench", "status": "completed"}
+                                      for i, doc in enumerate(corpus)])
+        await db.debates.create_index(
+            [("user_id", 1)] + [(path, "text") for path in FIELD_PATHS.values()],
+            weights={FIELD_PATHS[f]: w for f, w in FIELD_WEIGHTS.items()}, default_language="english",
+        )
+        score = {"$meta": "textScore"}
+        projection = {"topic": 1, "verdict": 1, **{p: 1 for p in FIELD_PATHS.values()}, "score": score}
+        samples = []
+        for q in qs:
+            start = time.perf_counter()
+            docs = await db.debates.find({"user_id": "bench", "$text": {"$search": q}}, projection) \
+                .sort([("score", score)]).limit(limit).to_list(limit)
+            query_terms = terms(q)
+            for doc in docs:
+                snippet(document_fields(doc), query_terms)
+            samples.append(time.perf_counter() - start)
+        p50, p95, p99 = percentiles(samples)
+        print(f"mongo   query+snippets p50 {p50:6.2f}ms  p95 {p95:6.2f}ms  p99 {p99:6.2f}ms (includes the round trip)")
+    finally:
+        await client.drop_database("mads_search_benchmark")
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--debates", type=int, default=5000, help="debates in the user's history")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20, help="results per page")
+    parser.add_argument("--mongo", action="store_true", help="also time the MongoDB text index")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus = [synthetic_debate(rng, i) for i in range(args.debates)]
+    qs = queries(rng, args.queries)
+    print(f"{args.debates} debates, {args.queries} queries, {args.limit} results per page")
+    bench_local(corpus, qs, args.limit)
+    if args.mongo:
+        asyncio.run(bench_mongo(corpus, qs, args.limit))
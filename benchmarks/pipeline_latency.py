@@ -0,0 +1,58 @@
+"""Wall-clock comparison of the sequential Crew path and the concurrent pipeline.
+
+Both paths run against FakeLLM with a fixed per-call delay, so the difference
+is pure orchestration:
+
+    python benchmarks/pipeline_latency.py --latency 1.0 --runs 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")
+
+from crewai import Crew
+from fake_llm import FakeLLM
+from pipeline import run_debate_pipeline
+from tasks import debate_tasks
+
+TOPIC = "Should artificial intelligence be regulated by governments?"
+
+
+def run_sequential(llm):
+    tasks = debate_tasks(TOPIC, llm)
+    crew = Crew(agents=[t.agent for t in tasks], tasks=tasks, verbose=False)
+    crew.kickoff()
+
+
+def run_concurrent(llm):
+    tasks = debate_tasks(TOPIC, llm)
+    asyncio.run(run_debate_pipeline(tasks))
+
+
+def timed(fn, llm, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(llm)
+        samples.append(time.perf_counter() - start)
+    return min(samples), sum(samples) / len(samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per fake LLM call")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    llm = FakeLLM(latency=args.latency)
+    seq_best, seq_mean = timed(run_sequential, llm, args.runs)
+    con_best, con_mean = timed(run_concurrent, llm, args.runs)
+
+    print(f"LLM latency per call: {args.latency:.2f}s, runs: {args.runs}")
+    print(f"sequential crew   best {seq_best:6.2f}s  mean {seq_mean:6.2f}s")
+    print(f"concurrent        best {con_best:6.2f}s  mean {con_mean:6.2f}s")
+    print(f"saved per debate  {seq_mean - con_mean:6.2f}s ({(1 - con_mean / seq_mean) * 100:.0f}%)")
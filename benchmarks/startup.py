@@ -0,0 +1,87 @@
+"""Cold start: time from launching the server to the first /health 200, and RSS after boot.
+
+Each run starts `uvicorn app:app` in a fresh process. --eager reproduces the
+old import graph, with crewai imported before the app, to measure the
+baseline. The lazy mode also reports how long the background LLM warm-up took
+to finish, read from /api/pipeline/stats. MONGODB_URI must be reachable,
+because startup still connects to MongoDB before uvicorn accepts requests.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --runs 5 --eager
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EAGER = "import crewai, litellm, uvicorn, app; uvicorn.run(app.app, port={port}, log_level='warning')"
+LAZY = "import uvicorn, app; uvicorn.run(app.app, port={port}, log_level='warning')"
+
+
+def rss_mb(pid):
+    # Linux only; Render and most CI runners qualify
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as res:
+            return res.status, res.read()
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None, b""
+
+
+def one_run(args):
+    code = (EAGER if args.eager else LAZY).format(port=args.port)
+    base = f"http://127.0.0.1:{args.port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT)
+    try:
+        while get(base + "/health")[0] != 200:
+            if proc.poll() is not None:
+                raise SystemExit(f"server exited with {proc.returncode}")
+            if time.perf_counter() - started > args.timeout:
+                raise SystemExit("server did not answer /health in time")
+            time.sleep(0.02)
+        result = {"health_seconds": time.perf_counter() - started, "rss_mb_at_health": rss_mb(proc.pid)}
+
+        # When the LLM stack is usable (immediately, in eager mode)
+        while True:
+            status, body = get(base + "/api/pipeline/stats")
+            if status == 200 and json.loads(body).get("llm_stack", {"loaded": True})["loaded"]:
+                break
+            time.sleep(0.05)
+        result["llm_ready_seconds"] = time.perf_counter() - started
+        result["rss_mb_after_boot"] = rss_mb(proc.pid)
+        return result
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(args):
+    runs = [one_run(args) for _ in range(args.runs)]
+    print(f"\n{'eager (baseline)' if args.eager else 'lazy'} startup, median of {args.runs} runs:")
+    for key, unit in (("health_seconds", "s"), ("llm_ready_seconds", "s"),
+                      ("rss_mb_at_health", " MB"), ("rss_mb_after_boot", " MB")):
+        print(f"  {key:<20}{statistics.median(r[key] for r in runs):>9.2f}{unit}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--eager", action="store_true", help="import crewai up front, like the old app.py")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--timeout", type=float, default=120)
+    main(parser.parse_args())
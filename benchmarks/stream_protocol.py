@@ -0,0 +1,74 @@
+"""Protocol check and TTFT measurement for /api/debate/stream.
+
+Drives app.run_debate_stream with a streaming FakeLLM, validates the SSE
+framing and event order, and compares time to first token with total time:
+
+    python benchmarks/stream_protocol.py --latency 0.5 --token-rate 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")
+
+import app as app_module
+from fake_llm import FakeLLM
+
+
+def check(condition, message):
+    if not condition:
+        print(f"❌ {message}")
+        sys.exit(1)
+
+
+async def main(args):
+    app_module.select_model = lambda choice, stream=False: FakeLLM(
+        latency=args.latency, stream=stream, token_rate=args.token_rate)
+
+    async def save_debate(**kwargs):
+        return "benchmark"
+    app_module.save_debate = save_debate
+
+    class ConnectedClient:
+        async def is_disconnected(self):
+            return False
+
+    request = app_module.DebateRequest(topic="Should homework be banned?", model_choice="1", args_per_side=3,
+                                       use_cache=False)
+    plan = await app_module.plan_debate(request, "benchmark-user", stream=True)
+    start = time.perf_counter()
+    ttft = None
+    events = []
+    async for frame in app_module.run_debate_stream(request, plan, "benchmark-user", ConnectedClient()):
+        check(frame.startswith("data: ") and frame.endswith("\n\n"), f"malformed SSE frame {frame!r}")
+        event = json.loads(frame[len("data: "):])
+        if event["type"] == "token" and ttft is None:
+            ttft = time.perf_counter() - start
+        events.append(event)
+    total = time.perf_counter() - start
+
+    check(events[-1]["type"] == "debate_complete", f"last event is {events[-1]}")
+    results = events[-1]["data"]["results"]
+    completed = []
+    for agent, key in (("for", "for_arguments"), ("against", "against_arguments"), ("judge", "summary")):
+        tokens = "".join(e["content"] for e in events if e["type"] == "token" and e["agent"] == agent)
+        check(tokens.strip() == results[key].strip(), f"{agent} tokens do not add up to its final answer")
+        completed.append(next(i for i, e in enumerate(events) if e["type"] == "agent_complete" and e["agent"] == agent))
+    first_judge = next(i for i, e in enumerate(events) if e["type"] == "token" and e["agent"] == "judge")
+    check(first_judge > max(completed[:2]), "judge streamed before both advocates finished")
+
+    tokens = sum(1 for e in events if e["type"] == "token")
+    print(f"✅ {len(events)} well-formed events, {tokens} token events tagged for/against/judge")
+    print(f"time to first token {ttft:6.2f}s")
+    print(f"full debate         {total:6.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="fake time to first token per call")
+    parser.add_argument("--token-rate", type=float, default=500, help="fake tokens generated per second")
+    asyncio.run(main(parser.parse_args()))
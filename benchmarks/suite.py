@@ -0,0 +1,201 @@
+"""Latency and throughput of the main API routes against the fake LLM backend.
+
+Boots app.py in-process with LLM_BACKEND=fake and rate limits lifted, so only
+MONGODB_URI needs to point at a reachable (preferably throwaway) database.
+Each scenario sends --requests requests with --concurrency in flight and
+reports p50/p95/p99 latency and requests per second:
+
+    python benchmarks/suite.py --requests 50 --concurrency 10 --latency 0.5
+    python benchmarks/suite.py --scenarios debate,stream --json before.json
+
+Scenarios: register, login, debate, stream (time to first token and total),
+followup, history.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = ["register", "login", "debate", "stream", "followup", "history"]
+
+
+def configure(args):
+    # Must happen before app (and through it agents and scheduler) is imported
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_TOKEN_RATE"] = str(args.token_rate)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.failure_rate)
+    os.environ["DEBATE_CACHE_BACKEND"] = "memory"
+    from agents import MODEL_MAP
+    os.environ["RATE_LIMITS"] = json.dumps({model: [10**6, 10**9] for model in MODEL_MAP.values()})
+
+
+def call(base, method, path, body=None, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base + path, data=data, headers=headers, method=method)
+    with urllib.request.urlopen(req, timeout=600) as res:
+        return json.loads(res.read() or b"null")
+
+
+def stream(base, body, token):
+    """Return (time to first token, total time) for one /api/debate/stream request."""
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+    req = urllib.request.Request(base + "/api/debate/stream", data=json.dumps(body).encode(),
+                                 headers=headers, method="POST")
+    start = time.perf_counter()
+    ttft = None
+    with urllib.request.urlopen(req, timeout=600) as res:
+        for line in res:
+            if not line.startswith(b"data: "):
+                continue
+            event = json.loads(line[len(b"data: "):])
+            if event["type"] == "token" and ttft is None:
+                ttft = time.perf_counter() - start
+            elif event["type"] == "error":
+                raise RuntimeError(event["message"])
+    total = time.perf_counter() - start
+    return (ttft if ttft is not None else total), total
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_scenario(name, job, requests, concurrency):
+    """Run job(i) for i in range(requests); job returns seconds or a dict of named seconds."""
+    samples, errors = {}, 0
+
+    def timed(i):
+        start = time.perf_counter()
+        result = job(i)
+        return result if isinstance(result, dict) else {name: time.perf_counter() - start}
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(timed, i) for i in range(requests)]:
+            try:
+                for metric, seconds in future.result().items():
+                    samples.setdefault(metric, []).append(seconds)
+            except (urllib.error.URLError, RuntimeError, KeyError) as e:
+                errors += 1
+                print(f"  {name}: {e}")
+    wall = time.perf_counter() - wall
+
+    rows = []
+    for metric, values in samples.items():
+        ms = [v * 1000 for v in values]
+        rows.append({
+            "scenario": metric, "requests": requests, "errors": errors, "concurrency": concurrency,
+            "p50_ms": round(percentile(ms, 50), 1), "p95_ms": round(percentile(ms, 95), 1),
+            "p99_ms": round(percentile(ms, 99), 1), "throughput_rps": round(len(values) / wall, 2),
+        })
+    if not samples:
+        rows.append({"scenario": name, "requests": requests, "errors": errors, "concurrency": concurrency,
+                     "p50_ms": None, "p95_ms": None, "p99_ms": None, "throughput_rps": 0.0})
+    return rows
+
+
+def print_rows(rows):
+    print(f"\n{'scenario':<13}{'n':>5}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for row in rows:
+        cells = [f"{row[k]:>10.1f}" if row[k] is not None else f"{'-':>10}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{row['scenario']:<13}{row['requests']:>5}{row['errors']:>5}{''.join(cells)}{row['throughput_rps']:>9.2f}")
+
+
+def main(args):
+    configure(args)
+    import uvicorn
+    import app as app_module
+
+    server = uvicorn.Server(uvicorn.Config(app_module.app, port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    base = f"http://127.0.0.1:{args.port}"
+
+    run_id = uuid.uuid4().hex[:8]
+    password = "benchmark-pass"
+    users = []
+
+    def register(i):
+        name = f"bench_{run_id}_{i}"
+        users.append((call(base, "POST", "/api/auth/register",
+                           {"username": name, "email": f"{name}@example.com", "password": password})["token"],
+                      f"{name}@example.com"))
+
+    # Later scenarios need at least one account, even if register isn't measured
+    scenarios = args.scenarios.split(",")
+    rows = []
+    if "register" in scenarios:
+        rows += run_scenario("register", register, args.requests, args.concurrency)
+    if not users:
+        register("main")
+    token, email = users[0]
+
+    def debate_body(i):
+        # Unique topics and no cache, so every request runs the full pipeline
+        return {"topic": f"Should benchmark city {run_id}-{i} ban cars downtown?", "model_choice": "1",
+                "args_per_side": args.args_per_side, "use_cache": False}
+
+    debate_ids = []
+
+    def debate(i):
+        debate_ids.append(call(base, "POST", "/api/debate", debate_body(i), token)["data"]["debate_id"])
+
+    def stream_debate(i):
+        ttft, total = stream(base, debate_body(f"s{i}"), token)
+        return {"stream_ttft": ttft, "stream_total": total}
+
+    def followup(i):
+        call(base, "POST", "/api/followup",
+             {"question": f"What is the strongest point? ({i})", "model_choice": "1",
+              "debate_id": debate_ids[i % len(debate_ids)]}, token)
+
+    jobs = {
+        "login": lambda i: call(base, "POST", "/api/auth/login", {"email": email, "password": password}),
+        "debate": debate,
+        "stream": stream_debate,
+        "followup": followup,
+        "history": lambda i: call(base, "GET", "/api/history", token=token),
+    }
+    for name in scenarios:
+        if name == "register":
+            continue
+        if name == "followup" and not debate_ids:
+            debate("followup")
+        rows += run_scenario(name, jobs[name], args.requests, args.concurrency)
+
+    print(f"\nfake LLM: {args.latency}s to first token, {args.token_rate:.0f} tokens/s, "
+          f"{args.failure_rate:.0%} failures")
+    print_rows(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+        print(f"\nwrote {args.json}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset to run")
+    parser.add_argument("--requests", type=int, default=20, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=5, help="requests in flight")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM time to first token")
+    parser.add_argument("--token-rate", type=float, default=500, help="fake LLM tokens per second")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake LLM calls that fail")
+    parser.add_argument("--args-per-side", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--json", help="also write the results to this file, for comparing runs")
+    main(parser.parse_args())
@@ -0,0 +1,78 @@
+"""Lookup latency of the near-duplicate topic index at scale.
+
+Builds a TopicIndex over synthetic topics spread across --users users, then
+times exact repeats, paraphrases and unseen topics, each looked up for the
+user who debated the original:
+
+    python benchmarks/topic_index.py --size 1000000 --users 1000 --queries 2000
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topic_index import TopicIndex
+
+SYLLABLES = ["ba", "co", "di", "fu", "ga", "he", "ki", "lo", "mu", "ne", "po", "ra", "si", "tu", "ve",
+             "za", "tion", "ment", "ing", "er", "al", "ic", "ous", "ism", "ity"]
+VERBS = ["be regulated", "be banned", "be subsidized", "be taxed", "be mandatory", "be taught in schools",
+         "be privatized", "be encouraged", "be restricted", "replace"]
+ACTORS = ["governments", "cities", "schools", "employers", "the EU", "parents", "universities"]
+
+
+def vocabulary(rng, size=20000):
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def synthetic_topic(rng, words):
+    return (f"Should {rng.choice(words)} {rng.choice(words)} {rng.choice(VERBS)} "
+            f"by {rng.choice(ACTORS)} in {rng.choice(words)}?")
+
+
+def paraphrase(topic):
+    # One added content word: similar enough to reuse, but not an exact repeat
+    return topic.lower().replace(" in ", " in modern ").rstrip("?")
+
+
+def time_queries(index, queries):
+    samples, hits = [], 0
+    for user_id, q in queries:
+        start = time.perf_counter()
+        hits += index.best_match(user_id, q) is not None
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    pct = lambda p: samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1e6
+    return pct(50), pct(99), hits
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    words = vocabulary(rng)
+    topics = [synthetic_topic(rng, words) for _ in range(args.size)]
+    index = TopicIndex()
+    start = time.perf_counter()
+    for i, topic in enumerate(topics):
+        index.add(f"user{i % args.users}", topic, str(i))
+    build = time.perf_counter() - start
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    sample = [(f"user{i % args.users}", topics[i]) for i in rng.sample(range(len(topics)), args.queries)]
+    print(f"indexed {len(index):,} topics in {build:.1f}s, peak RSS {rss_mb:.0f} MB")
+    for name, queries in (
+        ("exact repeat", [(user, t.upper()) for user, t in sample]),
+        ("paraphrase", [(user, paraphrase(t)) for user, t in sample]),
+        ("other user", [(f"user{(int(user[4:]) + 1) % args.users}", t) for user, t in sample]),
+        ("unseen", [(user, f"Is {rng.choice(words)} {rng.choice(words)} overrated?") for user, _ in sample]),
+    ):
+        p50, p99, hits = time_queries(index, queries)
+        print(f"{name:<13} p50 {p50:7.1f}µs  p99 {p99:7.1f}µs  matched {hits}/{len(queries)}")
@@ -0,0 +1,86 @@
+"""Precision and recall of topic matching on labelled paraphrase / non-paraphrase pairs.
+
+Scores every pair with topic_index.similarity and sweeps the threshold, so
+TOPIC_MATCH_THRESHOLD can be set where no non-paraphrase is reused and as
+many paraphrases as possible are. Pairs that score on the wrong side of the
+chosen threshold are listed:
+
+    python benchmarks/topic_pairs.py
+    python benchmarks/topic_pairs.py --threshold 0.75
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topic_index import DEFAULT_THRESHOLD, analyze, similarity
+
+# (topic, topic, same debate?)
+PAIRS = [
+    # The original request's examples
+    ("Should AI be regulated?", "should ai be regulated", True),
+    ("Should AI be regulated?", "Should artificial intelligence be regulated by governments?", True),
+    ("should ai be regulated", "Should artificial intelligence be regulated by governments?", True),
+    # Paraphrases
+    ("Should governments regulate AI?", "Should AI be regulated?", True),
+    ("Should AI be regulated?", "Should AI be regulated by the government?", True),
+    ("Should smartphones be banned in schools?", "Should schools ban smartphones?", True),
+    ("Should smartphones be banned in schools?", "Should smartphones be banned in schools", True),
+    ("Is remote work better than office work?", "Is remote work better than working in the office?", True),
+    ("Should college be free?", "Should college education be free?", True),
+    ("Should UBI be introduced?", "Should universal basic income be introduced?", True),
+    ("Should nuclear energy be expanded?", "Should we expand nuclear energy?", True),
+    ("Should the voting age be lowered to 16?", "Should the voting age be lowered to sixteen?", True),
+    ("Should homework be banned?", "Should homework be banned in schools?", True),
+    ("Should EVs be subsidized?", "Should electric vehicles be subsidised?", True),
+    ("Should cryptocurrency be regulated?", "Should cryptocurrencies be regulated?", True),
+    ("Should zoos be abolished?", "Should zoos be abolished?", True),
+    ("Is social media harmful?", "Is social media harmful to society?", True),
+    ("Should animal testing be banned?", "Should testing on animals be banned?", True),
+    # Same words, opposite or different questions
+    ("Should AI be regulated?", "Should AI not be regulated?", False),
+    ("Should AI be regulated?", "Shouldn't AI be regulated?", False),
+    ("Should AI be regulated?", "Should AI be deregulated?", False),
+    ("Should AI be regulated?", "Should AI art be regulated?", False),
+    ("Should AI be regulated in Europe?", "Should AI art be regulated in Europe?", False),
+    ("Should AI be regulated?", "Should AI be banned?", False),
+    ("Is remote work better than office work?", "Is office work better than remote work?", False),
+    ("Is remote work better than office work?", "Is remote work worse than office work?", False),
+    ("Should cannabis be legal?", "Should cannabis be illegal?", False),
+    ("Should cannabis be legalized?", "Should cannabis be banned?", False),
+    ("Should taxes on the rich be increased?", "Should taxes on the rich be reduced?", False),
+    ("Should we have more nuclear power?", "Should we have less nuclear power?", False),
+    ("Should homework be banned?", "Should homework be allowed?", False),
+    ("Should college be free?", "Should college be mandatory?", False),
+    ("Should zoos be abolished?", "Should zoos be funded?", False),
+    ("Is social media harmful?", "Is social media beneficial?", False),
+    ("Should EVs be subsidized?", "Should EVs be taxed?", False),
+    ("Should the UK rejoin the EU?", "Should the UK leave the EU?", False),
+    ("Should AI replace teachers?", "Should AI replace doctors?", False),
+    ("Should students wear uniforms?", "Should teachers wear uniforms?", False),
+    ("Is nuclear energy safe?", "Is nuclear energy unsafe?", False),
+]
+
+
+def sweep(scored):
+    print(f"{'threshold':>9}  {'precision':>9}  {'recall':>6}")
+    for t in [x / 20 for x in range(10, 20)]:
+        reused = [same for score, same in scored if score >= t]
+        hits = sum(reused)
+        precision = hits / len(reused) if reused else 1.0
+        recall = hits / sum(same for _, same in scored)
+        print(f"{t:>9.2f}  {precision:>9.2f}  {recall:>6.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    scored = [(similarity(analyze(a), analyze(b)), same) for a, b, same in PAIRS]
+    sweep(scored)
+    print(f"\nwrong at {args.threshold}:")
+    for (a, b, same), (score, _) in zip(PAIRS, scored):
+        if (score >= args.threshold) != same:
+            print(f"  {score:.3f}  {'missed' if same else 'false match'}: {a!r} / {b!r}")
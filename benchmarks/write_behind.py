@@ -0,0 +1,122 @@
+"""Check the write-behind debate writer through a MongoDB outage, against an in-memory collection.
+
+Queues debates while the collection accepts writes, then while it fails
+every insert (so they spill to a scratch JSONL file), deletes one queued and
+one spilled debate, restarts the writer and lets the collection recover. It
+checks that startup doesn't wait on the replay, that every debate not
+deleted lands exactly once, in the order it was queued, that pending and
+spilled debates stay readable until then, and that deleted ones never land:
+
+    python benchmarks/write_behind.py --debates 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import persistence
+from persistence import DebateWriter
+
+persistence.BACKOFF_BASE = 0.01     # keep the retries short
+persistence.FLUSH_INTERVAL = 0.05
+persistence.SPILL_RETRY_INTERVAL = 0.2
+
+
+class FlakyCollection:
+    """insert_many / delete_many over a dict; raises while `down`."""
+
+    def __init__(self):
+        self.docs = {}
+        self.order = []
+        self.down = False
+        self.inserts = 0
+
+    async def insert_many(self, docs, ordered=False):
+        await asyncio.sleep(0.001)
+        if self.down:
+            raise ConnectionError("server selection timeout")
+        self.inserts += 1
+        for doc in docs:
+            assert doc["_id"] not in self.docs, f"{doc['_id']} written twice"
+            self.docs[doc["_id"]] = doc
+            self.order.append(doc["_id"])
+
+    async def delete_many(self, query):
+        for debate_id in query["_id"]["$in"]:
+            self.docs.pop(debate_id, None)
+
+
+def debate(i, user_id="bench"):
+    from bson import ObjectId
+    return {"_id": ObjectId(), "user_id": user_id, "topic": f"Topic {i}", "model": "fake",
+            "created_at": datetime.utcnow(), "verdict": "FOR", "status": "completed",
+            "results": {"summary": "VERDICT: FOR"}}
+
+
+async def settle(writer, collection, expected, timeout=10):
+    deadline = time.monotonic() + timeout
+    while len(collection.docs) < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+
+
+async def run(args):
+    collection = FlakyCollection()
+    spill = os.path.join(tempfile.mkdtemp(), "spill.jsonl")
+    landed = []
+    writer = DebateWriter(lambda: collection, max_retries=2, spill_path=spill,
+                          on_written=lambda docs: asyncio.sleep(0, landed.extend(d["_id"] for d in docs)))
+    writer.start()
+
+    healthy = [debate(i) for i in range(args.debates)]
+    for doc in healthy:
+        writer.enqueue(doc)
+    await settle(writer, collection, len(healthy))
+    assert [d["_id"] for d in healthy] == collection.order, "healthy writes out of order"
+    print(f"flush:   {len(collection.docs)} debates in {collection.inserts} insert_many calls")
+
+    collection.down = True
+    outage = [debate(args.debates + i) for i in range(args.debates)]
+    for doc in outage:
+        writer.enqueue(doc)
+    assert writer.get_pending(outage[0]["_id"]) is outage[0], "queued debate not readable"
+    deleted_queued = outage[-1]["_id"]
+    assert writer.cancel(deleted_queued, "bench")
+    while writer.pending:
+        await asyncio.sleep(0.02)
+    assert len(writer.spilled) == len(outage) - 1, f"{len(writer.spilled)} spilled"
+    deleted_spilled = outage[0]["_id"]
+    assert writer.get_spilled(deleted_spilled)["topic"] == outage[0]["topic"], "spilled debate not readable"
+    assert len(writer.unwritten("bench")) == len(outage) - 1
+    assert writer.cancel(deleted_spilled, "bench") and not writer.cancel(outage[1]["_id"], "someone else")
+    print(f"spill:   {writer.stats['spilled']} debates spilled, 2 deleted before being written")
+
+    # Restart while MongoDB is still down: start() must return straight away
+    await writer.shutdown()
+    writer = DebateWriter(lambda: collection, max_retries=2, spill_path=spill,
+                          on_written=lambda docs: asyncio.sleep(0, landed.extend(d["_id"] for d in docs)))
+    started = time.perf_counter()
+    writer.start()
+    print(f"restart: start() returned in {(time.perf_counter() - started) * 1000:.2f} ms with MongoDB down")
+    await asyncio.sleep(0.3)
+    collection.down = False
+    expected = [d["_id"] for d in healthy + outage if d["_id"] not in (deleted_queued, deleted_spilled)]
+    await settle(writer, collection, len(expected))
+    await writer.shutdown()
+
+    assert deleted_queued not in collection.docs and deleted_spilled not in collection.docs, "deleted debate landed"
+    assert collection.order == expected, "replayed out of order or incomplete"
+    assert landed == expected, "after-write hook saw a different set"
+    assert not writer.pending and not writer.spilled and not writer.deleted and not os.path.exists(spill)
+    print(f"replay:  {writer.stats['replayed']} debates replayed; {len(collection.docs)} stored in queue order, "
+          f"none twice, deleted ones absent")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--debates", type=int, default=200, help="debates queued before and during the outage")
+    asyncio.run(run(parser.parse_args()))
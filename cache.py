@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# DEBATE_CACHE_BACKEND=mongo adds a shared tier so every uvicorn worker and
+# Render instance can reuse each other's debates; "memory" keeps it per process.
+CACHE_BACKEND = os.getenv("DEBATE_CACHE_BACKEND", "memory")
+CACHE_SIZE    = int(os.getenv("DEBATE_CACHE_SIZE", "512"))
+CACHE_TTL     = int(os.getenv("DEBATE_CACHE_TTL", str(24 * 3600)))
+
+def normalize_topic(topic: str) -> str:
+    topic = re.sub(r"\s+", " ", topic.strip().lower())
+    return topic.rstrip("?!. ")
+
+def cache_key(topic, model, depth, args_per_side, tone, focus, rounds=1) -> str:
+    from tasks import normalize_settings
+    # Settings the prompts don't know get the default prompt, so they share its entry
+    tone, focus, depth = normalize_settings(tone, focus, depth)
+    parts = [normalize_topic(topic), model, depth, str(int(args_per_side)), tone, focus]
+    if rounds > 1:
+        parts.append(f"rounds={rounds}")   # single-round keys stay as they were
+    raw = "|".join(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# ─── Backends ────────────────────────────────────────────────────────────────
+
+class MemoryBackend:
+    """LRU of at most max_entries results, each expiring ttl seconds after it was stored."""
+
+    def __init__(self, max_entries=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class MongoBackend:
+    """Shared tier in db.debate_cache; a TTL index lets MongoDB drop expired entries."""
+
+    def __init__(self, ttl=CACHE_TTL, collection="debate_cache"):
+        self.ttl = ttl
+        self.collection = collection
+
+    def _coll(self):
+        from database import get_db
+        return get_db()[self.collection]
+
+    async def setup(self):
+        await self._coll().create_index("expires_at", expireAfterSeconds=0)
+
+    async def get(self, key):
+        # The TTL monitor only runs once a minute, so check expiry here too
+        doc = await self._coll().find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return doc["value"] if doc else None
+
+    async def set(self, key, value):
+        await self._coll().replace_one(
+            {"_id": key},
+            {"value": value, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)},
+            upsert=True,
+        )
+
+# ─── Two-tier cache ──────────────────────────────────────────────────────────
+
+class DebateCache:
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "stores": 0}
+
+    async def setup(self):
+        if self.shared is not None and hasattr(self.shared, "setup"):
+            await self.shared.setup()
+
+    async def get(self, key):
+        value = await self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                print(f"⚠️ Shared debate cache unavailable: {e}")
+                value = None
+            if value is not None:
+                self.stats["shared_hits"] += 1
+                await self.local.set(key, value)
+        if value is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return value
+
+    async def set(self, key, value):
+        self.stats["stores"] += 1
+        await self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value)
+            except Exception as e:
+                print(f"⚠️ Shared debate cache unavailable: {e}")
+
+    def snapshot(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self.local),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+debate_cache = DebateCache(
+    MemoryBackend(),
+    shared=MongoBackend() if CACHE_BACKEND == "mongo" else None,
+)
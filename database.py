@@ -1,7 +1,12 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
+import base64
 import os
 from dotenv import load_dotenv
+from metrics import span
+from parsing import structure_debate, verdict_side
+from persistence import DebateWriter
+from analytics import ANALYTICS_VERSION, ROLLUP_COLLECTION, record_debates
 
 load_dotenv()
 
@@ -11,6 +16,10 @@ DB_NAME = "mads_pro"
 client = None
 db = None
 
+# Completed debates are inserted in the background (see persistence.py), and
+# counted into the analytics rollups once they land (see analytics.py)
+debate_writer = DebateWriter(lambda: db.debates, on_written=lambda docs: record_debates(db[ROLLUP_COLLECTION], docs))
+
 async def connect_db():
     global client, db
     client = AsyncIOMotorClient(
@@ -23,6 +32,18 @@ async def connect_db():
     )
     db = client[DB_NAME]
     print("✅ Connected to MongoDB Atlas")
+    await ensure_indexes()
+
+async def ensure_indexes():
+    # History is always read per user, newest first; _id breaks created_at ties for paging
+    await db.debates.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    await db[ROLLUP_COLLECTION].create_index("day")
+    for field in ("email", "username"):
+        try:
+            await db.users.create_index(field, unique=True)
+        except Exception as e:
+            # Existing duplicates block a unique index; keep serving and report it
+            print(f"⚠️ Could not create unique index on users.{field}: {e}")
 
 async def close_db():
     global client
@@ -34,6 +55,7 @@ def get_db():
 
 # ─── Users ───────────────────────────────────────────────────────────────────
 
+@span("mongo.create_user")
 async def create_user(username: str, email: str, hashed_password: str):
     user = {
         "username": username,
@@ -44,29 +66,87 @@ async def create_user(username: str, email: str, hashed_password: str):
     result = await db.users.insert_one(user)
     return str(result.inserted_id)
 
+@span("mongo.find_user")
 async def get_user_by_email(email: str):
     return await db.users.find_one({"email": email})
 
+@span("mongo.find_user")
 async def get_user_by_username(username: str):
     return await db.users.find_one({"username": username})
 
 # ─── Debates ─────────────────────────────────────────────────────────────────
 
-async def save_debate(user_id: str, topic: str, model: str, results: dict):
+@span("db.save_debate")
+async def save_debate(user_id: str, topic: str, model: str, results: dict, status: str = "completed",
+                      models_used: dict = None, structured: dict = None, settings: dict = None, usage: dict = None):
+    """Queue a debate for writing and return its ID straight away.
+
+    structured is parsing.structure_debate(results, ...); it is parsed here if not given.
+    settings (depth, args_per_side, tone, focus, rounds) and usage (latency_ms and
+    estimated tokens, or cached) are stored for the analytics rollups.
+    """
+    from bson import ObjectId
+    if structured is None:
+        structured = structure_debate(results)
+    now = datetime.utcnow()
     debate = {
+        "_id": ObjectId(),
         "user_id": user_id,
         "topic": topic,
         "model": model,
+        "models_used": models_used,   # side -> provider model that answered, after fallbacks/hedges
         "results": results,
-        "created_at": datetime.utcnow()
+        "structured": structured,
+        "verdict": structured["judge"]["side"],
+        "settings": settings,
+        "usage": usage,
+        "status": status,
+        "analytics": ANALYTICS_VERSION,   # counted by the writer, so the backfill skips it
+        # Milliseconds, as MongoDB stores it, so history cursors match before and after the write
+        "created_at": now.replace(microsecond=now.microsecond // 1000 * 1000),
     }
-    result = await db.debates.insert_one(debate)
-    return str(result.inserted_id)
+    debate_writer.enqueue(debate)
+    return str(debate["_id"])
+
+@span("mongo.get_debate")
+async def get_user_debate(debate_id: str, user_id: str):
+    """Fetch a debate by ID, only if it belongs to the user."""
+    from bson import ObjectId
+    try:
+        pending = debate_writer.get_pending(ObjectId(debate_id)) or debate_writer.get_spilled(ObjectId(debate_id))
+        if pending is not None:
+            return pending if pending["user_id"] == user_id else None
+        return await db.debates.find_one({"_id": ObjectId(debate_id), "user_id": user_id})
+    except Exception:
+        return None
+
+async def save_followup_state(debate_id: str, state: dict):
+    from bson import ObjectId
+    pending = debate_writer.get_pending(ObjectId(debate_id))
+    if pending is not None:
+        # Not inserted yet: the queued document will carry the state with it
+        pending["followup"] = state
+        return
+    if debate_writer.update_spilled(ObjectId(debate_id), {"followup": state}):
+        return   # the replay inserts it with the state
+    result = await db.debates.update_one({"_id": ObjectId(debate_id)}, {"$set": {"followup": state}})
+    if result.matched_count == 0:
+        print(f"⚠️ Follow-up state not saved: debate {debate_id} was not found")
+
+async def recent_debate_topics(limit: int):
+    """Yield (user_id, debate_id, topic) for the newest completed debates."""
+    cursor = db.debates.find(
+        {"status": {"$ne": "cancelled"}}, {"_id": 1, "user_id": 1, "topic": 1}
+    ).sort("created_at", -1).limit(limit)
+    async for debate in cursor:
+        yield debate["user_id"], str(debate["_id"]), debate["topic"]
 
 async def delete_debate(debate_id: str, user_id: str):
     """Delete a debate by ID, only if it belongs to the user."""
     from bson import ObjectId
     try:
+        if debate_writer.cancel(ObjectId(debate_id), user_id):
+            return True
         result = await db.debates.delete_one({
             "_id": ObjectId(debate_id),
             "user_id": user_id
@@ -75,15 +155,158 @@ async def delete_debate(debate_id: str, user_id: str):
     except Exception:
         return False
 
-async def get_user_debates(user_id: str, limit: int = 20):
+# ─── Search (see search.py) ──────────────────────────────────────────────────
+
+TEXT_INDEX_NAME = "debate_text"
+SEARCH_PROJECTION = {"_id": 1, "topic": 1, "model": 1, "created_at": 1, "verdict": 1}
+
+async def ensure_text_index(paths: dict, weights: dict) -> bool:
+    """Create the text index search.py queries; False if this deployment can't have it."""
+    try:
+        await db.debates.create_index(
+            [("user_id", 1)] + [(path, "text") for path in paths.values()],
+            weights={paths[field]: weight for field, weight in weights.items()},
+            default_language="english",
+            name=TEXT_INDEX_NAME,
+        )
+        return True
+    except Exception as e:
+        print(f"⚠️ Could not create the debate text index: {e}")
+        return False
+
+def is_text_index_error(error) -> bool:
+    from pymongo.errors import OperationFailure
+    # 27 IndexNotFound: "text index required for $text query"
+    return isinstance(error, OperationFailure) and (error.code == 27 or "text index" in str(error))
+
+@span("mongo.search")
+async def text_search_debates(user_id: str, query: str, skip: int, limit: int, text_paths: list):
+    """Ranked $text matches among the user's debates, with their text fields and "score"."""
+    score = {"$meta": "textScore"}
+    projection = {**SEARCH_PROJECTION, **{path: 1 for path in text_paths}, "score": score}
     cursor = db.debates.find(
-        {"user_id": user_id},
-        {"_id": 1, "topic": 1, "model": 1, "created_at": 1, "results": 1}
-    ).sort("created_at", -1).limit(limit)
+        {"user_id": user_id, "status": {"$ne": "cancelled"}, "$text": {"$search": query}}, projection,
+    ).sort([("score", score)]).skip(skip).limit(limit)
+    return await cursor.to_list(limit)
 
-    debates = []
-    async for debate in cursor:
+async def get_debates_for_search(user_id: str, debate_ids: list, text_paths: list) -> dict:
+    """debate ID -> document with its text fields, for a page of local search results."""
+    from bson import ObjectId
+    found = {}
+    for debate_id in debate_ids:
+        pending = debate_writer.get_pending(ObjectId(debate_id)) or debate_writer.get_spilled(ObjectId(debate_id))
+        if pending is not None and pending["user_id"] == user_id:
+            found[debate_id] = pending
+    rest = [ObjectId(debate_id) for debate_id in debate_ids if debate_id not in found]
+    if rest:
+        projection = {**SEARCH_PROJECTION, **{path: 1 for path in text_paths}}
+        async for debate in db.debates.find({"_id": {"$in": rest}, "user_id": user_id}, projection):
+            found[str(debate["_id"])] = debate
+    return found
+
+async def user_debates_for_search(user_id: str, text_paths: list):
+    """Yield every saved debate of the user with its text fields, to build a local index.
+
+    Like get_user_debate, this covers debates the writer hasn't stored yet:
+    queued ones first, then spilled ones read back from disk, then MongoDB.
+    """
+    unwritten = set()
+    for summary in debate_writer.unwritten(user_id):
+        debate = debate_writer.get_pending(summary["_id"]) or debate_writer.get_spilled(summary["_id"])
+        if debate is not None and debate.get("status") != "cancelled":
+            unwritten.add(debate["_id"])
+            yield debate
+    projection = {"_id": 1, **{path: 1 for path in text_paths}}
+    async for debate in db.debates.find({"user_id": user_id, "status": {"$ne": "cancelled"}}, projection):
+        if debate["_id"] not in unwritten:   # landed while the index was being built
+            yield debate
+
+# ─── Export (see export.py) ──────────────────────────────────────────────────
+
+# Everything but internal state (follow-up sessions, analytics marks)
+EXPORT_PROJECTION = {"followup": 0, "analytics": 0}
+
+def export_debates(user_id: str = None, since: datetime = None, until: datetime = None, model: str = None,
+                   batch_size: int = 500):
+    """Cursor over saved debates to export, newest first: one user's, or everyone's when user_id is None.
+
+    Debates still queued in the write-behind writer show up in the next export.
+    Per user the (user_id, created_at) index serves both the range and the order;
+    across users the range is applied to _id, whose timestamp is the creation time.
+    """
+    from bson import ObjectId
+    query = {"status": {"$ne": "cancelled"}}
+    if model:
+        query["model"] = model
+    if user_id is not None:
+        query["user_id"] = user_id
+        field, low, high, order = "created_at", since, until, [("created_at", -1), ("_id", -1)]
+    else:
+        field, order = "_id", [("_id", -1)]
+        low = ObjectId.from_datetime(since) if since else None
+        high = ObjectId.from_datetime(until) if until else None
+    bounds = {op: value for op, value in (("$gte", low), ("$lt", high)) if value is not None}
+    if bounds:
+        query[field] = bounds
+    return db.debates.find(query, EXPORT_PROJECTION, batch_size=batch_size).sort(order)
+
+def _encode_cursor(created_at: datetime, debate_id) -> str:
+    raw = f"{created_at.isoformat()}|{debate_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    from bson import ObjectId
+    try:
+        created_at, debate_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(debate_id)
+    except Exception:
+        raise ValueError("Invalid history cursor")
+
+@span("mongo.history")
+async def get_user_debate_summaries(user_id: str, limit: int = 20, cursor: str = None):
+    """One page of a user's history, newest first, without the long LLM outputs.
+
+    Returns (summaries, next_cursor); next_cursor is None on the last page.
+    """
+    query = {"user_id": user_id, "status": {"$ne": "cancelled"}}
+    if cursor:
+        created_at, debate_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": debate_id}},
+        ]
+    projection = {
+        "_id": 1, "topic": 1, "model": 1, "created_at": 1, "verdict": 1,
+        # Debates saved before `verdict` existed: ship just the head of the summary
+        "summary_head": {"$cond": [
+            {"$ifNull": ["$verdict", False]}, "",
+            {"$substrCP": [{"$ifNull": ["$results.summary", ""]}, 0, 300]},
+        ]},
+    }
+    docs = db.debates.find(query, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1)
+
+    summaries = []
+    async for debate in docs:
+        summaries.append(debate)
+    # Debates still queued or spilled: merged in where they fall, once each if one lands meanwhile
+    seen = {debate["_id"] for debate in summaries}
+    unwritten = [
+        {field: doc[field] for field in ("_id", "topic", "model", "created_at", "verdict")}
+        for doc in debate_writer.unwritten(user_id)
+        if doc["status"] != "cancelled" and doc["_id"] not in seen
+        and (not cursor or (doc["created_at"], doc["_id"]) < (created_at, debate_id))
+    ]
+    if unwritten:
+        summaries = sorted(summaries + unwritten, key=lambda d: (d["created_at"], d["_id"]), reverse=True)[:limit + 1]
+    next_cursor = None
+    if len(summaries) > limit:
+        summaries = summaries[:limit]
+        next_cursor = _encode_cursor(summaries[-1]["created_at"], summaries[-1]["_id"])
+
+    for debate in summaries:
+        head = debate.pop("summary_head", "")
+        if not debate.get("verdict"):
+            debate["verdict"] = verdict_side(head)
         debate["_id"] = str(debate["_id"])
         debate["created_at"] = debate["created_at"].isoformat()
-        debates.append(debate)
-    return debates
+    return summaries, next_cursor
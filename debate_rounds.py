@@ -0,0 +1,86 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Any
+from dotenv import load_dotenv
+
+from followup_sessions import clip
+from parsing import parse_arguments
+from tasks import estimate_tokens, rebuttal_task
+
+load_dotenv()
+
+# Multi-round debates: after the openings, each round both sides rebut the
+# other's previous round at the same time. Resending the transcript would make
+# every round's prompt longer than the last; instead each side keeps a digest
+# of one-sentence points capped at DIGEST_TOKEN_BUDGET, and a round sees the
+# two digests plus the opponent's latest round (clipped), so prompts stay the
+# same size however many rounds there are. The judge gets the same view.
+MAX_ROUNDS          = int(os.getenv("DEBATE_MAX_ROUNDS", "5"))
+DIGEST_TOKEN_BUDGET = int(os.getenv("ROUND_DIGEST_TOKENS", "300"))
+LATEST_TOKEN_BUDGET = int(os.getenv("ROUND_LATEST_TOKENS", "600"))
+
+POINT_TOKENS = 40
+
+def compact_point(argument: str) -> str:
+    # The claim is the first sentence; the evidence after it is what gets dropped
+    first = re.split(r"(?<=[.!?])\s+", argument.strip(), maxsplit=1)[0]
+    return clip(first, POINT_TOKENS)
+
+class SideDigest:
+    """One side's points so far, oldest dropped first once over budget."""
+
+    def __init__(self, budget: int = DIGEST_TOKEN_BUDGET):
+        self.budget = budget
+        self.points = []
+        self.omitted = 0
+
+    def record(self, round_no: int, text: str):
+        arguments = parse_arguments(text)["arguments"] or [text]
+        self.points += [f"- (R{round_no}) {compact_point(a)}" for a in arguments]
+        while len(self.points) > 1 and estimate_tokens(self.render()) > self.budget:
+            self.points.pop(0)
+            self.omitted += 1
+
+    def render(self) -> str:
+        lines = [f"({self.omitted} earlier points omitted)"] if self.omitted else []
+        return "\n".join(lines + self.points) or "(none yet)"
+
+@dataclass
+class RoundSettings:
+    """What run_debate_pipeline needs to build rebuttal tasks for a debate of `rounds` rounds."""
+    topic: str
+    llm: Any
+    rounds: int
+    depth: str = "standard"
+    args_per_side: int = 4
+    tone: str = "balanced"
+    focus: str = "general"
+
+    def task(self, side: str, round_no: int, digests: dict, latest: dict):
+        other = "against" if side == "for" else "for"
+        return rebuttal_task(
+            self.topic, side, self.llm, round_no, self.rounds,
+            digests[side].render(), digests[other].render(), clip(latest[other], LATEST_TOKEN_BUDGET),
+            depth=self.depth, args_per_side=self.args_per_side, tone=self.tone, focus=self.focus,
+        )
+
+def judge_context(digests: dict, latest: dict) -> str:
+    return (
+        f"FOR — points across all rounds:\n{digests['for'].render()}\n\n"
+        f"AGAINST — points across all rounds:\n{digests['against'].render()}\n\n"
+        f"FOR — final round:\n{clip(latest['for'], LATEST_TOKEN_BUDGET)}\n\n"
+        f"AGAINST — final round:\n{clip(latest['against'], LATEST_TOKEN_BUDGET)}"
+    )
+
+def transcript(rounds: list, side: str) -> str:
+    """One side's answers from every round, under round headings, as stored in for_arguments/against_arguments."""
+    return "\n\n".join(
+        f"Round {r['round']} — {'Opening' if r['round'] == 1 else 'Rebuttal'}\n{r[side]}" for r in rounds
+    )
+
+REBUTTAL_INSTRUCTION_TOKENS = 250   # rules, tone, focus and depth around the context
+
+def estimate_rebuttal_tokens(args_per_side: int) -> int:
+    """Upper bound on one rebuttal call's prompt: both digests, the clipped latest round and the instructions."""
+    return 2 * DIGEST_TOKEN_BUDGET + LATEST_TOKEN_BUDGET + REBUTTAL_INSTRUCTION_TOKENS + 10 * int(args_per_side)
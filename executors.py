@@ -0,0 +1,37 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Blocking work is kept off the event loop so /health, history and logins stay
+# responsive while debates run. LLM calls and bcrypt get separate pools so a
+# burst of debates can never starve password checks (and vice versa).
+LLM_WORKERS  = int(os.getenv("LLM_WORKERS", "16"))
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", "2"))
+
+llm_executor  = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+auth_executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+
+
+async def _run_in(executor, fn, *args, **kwargs):
+    # Carry contextvars into the worker thread, like asyncio.to_thread does
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+
+async def run_llm(fn, *args, **kwargs):
+    return await _run_in(llm_executor, fn, *args, **kwargs)
+
+
+async def run_auth(fn, *args, **kwargs):
+    return await _run_in(auth_executor, fn, *args, **kwargs)
+
+
+def shutdown_executors():
+    llm_executor.shutdown(wait=False, cancel_futures=True)
+    auth_executor.shutdown(wait=False, cancel_futures=True)
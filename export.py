@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Bulk export of debate history as NDJSON or CSV. Documents are pulled from a
+# Mongo cursor EXPORT_BATCH_SIZE at a time and written out as soon as about
+# FLUSH_BYTES of output has built up, optionally through a streaming gzip
+# compressor, so memory stays flat however many debates the export covers.
+# Users export their own history; the user IDs (not usernames, which anyone
+# can register) listed in EXPORT_ADMINS may also export every user's debates
+# (scope=all).
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+EXPORT_ADMINS     = {uid.strip() for uid in os.getenv("EXPORT_ADMINS", "").split(",") if uid.strip()}
+
+FLUSH_BYTES = 64 * 1024
+GZIP_LEVEL  = 6          # fast enough to keep up with the cursor
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# One row per debate; nested settings and usage are flattened, results kept as text
+CSV_COLUMNS = (
+    "debate_id", "user_id", "created_at", "status", "topic", "model", "verdict", "margin",
+    "depth", "args_per_side", "tone", "focus", "rounds", "latency_ms", "prompt_tokens", "completion_tokens",
+    "for_arguments", "against_arguments", "summary",
+)
+
+def is_export_admin(user: dict) -> bool:
+    return user["user_id"] in EXPORT_ADMINS
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)   # ObjectId
+
+def export_record(doc: dict) -> dict:
+    record = {"debate_id": str(doc["_id"])}
+    record.update((k, v) for k, v in doc.items() if k != "_id")
+    return record
+
+def csv_row(doc: dict) -> list:
+    settings = doc.get("settings") or {}
+    usage = doc.get("usage") or {}
+    results = doc.get("results") or {}
+    judge = (doc.get("structured") or {}).get("judge") or {}
+    return [
+        str(doc["_id"]), doc.get("user_id"), doc["created_at"].isoformat(), doc.get("status"),
+        doc.get("topic"), doc.get("model"), doc.get("verdict"), judge.get("margin"),
+        settings.get("depth"), settings.get("args_per_side"), settings.get("tone"), settings.get("focus"),
+        settings.get("rounds"), usage.get("latency_ms"), usage.get("prompt_tokens"), usage.get("completion_tokens"),
+        results.get("for_arguments"), results.get("against_arguments"), results.get("summary"),
+    ]
+
+async def ndjson_chunks(docs):
+    buffer, size = [], 0
+    async for doc in docs:
+        line = json.dumps(export_record(doc), default=_json_default, ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+async def csv_chunks(docs):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    async for doc in docs:
+        writer.writerow(csv_row(doc))
+        if out.tell() >= FLUSH_BYTES:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue()
+
+async def stream_export(cursor, fmt: str, compress: bool = False):
+    """Bytes of the export of every document cursor yields; closes the cursor however it ends."""
+    chunks = ndjson_chunks(cursor) if fmt == "ndjson" else csv_chunks(cursor)
+    gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None   # wbits 31: gzip framing
+    try:
+        async for chunk in chunks:
+            data = chunk.encode("utf-8")
+            if gz is not None:
+                data = gz.compress(data)
+            if data:
+                yield data
+        if gz is not None:
+            yield gz.flush()
+    finally:
+        await chunks.aclose()
+        close = getattr(cursor, "close", None)
+        if close is not None:
+            result = close()
+            if hasattr(result, "__await__"):
+                await result
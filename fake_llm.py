@@ -0,0 +1,119 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+
+from crewai import BaseLLM
+from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+
+
+def _prompt_text(messages):
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+class FakeLLMError(Exception):
+    """Injected failure; carries an HTTP-style status_code like provider errors do."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeLLM(BaseLLM):
+    """Deterministic stand-in for crewai.LLM that sleeps instead of calling Groq.
+
+    Used by the benchmarks, and by the app with LLM_BACKEND=fake, so latency
+    can be measured without spending quota. The reply is derived from the
+    prompt, so the same prompt always gets the same answer. latency is the
+    time to first token and token_rate the generation speed after it;
+    prompt_rate, if set, adds prompt-reading time, so longer prompts take
+    longer to start, as they do on a real provider. With stream=True the reply is emitted word by word as LLMStreamChunkEvents,
+    like crewai.LLM does. failure_rate makes that fraction of calls raise
+    FakeLLMError, drawn from a generator seeded with seed.
+    """
+
+    def __init__(self, model="fake/debate", latency=1.0, stream=False, token_rate=500.0,
+                 failure_rate=0.0, seed=0, prompt_rate=0.0, **kwargs):
+        super().__init__(model=model, **kwargs)
+        self.latency = latency
+        self.stream = stream
+        self.token_rate = token_rate
+        self.failure_rate = failure_rate
+        self.prompt_rate = prompt_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model, stream=False):
+        """Settings from FAKE_LLM_LATENCY, FAKE_LLM_TOKEN_RATE, FAKE_LLM_PROMPT_RATE, FAKE_LLM_FAILURE_RATE and FAKE_LLM_SEED."""
+        return cls(
+            model=model,
+            stream=stream,
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "0.5")),
+            token_rate=float(os.getenv("FAKE_LLM_TOKEN_RATE", "500")),
+            failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+            prompt_rate=float(os.getenv("FAKE_LLM_PROMPT_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    def _generation_time(self, text):
+        # Same ~4 characters per token as tasks.estimate_tokens
+        return len(text) / 4 / self.token_rate if self.token_rate else 0.0
+
+    def _prompt_time(self, prompt):
+        return len(prompt) / 4 / self.prompt_rate if self.prompt_rate else 0.0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, **kwargs):
+        prompt = _prompt_text(messages)
+        with self._rng_lock:
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(self.latency + self._prompt_time(prompt))
+        if fail:
+            raise FakeLLMError(f"{self.model}: injected failure")
+        reply = self._reply(prompt)
+        if self.stream:
+            for chunk in re.findall(r"\S+\s*", reply):
+                crewai_event_bus.emit(
+                    self,
+                    event=LLMStreamChunkEvent(chunk=chunk, from_task=from_task, from_agent=from_agent),
+                )
+                time.sleep(self._generation_time(chunk))
+        else:
+            time.sleep(self._generation_time(reply))
+        return reply
+
+    def _reply(self, prompt):
+        seed = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        tag = f"{self.model} {seed}"
+
+        if "VERDICT:" in prompt:
+            side = "FOR" if int(seed, 16) % 2 == 0 else "AGAINST"
+            loser = "AGAINST" if side == "FOR" else "FOR"
+            return (
+                f"Thought: I now can give a great answer\n"
+                f"Final Answer: VERDICT: {side} wins by a narrow margin.\n"
+                f"REASONING: The {side} side offered clearer evidence ({tag}).\n"
+                f"KEY STRENGTHS: Concrete examples and consistent logic.\n"
+                f"WEAKNESSES: The {loser} side left key risks unaddressed.\n"
+                f"FINAL RECOMMENDATION: Adopt the {side} position with safeguards."
+            )
+
+        match = re.search(r"EXACTLY (\d+)", prompt)
+        n = int(match.group(1)) if match else 1
+        side = "against" if "AGAINST the statement" in prompt else "for"
+        points = "\n".join(f"{i}. Point {i} {side} the statement ({tag})." for i in range(1, n + 1))
+        return f"Thought: I now can give a great answer\nFinal Answer: {points}"
+
+    def supports_function_calling(self):
+        return False
+
+    def supports_stop_words(self):
+        return False
+
+    def get_context_window_size(self):
+        return 8192
@@ -0,0 +1,98 @@
+import os
+import re
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+from tasks import estimate_tokens
+
+load_dotenv()
+
+# Follow-up prompts are built from a compacted copy of the saved debate plus a
+# rolling digest of earlier Q&A, so the prompt stops growing after a few turns
+# no matter how long the conversation gets.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("FOLLOWUP_CONTEXT_TOKENS", "1500"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("FOLLOWUP_HISTORY_TOKENS", "400"))
+MAX_SESSIONS         = int(os.getenv("FOLLOWUP_MAX_SESSIONS", "1000"))
+
+QUESTION_TOKENS = 40
+ANSWER_TOKENS   = 80
+
+def clip(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, preferring a line or sentence boundary."""
+    text = text.strip()
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary > limit // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " …"
+
+def compact_context(topic: str, results: dict, budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    # Arguments get most of the budget; the verdict is already a summary
+    per_side = budget * 3 // 8
+    return (
+        f"Topic: {topic}\n\n"
+        f"Arguments For:\n{clip(results.get('for_arguments', ''), per_side)}\n\n"
+        f"Arguments Against:\n{clip(results.get('against_arguments', ''), per_side)}\n\n"
+        f"Conclusion:\n{clip(results.get('summary', ''), budget - 2 * per_side)}"
+    )
+
+def compact_turn(question: str, answer: str) -> str:
+    # Keep the first couple of sentences of the answer; that is what later questions refer back to
+    sentences = re.split(r"(?<=[.!?])\s+", answer.strip())
+    return f"Q: {clip(question, QUESTION_TOKENS)}\nA: {clip(' '.join(sentences[:2]), ANSWER_TOKENS)}"
+
+class FollowUpSession:
+    def __init__(self, debate_id: str, context: str, turns=None, omitted: int = 0):
+        self.debate_id = debate_id
+        self.context = context
+        self.turns = list(turns or [])
+        self.omitted = omitted
+
+    def history(self) -> str:
+        if not self.turns:
+            return ""
+        lines = [f"({self.omitted} earlier questions omitted)"] if self.omitted else []
+        return "\n\n".join(lines + self.turns)
+
+    def record(self, question: str, answer: str):
+        self.turns.append(compact_turn(question, answer))
+        while len(self.turns) > 1 and estimate_tokens(self.history()) > HISTORY_TOKEN_BUDGET:
+            self.turns.pop(0)
+            self.omitted += 1
+
+class SessionStore:
+    """LRU of live sessions, backed by the debate document so any worker can resume one."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    async def get(self, user_id: str, debate_id: str):
+        key = (user_id, debate_id)
+        session = self._sessions.get(key)
+        if session is None:
+            from database import get_user_debate
+            debate = await get_user_debate(debate_id, user_id)
+            if debate is None:
+                return None
+            state = debate.get("followup") or {}
+            session = FollowUpSession(
+                debate_id,
+                compact_context(debate.get("topic", ""), debate.get("results") or {}),
+                turns=state.get("turns"),
+                omitted=state.get("omitted", 0),
+            )
+            self._sessions[key] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(key)
+        return session
+
+    async def save(self, session: FollowUpSession):
+        from database import save_followup_state
+        await save_followup_state(session.debate_id, {"turns": session.turns, "omitted": session.omitted})
+
+followup_sessions = SessionStore()
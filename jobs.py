@@ -0,0 +1,363 @@
+import asyncio
+import os
+import random
+import socket
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Debates as background jobs. POST /api/jobs/debate stores a job and returns
+# its ID; a pool of workers claims queued jobs, runs them and appends every
+# event the live stream would have sent to the job's event log. Clients poll
+# the job or read the log as SSE, resuming from Last-Event-ID after a drop.
+#
+# DEBATE_JOB_BACKEND=mongo keeps jobs and events in MongoDB, so any uvicorn
+# worker or Render instance can serve any job, and a job whose worker died is
+# picked up again once its lease runs out. "memory" keeps them per process.
+JOB_BACKEND      = os.getenv("DEBATE_JOB_BACKEND", "memory")
+JOB_WORKERS      = int(os.getenv("JOB_WORKERS", "4"))
+JOB_LEASE        = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_TTL          = int(os.getenv("JOB_TTL", str(24 * 3600)))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_MEMORY_LIMIT = int(os.getenv("JOB_MEMORY_LIMIT", "1000"))
+
+JOB_POLL_SECONDS   = 1.0    # how often idle workers look for jobs queued by other instances
+EVENT_POLL_SECONDS = 0.25   # how often a stream checks a shared log for new events
+ERROR_BACKOFF_BASE = 0.5    # a worker that hit an error waits this long, doubled per error in a row
+ERROR_BACKOFF_MAX  = 30.0
+
+TERMINAL = ("completed", "failed")
+
+def new_job(user_id: str, kind: str, request: dict) -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "kind": kind,
+        "request": request,
+        "status": "queued",
+        "attempts": 0,
+        "owner": None,
+        "lease_until": None,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+        "next_seq": 0,
+        "expires_at": now + timedelta(seconds=JOB_TTL),
+    }
+
+def _claimable(job, now):
+    if job["attempts"] >= JOB_MAX_ATTEMPTS:
+        return False
+    return job["status"] == "queued" or (job["status"] == "running" and job["lease_until"] < now)
+
+def _abandoned(job, now):
+    # Its worker died on the last attempt allowed: nobody will run it again
+    return job["status"] == "running" and job["attempts"] >= JOB_MAX_ATTEMPTS and job["lease_until"] < now
+
+# ─── Backends ────────────────────────────────────────────────────────────────
+
+class MemoryJobStore:
+    """Jobs and their event logs in this process; the newest JOB_MEMORY_LIMIT are kept."""
+
+    def __init__(self, max_jobs=JOB_MEMORY_LIMIT):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._events = {}
+        self._signals = {}     # job_id -> asyncio.Event set on the next append
+
+    async def setup(self):
+        pass
+
+    async def create(self, job):
+        self._jobs[job["_id"]] = job
+        self._events[job["_id"]] = []
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            # Oldest finished jobs first; queued and running ones are kept however old
+            finished = [job_id for job_id, old in self._jobs.items() if old["status"] in TERMINAL][:excess]
+            for old_id in finished:
+                del self._jobs[old_id]
+                self._events.pop(old_id, None)
+
+    async def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def update(self, job_id, fields):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(fields)
+
+    async def claim(self, worker_id):
+        now = datetime.utcnow()
+        for job in self._jobs.values():
+            if _claimable(job, now):
+                job.update(status="running", owner=worker_id, started_at=now,
+                           lease_until=now + timedelta(seconds=JOB_LEASE), attempts=job["attempts"] + 1)
+                return dict(job)
+        return None
+
+    async def claim_abandoned(self, worker_id):
+        now = datetime.utcnow()
+        for job in self._jobs.values():
+            if _abandoned(job, now):
+                job.update(owner=worker_id, lease_until=now + timedelta(seconds=JOB_LEASE))
+                return dict(job)
+        return None
+
+    async def renew(self, job_id, worker_id):
+        job = self._jobs.get(job_id)
+        if job and job["owner"] == worker_id and job["status"] == "running":
+            job["lease_until"] = datetime.utcnow() + timedelta(seconds=JOB_LEASE)
+
+    async def release(self, worker_id):
+        now = datetime.utcnow()
+        for job in self._jobs.values():
+            if job["owner"] == worker_id and job["status"] == "running":
+                job["lease_until"] = now
+
+    async def append_events(self, job_id, events):
+        log = self._events.get(job_id)
+        if log is None:
+            return
+        for event in events:
+            log.append((len(log) + 1, event))
+        signal = self._signals.pop(job_id, None)
+        if signal is not None:
+            signal.set()
+
+    async def events_after(self, job_id, seq):
+        return self._events.get(job_id, [])[seq:]
+
+    async def wait_for_events(self, job_id, seq, timeout):
+        if len(self._events.get(job_id, [])) > seq:
+            return
+        signal = self._signals.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(signal.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+class MongoJobStore:
+    """Jobs in db.debate_jobs and their events in db.debate_job_events, both expiring after JOB_TTL."""
+
+    def _db(self):
+        from database import get_db
+        return get_db()
+
+    async def setup(self):
+        db = self._db()
+        await db.debate_jobs.create_index("expires_at", expireAfterSeconds=0)
+        await db.debate_jobs.create_index([("status", 1), ("created_at", 1)])
+        await db.debate_job_events.create_index("expires_at", expireAfterSeconds=0)
+        await db.debate_job_events.create_index([("job_id", 1), ("seq", 1)], unique=True)
+
+    async def create(self, job):
+        await self._db().debate_jobs.insert_one(job)
+
+    async def get(self, job_id):
+        return await self._db().debate_jobs.find_one({"_id": job_id})
+
+    async def update(self, job_id, fields):
+        await self._db().debate_jobs.update_one({"_id": job_id}, {"$set": fields})
+
+    async def claim(self, worker_id):
+        from pymongo import ReturnDocument
+        now = datetime.utcnow()
+        return await self._db().debate_jobs.find_one_and_update(
+            {"attempts": {"$lt": JOB_MAX_ATTEMPTS}, "$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "running", "owner": worker_id, "started_at": now,
+                      "lease_until": now + timedelta(seconds=JOB_LEASE)},
+             "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def claim_abandoned(self, worker_id):
+        # Leased like a claim, so only one instance fails the job
+        from pymongo import ReturnDocument
+        now = datetime.utcnow()
+        return await self._db().debate_jobs.find_one_and_update(
+            {"status": "running", "attempts": {"$gte": JOB_MAX_ATTEMPTS}, "lease_until": {"$lt": now}},
+            {"$set": {"owner": worker_id, "lease_until": now + timedelta(seconds=JOB_LEASE)}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def renew(self, job_id, worker_id):
+        await self._db().debate_jobs.update_one(
+            {"_id": job_id, "owner": worker_id, "status": "running"},
+            {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=JOB_LEASE)}},
+        )
+
+    async def release(self, worker_id):
+        # Expire our leases so another instance picks the jobs up straight away
+        await self._db().debate_jobs.update_many(
+            {"owner": worker_id, "status": "running"}, {"$set": {"lease_until": datetime.utcnow()}}
+        )
+
+    async def append_events(self, job_id, events):
+        from pymongo import ReturnDocument
+        # Only the job's owner appends, so reserving a block of sequence numbers is enough
+        job = await self._db().debate_jobs.find_one_and_update(
+            {"_id": job_id}, {"$inc": {"next_seq": len(events)}},
+            projection={"next_seq": 1}, return_document=ReturnDocument.AFTER,
+        )
+        first = job["next_seq"] - len(events) + 1
+        expires_at = datetime.utcnow() + timedelta(seconds=JOB_TTL)
+        await self._db().debate_job_events.insert_many([
+            {"job_id": job_id, "seq": first + i, "event": event, "expires_at": expires_at}
+            for i, event in enumerate(events)
+        ])
+
+    async def events_after(self, job_id, seq):
+        cursor = self._db().debate_job_events.find(
+            {"job_id": job_id, "seq": {"$gt": seq}}, {"_id": 0, "seq": 1, "event": 1}
+        ).sort("seq", 1)
+        return [(doc["seq"], doc["event"]) async for doc in cursor]
+
+    async def wait_for_events(self, job_id, seq, timeout):
+        await asyncio.sleep(min(timeout, EVENT_POLL_SECONDS))
+
+# ─── Workers ─────────────────────────────────────────────────────────────────
+
+class JobWorkers:
+    """Runs claimed jobs with runners[job["kind"]](job, emit) -> result dict.
+
+    emit may be called from any thread; events are appended to the job's log
+    in batches. A runner that raises fails the job with an "error" event.
+    """
+
+    def __init__(self, store, concurrency=JOB_WORKERS):
+        self.store = store
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.runners = {}
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "running": 0, "worker_errors": 0}
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+
+    def register(self, kind, runner):
+        self.runners[kind] = runner
+
+    async def start(self):
+        await self.store.setup()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.store.release(self.worker_id)
+
+    async def submit(self, user_id: str, kind: str, request: dict) -> dict:
+        job = new_job(user_id, kind, request)
+        await self.store.create(job)
+        self.stats["submitted"] += 1
+        self._wakeup.set()
+        return job
+
+    def snapshot(self):
+        return {**self.stats, "backend": JOB_BACKEND, "workers": self.concurrency}
+
+    async def _work(self):
+        errors = 0
+        while True:
+            try:
+                job = await self.store.claim(self.worker_id)
+                if job is None:
+                    await self._fail_abandoned()
+                    errors = 0
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A store error must not take the worker down with it; a job it
+                # was running is picked up again once its lease runs out
+                errors += 1
+                self.stats["worker_errors"] += 1
+                delay = min(ERROR_BACKOFF_MAX, ERROR_BACKOFF_BASE * 2 ** (errors - 1))
+                print(f"⚠️ Job worker error ({errors} in a row, retrying in {delay:.1f}s): {e}")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _fail_abandoned(self):
+        while True:
+            job = await self.store.claim_abandoned(self.worker_id)
+            if job is None:
+                return
+            message = f"The job's worker stopped responding on each of its {job['attempts']} attempts"
+            # Error event first, so a reader that sees "failed" and drains the log gets it
+            await self.store.append_events(job["_id"], [{"type": "error", "message": message}])
+            await self.store.update(job["_id"], {"status": "failed", "finished_at": datetime.utcnow(),
+                                                 "error": message})
+            self.stats["failed"] += 1
+
+    async def _run(self, job):
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        job_id = job["_id"]
+
+        def emit(event):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        async def pump():
+            # None marks the end of the log; it is queued after every earlier emit
+            while True:
+                batch = [await events.get()]
+                while not events.empty():
+                    batch.append(events.get_nowait())
+                finished = None in batch
+                batch = [event for event in batch if event is not None]
+                if batch:
+                    await self.store.append_events(job_id, batch)
+                if finished:
+                    return
+
+        async def keep_lease():
+            while True:
+                await asyncio.sleep(JOB_LEASE / 3)
+                await self.store.renew(job_id, self.worker_id)
+
+        self.stats["running"] += 1
+        pumping = asyncio.create_task(pump())
+        leasing = asyncio.create_task(keep_lease())
+        try:
+            if job["attempts"] > 1:
+                emit({"type": "job_restarted", "attempt": job["attempts"]})
+            result = await self.runners[job["kind"]](job, emit)
+            status, fields = "completed", {"result": result}
+            self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            pumping.cancel()
+            raise
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            emit({"type": "error", "message": str(e)})
+            status, fields = "failed", {"error": str(e)}
+            self.stats["failed"] += 1
+        finally:
+            self.stats["running"] -= 1
+            leasing.cancel()
+        # Every event is in the log before the job turns terminal, so a reader
+        # that sees the final status and then drains the log has seen them all
+        emit(None)
+        await pumping
+        await self.store.update(job_id, {"status": status, "finished_at": datetime.utcnow(), **fields})
+
+job_workers = JobWorkers(MongoJobStore() if JOB_BACKEND == "mongo" else MemoryJobStore())
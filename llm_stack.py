@@ -0,0 +1,70 @@
+import asyncio
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# crewai pulls in LiteLLM, tokenizers and OpenTelemetry, which takes seconds on
+# a Render free instance. No module the server imports at startup touches it,
+# so /health, the static pages and auth are served as soon as uvicorn is up.
+# app.py starts load() in a thread at startup (unless LLM_PRELOAD=0) and every
+# route that needs an LLM awaits ready() first, so a debate that arrives early
+# waits for the import instead of blocking the event loop on it.
+LLM_PRELOAD = os.getenv("LLM_PRELOAD", "1") != "0"
+
+_loaded = threading.Event()
+_lock = threading.Lock()
+_loading = None        # asyncio future of the background load
+load_seconds = None
+
+
+def load():
+    """Import the LLM stack. Blocking; safe to call repeatedly and from any thread."""
+    global load_seconds
+    if _loaded.is_set():
+        return
+    with _lock:
+        if _loaded.is_set():
+            return
+        started = time.perf_counter()
+        from crewai import Agent, Crew, LLM, Task  # noqa: F401
+        try:
+            import litellm  # noqa: F401  (so the first Groq call does not pay for it)
+        except ImportError:
+            pass
+        from pipeline import install_stream_forwarding, install_usage_tracking
+        install_stream_forwarding()
+        install_usage_tracking()
+        load_seconds = time.perf_counter() - started
+        _loaded.set()
+
+
+def warm():
+    """Start loading in the background; returns at once. Needs a running event loop."""
+    global _loading
+    if _loaded.is_set() or _loading is not None:
+        return
+    _loading = asyncio.ensure_future(asyncio.to_thread(load))
+
+    def done(future):
+        global _loading
+        if future.cancelled() or future.exception() is not None:
+            _loading = None   # let the next ready() try again
+    _loading.add_done_callback(done)
+
+
+async def ready():
+    """Wait until the LLM stack is imported, loading it off the event loop if nobody has yet."""
+    if _loaded.is_set():
+        return
+    warm()
+    await asyncio.shield(_loading)
+
+
+def snapshot():
+    return {
+        "loaded": _loaded.is_set(),
+        "load_seconds": round(load_seconds, 3) if load_seconds is not None else None,
+    }
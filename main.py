@@ -3,24 +3,17 @@ load_dotenv()
 
 from crewai import Crew
 from tasks import debate_tasks
-from agents import select_model
+from agents import select_model, model_name, MODELS
 
 if __name__ == "__main__":
     topic = input("Enter you Topic or Question:- ")
     print("\nSelect a model:")
-    print("1️⃣  Llama 3.1 8B Instant (Fast & Balanced)")
-    print("2️⃣  Gemma 2 9B (Concise & Lightweight)")
-    print("3️⃣  Llama 3.3 7B Versatile(Most Capable & Best Reasoning)")
+    for number, model in enumerate(MODELS, start=1):
+        print(f"{number}. {model['name']} ({model['description']})")
 
-    choice = input("\nEnter the number of your choice (1-4): ").strip()
+    choice = input(f"\nEnter the number of your choice (1-{len(MODELS)}): ").strip()
 
-    model_choice_map = {
-        "1": "Llama 3.1 8B Instant",
-        "2": "Gemma 2 9B",
-        "3":"Llama 3.3 7B Versatile"
-    }
-
-    model_choice = model_choice_map.get(choice, "Llama 3.1 8B Instant")
+    model_choice = MODELS[int(choice) - 1]["name"] if choice.isdigit() and 1 <= int(choice) <= len(MODELS) else model_name(choice)
     print(f"\n✅ Selected Model: {model_choice}")
 
     llm = select_model(model_choice)
@@ -33,7 +26,7 @@ if __name__ == "__main__":
         verbose=True
     )
 
-    print("\n🚀 Starting debate...\n") 
+    print("\n🚀 Starting debate...\n")
 
     result = crew.kickoff()
-    print("\nFinal Summary:\n", result)
\ No newline at end of file
+    print("\nFinal Summary:\n", result)
@@ -0,0 +1,254 @@
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Timing spans and counters for the hot path, served as Prometheus text on
+# GET /metrics. Recording a span is a perf_counter pair plus a locked bucket
+# increment, cheap enough to leave on in production. LOG_FORMAT=json also
+# writes one JSON line per span and request to stdout, tagged with the
+# request ID, for log pipelines that don't scrape Prometheus.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+JSON_LOGS       = os.getenv("LOG_FORMAT", "text") == "json"
+
+# Seconds; covers bcrypt and Mongo (milliseconds) up to slow judge calls (a minute)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Set per HTTP request by the middleware in app.py; executors carry it into worker threads
+request_id = ContextVar("request_id", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        lines += [f"{self.name}{_label_text(self.labels, key)} {_number(v)}" for key, v in values]
+        return lines
+
+
+_INF = 'le="+Inf"'
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [per-bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, [le])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, key, [_INF])} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total!r}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._gauges = []   # (name, help, labels, fn() -> [(label values, value)])
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, labels, fn):
+        """A gauge read from fn() at scrape time, for state another module already tracks."""
+        self._gauges.append((name, help, tuple(labels), fn))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for name, help, labels, fn in self._gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{_label_text(labels, key)} {_number(value)}" for key, value in fn()]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+SPAN_SECONDS = registry.histogram("mads_span_seconds", "Time spent in each instrumented span", ("span",))
+SPAN_ERRORS  = registry.counter("mads_span_errors_total", "Spans that ended with an exception", ("span",))
+LLM_SECONDS  = registry.histogram("mads_llm_call_seconds", "Duration of each debate stage LLM call",
+                                  ("model", "side", "outcome"))
+LLM_TOKENS   = registry.counter("mads_llm_tokens_total", "Estimated prompt and completion tokens per model",
+                                ("model", "kind"))
+HTTP_SECONDS = registry.histogram("mads_http_request_seconds", "HTTP request duration by route",
+                                  ("method", "route", "status"))
+
+
+def log(event, **fields):
+    """One JSON line on stdout when LOG_FORMAT=json; a no-op otherwise."""
+    if not JSON_LOGS:
+        return
+    record = {"ts": round(time.time(), 3), "event": event, "request_id": request_id.get(), **fields}
+    sys.stdout.write(json.dumps(record, default=str) + "\n")
+
+
+class span:
+    """Time a block into mads_span_seconds{span=name}; usable as `with` or as a decorator.
+
+        with span("tasks.build"):
+            ...
+
+        @span("auth.hash_password")
+        def hash_password(...): ...
+    """
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not METRICS_ENABLED:
+            return False
+        elapsed = time.perf_counter() - self.started
+        SPAN_SECONDS.observe(elapsed, span=self.name)
+        if exc_type is not None:
+            SPAN_ERRORS.inc(span=self.name)
+        if JSON_LOGS:
+            log("span", span=self.name, duration_ms=round(elapsed * 1000, 2), ok=exc_type is None)
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def record_llm_call(model, side, seconds, ok, prompt_tokens=0, completion_tokens=0):
+    if not METRICS_ENABLED:
+        return
+    LLM_SECONDS.observe(seconds, model=model, side=side, outcome="ok" if ok else "error")
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+    if JSON_LOGS:
+        log("llm_call", model=model, side=side, duration_ms=round(seconds * 1000, 1), ok=ok,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def record_request(method, route, status, seconds):
+    if not METRICS_ENABLED:
+        return
+    HTTP_SECONDS.observe(seconds, method=method, route=route, status=str(status))
+    if JSON_LOGS:
+        log("request", method=method, route=route, status=status, duration_ms=round(seconds * 1000, 1))
+
+
+class RequestMetrics:
+    """ASGI middleware timing every HTTP request, streams included, and tagging it with a request ID.
+
+    Plain ASGI rather than @app.middleware("http"), which would buffer the
+    SSE routes through BaseHTTPMiddleware and hide client disconnects.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        incoming = dict(scope["headers"]).get(b"x-request-id")
+        rid = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex[:16]
+        token = request_id.set(rid)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", rid.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # Labelled by route template, so debate and job IDs don't each get a series
+            route = scope.get("route")
+            record_request(scope["method"], getattr(route, "path", "unmatched"), status, time.perf_counter() - started)
+            request_id.reset(token)
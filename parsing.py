@@ -0,0 +1,110 @@
+import re
+
+_VERDICT_LINE = re.compile(r"verdict\s*:\s*([^\n]+)", re.IGNORECASE)
+# Word boundaries so "for" doesn't match "therefore", "before", etc.
+_SIDE = re.compile(r"\b(FOR|AGAINST)\b", re.IGNORECASE)
+_WINNER = re.compile(r"\b(FOR|AGAINST)\b(?:\s+side)?(?:\s+(?:clearly|narrowly|decisively))?\s+(?:wins|won|prevails)\b",
+                     re.IGNORECASE)
+
+def verdict_side(summary: str):
+    """Return "FOR", "AGAINST" or None from the judge's VERDICT line.
+
+    The line often names both sides ("FOR wins, clearly outclassing AGAINST"):
+    the side said to win counts, otherwise the one named first.
+    """
+    match = _VERDICT_LINE.search(summary or "")
+    if not match:
+        return None
+    line = match.group(1)
+    side = _WINNER.search(line) or _SIDE.search(line)
+    return side.group(1).upper() if side else None
+
+# ─── Structured debate ───────────────────────────────────────────────────────
+# Parsed once when a debate is saved and stored next to the raw text as
+# "structured", so history views and analytics don't re-parse it.
+
+# 2: verdict_side takes the winning side, not AGAINST whenever the line names
+# both. `python analytics.py` re-parses debates stored with an older version.
+STRUCTURE_VERSION = 2
+
+# The judge is told to use exactly these labels (tasks.debate_tasks)
+JUDGE_SECTIONS = ("VERDICT", "REASONING", "KEY STRENGTHS", "WEAKNESSES", "FINAL RECOMMENDATION")
+
+FINAL_ANSWER = "Final Answer:"
+
+# "1. ...", "2) ...", "**3.** ...", "### 4. ..." at the start of a line
+_NUMBERED = re.compile(r"^\s*(?:#+\s*)?(?:\*\*)?(\d+)[.)](?:\*\*)?\s+(.*)$")
+_SECTION = re.compile(
+    r"^\s*(?:#+\s*)?(?:\*\*)?(" + "|".join(JUDGE_SECTIONS) + r")(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.*)$",
+    re.IGNORECASE,
+)
+_STRONG = re.compile(r"\b(strong|strongly|clear|clearly|decisive|decisively|significant|significantly|overwhelming)\b", re.IGNORECASE)
+_SLIGHT = re.compile(r"\b(narrow|narrowly|slight|slightly|marginal|marginally|close)\b", re.IGNORECASE)
+
+def _answer(text: str) -> str:
+    # Older or failed-over outputs can still carry the agent's ReAct preamble
+    idx = text.find(FINAL_ANSWER)
+    return text[idx + len(FINAL_ANSWER):] if idx != -1 else text
+
+def parse_arguments(text: str, expected: int = None) -> dict:
+    """Numbered arguments of one side, continuation lines folded into their argument."""
+    arguments = []
+    for line in _answer(text or "").splitlines():
+        match = _NUMBERED.match(line)
+        if match:
+            arguments.append(match.group(2).strip())
+        elif arguments and line.strip():
+            arguments[-1] = f"{arguments[-1]}\n{line.strip()}"
+    return {
+        "arguments": arguments,
+        "count": len(arguments),
+        "expected": expected,
+        "complete": len(arguments) == expected if expected is not None else None,
+    }
+
+def verdict_margin(verdict_text: str) -> str:
+    """"strong", "slight" or "moderate" from the wording of the VERDICT section."""
+    if _SLIGHT.search(verdict_text or ""):
+        return "slight"
+    if _STRONG.search(verdict_text or ""):
+        return "strong"
+    return "moderate"
+
+def parse_judge(summary: str) -> dict:
+    """The judge's labelled sections, keyed "verdict", "reasoning", "key_strengths", ..."""
+    sections, current = {}, None
+    for line in _answer(summary or "").splitlines():
+        match = _SECTION.match(line)
+        if match:
+            current = match.group(1).lower().replace(" ", "_")
+            sections[current] = match.group(2).strip()
+        elif current is not None and line.strip():
+            sections[current] = f"{sections[current]}\n{line.strip()}".strip()
+    names = [name.lower().replace(" ", "_") for name in JUDGE_SECTIONS]
+    return {
+        "side": verdict_side(summary),
+        "margin": verdict_margin(sections.get("verdict", "")),
+        "sections": {name: sections.get(name) for name in names},
+        "missing": [name for name in names if not sections.get(name)],
+    }
+
+def structure_debate(results: dict, args_per_side: int = None) -> dict:
+    """Structured form of a debate's results; args_per_side (if known) is checked against each side.
+
+    For a multi-round debate "for" and "against" are the openings and
+    "rounds" has every round parsed the same way.
+    """
+    rounds = results.get("rounds")
+    structured = {
+        "version": STRUCTURE_VERSION,
+        "for": parse_arguments(rounds[0]["for"] if rounds else results.get("for_arguments", ""), args_per_side),
+        "against": parse_arguments(rounds[0]["against"] if rounds else results.get("against_arguments", ""), args_per_side),
+        "judge": parse_judge(results.get("summary", "")),
+    }
+    if rounds:
+        structured["rounds"] = [
+            {"round": r["round"], "for": parse_arguments(r["for"], args_per_side),
+             "against": parse_arguments(r["against"], args_per_side)}
+            for r in rounds
+        ]
+    return structured
@@ -0,0 +1,286 @@
+import asyncio
+import os
+import random
+from dotenv import load_dotenv
+from metrics import span
+
+load_dotenv()
+
+# Completed debates are written behind the response: save_debate queues the
+# document and returns, and a background task batches queued documents into
+# insert_many calls. If MongoDB is unreachable, or the queue is full, documents
+# go to a local JSONL spill file, which the same task replays in the background
+# on startup and whenever it has been idle for SPILL_RETRY_INTERVAL.
+#
+# Until a debate lands it is still readable (get_pending, get_spilled, and
+# unwritten for history pages) and updatable (update_spilled appends a newer
+# copy), and deleting it (cancel) leaves a tombstone so neither the queue nor
+# the replay writes it afterwards.
+WRITE_QUEUE_SIZE  = int(os.getenv("DEBATE_WRITE_QUEUE", "1000"))
+WRITE_BATCH_SIZE  = int(os.getenv("DEBATE_WRITE_BATCH", "50"))
+WRITE_MAX_RETRIES = int(os.getenv("DEBATE_WRITE_RETRIES", "5"))
+SPILL_FILE        = os.getenv("DEBATE_SPILL_FILE", "debates_spill.jsonl")
+
+FLUSH_INTERVAL = 0.5      # seconds a partial batch waits for company
+SPILL_RETRY_INTERVAL = float(os.getenv("DEBATE_SPILL_RETRY", "60"))   # idle seconds before replaying again
+BACKOFF_BASE   = 0.5      # first retry delay, doubled each attempt
+BACKOFF_MAX    = 30.0
+
+DUPLICATE_KEY = 11000
+
+# What history pages show of a spilled debate; the rest stays on disk
+SUMMARY_FIELDS = ("_id", "user_id", "topic", "model", "created_at", "verdict", "status")
+
+class DebateWriter:
+    def __init__(self, get_collection, max_queue=WRITE_QUEUE_SIZE, batch_size=WRITE_BATCH_SIZE,
+                 max_retries=WRITE_MAX_RETRIES, spill_path=SPILL_FILE, on_written=None):
+        self.get_collection = get_collection
+        self.on_written = on_written   # async fn(docs), called once per document that lands
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.spill_path = spill_path
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.pending = {}   # _id -> document, until it is written or spilled
+        self.spilled = {}   # _id -> summary fields of a document waiting in the spill file
+        self.deleted = set()   # _ids deleted before they were written
+        self.stats = {"queued": 0, "written": 0, "retries": 0, "spilled": 0, "replayed": 0, "cancelled": 0}
+        self._batch = []    # the batch the worker is collecting or writing
+        self._worker = None
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def start(self):
+        """Start the worker; it replays the spill file first, without holding up startup."""
+        self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, doc: dict):
+        self.pending[doc["_id"]] = doc
+        try:
+            self.queue.put_nowait(doc)
+            self.stats["queued"] += 1
+        except asyncio.QueueFull:
+            # Memory stays bounded; the spill file is replayed on next startup
+            self._spill([doc])
+
+    def get_pending(self, debate_id):
+        """Read-your-writes for a debate that is still queued."""
+        return self.pending.get(debate_id)
+
+    def get_spilled(self, debate_id):
+        """The full document of a debate waiting in the spill file, read back from disk."""
+        from bson import json_util
+        if debate_id not in self.spilled:
+            return None
+        needle = str(debate_id)
+        found = None
+        for path in (self.spill_path + ".replay", self.spill_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if needle in line:
+                        doc = json_util.loads(line)
+                        if doc.get("_id") == debate_id:
+                            found = doc   # a later copy (update_spilled) supersedes
+        return found
+
+    def update_spilled(self, debate_id, fields: dict) -> bool:
+        """Set fields on a debate waiting in the spill file; False if it isn't there.
+
+        The updated document is appended; reads and the replay use the last copy.
+        """
+        from bson import json_util
+        doc = self.get_spilled(debate_id)
+        if doc is None:
+            return False
+        doc.update(fields)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.write(json_util.dumps(doc) + "\n")
+        return True
+
+    def unwritten(self, user_id: str) -> list:
+        """The user's debates not in MongoDB yet: queued documents and spilled summaries."""
+        docs = [doc for doc in self.pending.values() if doc["user_id"] == user_id]
+        return docs + [doc for doc in self.spilled.values() if doc["user_id"] == user_id]
+
+    def cancel(self, debate_id, user_id: str) -> bool:
+        """Delete a debate of the user's that hasn't been written; True if there was one.
+
+        A write already in flight is undone once it lands (see _write).
+        """
+        doc = self.pending.get(debate_id) or self.spilled.get(debate_id)
+        if doc is None or doc["user_id"] != user_id:
+            return False
+        self.pending.pop(debate_id, None)
+        if self.spilled.pop(debate_id, None) is not None:
+            self._spill_tombstone(debate_id)
+        self.deleted.add(debate_id)
+        self.stats["cancelled"] += 1
+        return True
+
+    async def shutdown(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        # Whatever the worker was holding that hasn't landed yet goes out with the rest
+        batch = [doc for doc in self._batch if doc["_id"] in self.pending]
+        batch += self._drain(self.queue.qsize())
+        self._batch = []
+        if batch:
+            await self._write(batch, retries=1)
+
+    def snapshot(self):
+        return {**self.stats, "queue_depth": self.queue.qsize()}
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        await self._replay_spill()
+        while True:
+            try:
+                first = await asyncio.wait_for(self.queue.get(), timeout=SPILL_RETRY_INTERVAL)
+            except asyncio.TimeoutError:
+                await self._replay_spill()
+                continue
+            self._batch = batch = [first]
+            deadline = asyncio.get_running_loop().time() + FLUSH_INTERVAL
+            while len(batch) < self.batch_size:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                remaining = deadline - asyncio.get_running_loop().time()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch, retries=self.max_retries)
+            self._batch = []
+
+    async def _write(self, batch, retries) -> bool:
+        """Insert batch, retrying; whatever still fails is spilled. False if anything was."""
+        from pymongo.errors import BulkWriteError
+
+        for attempt in range(retries):
+            batch = self._skip_deleted(batch)
+            if not batch:
+                return True
+            try:
+                with span("mongo.insert_debates"):
+                    await self.get_collection().insert_many(batch, ordered=False)
+                await self._done(batch)
+                return True
+            except BulkWriteError as e:
+                # _id is assigned before queueing, so a retried insert that already
+                # landed shows up as a duplicate key and counts as written
+                failed = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY}
+                await self._done([doc for i, doc in enumerate(batch) if i not in failed])
+                batch = [doc for i, doc in enumerate(batch) if i in failed]
+                if not batch:
+                    return True
+            except Exception as e:
+                print(f"⚠️ Debate write failed (attempt {attempt + 1}/{retries}): {e}")
+            self.stats["retries"] += 1
+            if attempt + 1 < retries:
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        self._spill(batch)
+        return False
+
+    def _skip_deleted(self, docs):
+        kept = [doc for doc in docs if doc["_id"] not in self.deleted]
+        for doc in docs:
+            if doc["_id"] in self.deleted:
+                self.deleted.discard(doc["_id"])
+                self.pending.pop(doc["_id"], None)
+        return kept
+
+    async def _done(self, docs):
+        # Deleted while the insert was in flight: undo it
+        undo = [doc["_id"] for doc in docs if doc["_id"] in self.deleted]
+        if undo:
+            try:
+                await self.get_collection().delete_many({"_id": {"$in": undo}})
+                self.deleted.difference_update(undo)
+            except Exception as e:
+                print(f"⚠️ Could not remove {len(undo)} debate(s) deleted while being written: {e}")
+            docs = [doc for doc in docs if doc["_id"] not in undo]
+        self.stats["written"] += len(docs)
+        for doc in docs:
+            self.pending.pop(doc["_id"], None)
+            self.spilled.pop(doc["_id"], None)
+        if self.on_written is not None and docs:
+            try:
+                await self.on_written(docs)
+            except Exception as e:
+                # The debates are stored; only their side effects (analytics) are lost
+                print(f"⚠️ After-write hook failed for {len(docs)} debate(s): {e}")
+
+    def _spill(self, docs):
+        from bson import json_util
+        if not docs:
+            return
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for doc in docs:
+                f.write(json_util.dumps(doc) + "\n")
+        self.stats["spilled"] += len(docs)
+        for doc in docs:
+            self.pending.pop(doc["_id"], None)
+            self.spilled[doc["_id"]] = {field: doc.get(field) for field in SUMMARY_FIELDS}
+        print(f"⚠️ Spilled {len(docs)} debate(s) to {self.spill_path}")
+
+    def _spill_tombstone(self, debate_id):
+        # Outlives a restart, unlike self.deleted
+        from bson import json_util
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.write(json_util.dumps({"deleted": debate_id}) + "\n")
+
+    async def _replay_spill(self):
+        from bson import json_util
+        replay_path = self.spill_path + ".replay"
+        try:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(replay_path):
+                    # A replay interrupted by a restart: finish it first
+                    with open(self.spill_path, encoding="utf-8") as src, open(replay_path, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.spill_path)
+                else:
+                    # Rename first so documents spilled again during replay aren't lost
+                    os.replace(self.spill_path, replay_path)
+            if not os.path.exists(replay_path):
+                return
+            with open(replay_path, encoding="utf-8") as f:
+                lines = [json_util.loads(line) for line in f if line.strip()]
+        except OSError as e:
+            print(f"⚠️ Could not read the spill file: {e}")
+            return
+        tombstones = {line["deleted"] for line in lines if "deleted" in line}
+        latest = {}
+        for doc in lines:
+            if "deleted" not in doc and doc["_id"] not in tombstones:
+                latest[doc["_id"]] = doc   # keeps the first copy's place in the order
+        docs = list(latest.values())
+        self.deleted.difference_update(tombstones)
+        for doc in docs:
+            # Readable from memory while they are written
+            self.spilled.pop(doc["_id"], None)
+            self.pending[doc["_id"]] = doc
+        written = 0
+        for start in range(0, len(docs), self.batch_size):
+            batch = docs[start:start + self.batch_size]
+            if not await self._write(batch, retries=self.max_retries):
+                # Still down: the rest goes back to the spill file as it was, in order
+                self._spill(self._skip_deleted(docs[start + self.batch_size:]))
+                break
+            written += len(batch)
+        self.stats["replayed"] += written
+        os.remove(replay_path)
+        if written:
+            print(f"✅ Replayed {written} spilled debate(s)")
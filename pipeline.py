@@ -0,0 +1,555 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+from agents import llm_for
+from executors import run_llm
+from metrics import log, record_llm_call, registry
+from parsing import parse_arguments
+from debate_rounds import SideDigest, judge_context, estimate_rebuttal_tokens, transcript as round_transcript
+from routing import router
+from scheduler import scheduler
+from tasks import estimate_tokens, retarget_task, missing_arguments_task
+
+# Crew joins task outputs with this divider when it passes context to the next task
+CONTEXT_DIVIDER = "\n\n----------\n\n"
+
+# Agents answer in ReAct format; only text after this marker is the real answer
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# Set inside the worker thread running a stage; the event bus handler below
+# reads it to route each chunk to the debate and side that produced it.
+_chunk_sink = contextvars.ContextVar("chunk_sink", default=None)
+
+
+class _StreamClaim:
+    """When a stage is hedged, only the first attempt to start answering streams."""
+
+    def __init__(self):
+        self.owner = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def allows(self, sink):
+        with self.lock:
+            if self.closed:
+                return False
+            if self.owner is None:
+                self.owner = sink
+            return self.owner is sink
+
+    def release(self, sink):
+        with self.lock:
+            if self.owner is not sink:
+                return False
+            self.owner = None
+            return True
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+
+
+class _AnswerFilter:
+    """Drops the agent's Thought/Action preamble and forwards only the answer."""
+
+    def __init__(self, side, on_event, claim=None):
+        self.side = side
+        self.on_event = on_event
+        self.claim = claim
+        self.buffer = ""
+        self.answering = False
+
+    def emit(self, text):
+        if self.claim is not None and not self.claim.allows(self):
+            return
+        self.on_event({"type": "token", "agent": self.side, "content": text})
+
+    def feed(self, chunk):
+        if self.answering:
+            self.emit(chunk)
+            return
+        self.buffer += chunk
+        idx = self.buffer.find(FINAL_ANSWER_MARKER)
+        if idx != -1:
+            self.answering = True
+            answer = self.buffer[idx + len(FINAL_ANSWER_MARKER):].lstrip()
+            self.buffer = ""
+            if answer:
+                self.emit(answer)
+
+
+def _forward_chunk(source, event):
+    sink = _chunk_sink.get()
+    if sink is not None and event.chunk:
+        sink.feed(event.chunk)
+
+
+_forwarding = False
+_forwarding_lock = threading.Lock()
+
+
+def install_stream_forwarding():
+    """Subscribe _forward_chunk to crewai's stream events, once.
+
+    Done on first use rather than at import so this module doesn't import
+    crewai (see llm_stack.py).
+    """
+    global _forwarding
+    with _forwarding_lock:
+        if _forwarding:
+            return
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+        crewai_event_bus.on(LLMStreamChunkEvent)(_forward_chunk)
+        _forwarding = True
+
+
+# ─── Cancellation accounting ─────────────────────────────────────────────────
+# A stage counts as saved when the debate was cancelled before its LLM call
+# started. Calls already running in a worker thread can't be interrupted and
+# are not counted. Stages are named by side, and rebuttal rounds by side and
+# round ("for:2"), so a debate stopped mid-rounds counts the rounds it skipped.
+
+cancel_stats = {
+    "debates_cancelled": 0,
+    "llm_calls_saved": 0,
+    "tokens_saved_estimate": 0,
+}
+_completion_tokens = {"for": [0, 0], "against": [0, 0], "judge": [0, 0]}  # side -> [total, count]
+_stats_lock = threading.Lock()
+
+
+def _record_completion(side, output):
+    with _stats_lock:
+        entry = _completion_tokens[side]
+        entry[0] += estimate_tokens(str(output.raw))
+        entry[1] += 1
+
+
+def stage_name(side, round_no=None):
+    return side if round_no is None else f"{side}:{round_no}"
+
+
+def _planned_stages(tasks, rounds):
+    """(stage, side, estimated prompt tokens) for every LLM call the debate plans, in order."""
+    for_task, against_task, judge_task = tasks
+    stages = [("for", "for", estimate_tokens(for_task.description)),
+              ("against", "against", estimate_tokens(against_task.description))]
+    if rounds is not None:
+        # Rebuttal prompts are built from the previous round; estimate the ones not yet built
+        rebuttal_tokens = estimate_rebuttal_tokens(rounds.args_per_side)
+        for round_no in range(2, rounds.rounds + 1):
+            stages += [(stage_name(side, round_no), side, rebuttal_tokens) for side in ("for", "against")]
+    stages.append(("judge", "judge", estimate_tokens(judge_task.description)))
+    return stages
+
+
+def _record_cancelled(stages, started):
+    with _stats_lock:
+        cancel_stats["debates_cancelled"] += 1
+        for stage, side, prompt_tokens in stages:
+            if stage in started:
+                continue
+            total, count = _completion_tokens[side]
+            cancel_stats["llm_calls_saved"] += 1
+            cancel_stats["tokens_saved_estimate"] += prompt_tokens + (total // count if count else 0)
+
+
+# ─── Token estimates for admission control ───────────────────────────────────
+
+DEFAULT_COMPLETION_TOKENS = 600   # per stage, until real completions have been seen
+PROMPT_OVERHEAD_TOKENS = 150      # role, goal, backstory and ReAct instructions around each prompt
+
+
+def expected_completion_tokens(side):
+    with _stats_lock:
+        total, count = _completion_tokens[side]
+    return total // count if count else DEFAULT_COMPLETION_TOKENS
+
+
+def estimate_debate_tokens(tasks):
+    """Prompt plus completion tokens one debate is expected to use, across all three calls."""
+    prompts = sum(estimate_tokens(task.description) + PROMPT_OVERHEAD_TOKENS for task in tasks)
+    for_tokens, against_tokens = expected_completion_tokens("for"), expected_completion_tokens("against")
+    # The judge reads both answers as context, so they are counted twice
+    return prompts + 2 * (for_tokens + against_tokens) + expected_completion_tokens("judge")
+
+
+def estimate_rebuttal_cost(rounds, args_per_side):
+    """(calls, tokens) the rebuttal rounds of a `rounds`-round debate add to its openings."""
+    rebuttals = 2 * (rounds - 1)
+    completions = expected_completion_tokens("for") + expected_completion_tokens("against")
+    return rebuttals, rebuttals * estimate_rebuttal_tokens(args_per_side) + (rounds - 1) * completions
+
+
+def build_judge_context(for_output, against_output):
+    return CONTEXT_DIVIDER.join([str(for_output.raw), str(against_output.raw)])
+
+
+def _execute_stage(stage, task, context, sink, started):
+    started.add(stage)
+    if sink is not None:
+        _chunk_sink.set(sink)
+    return task.execute_sync(context=context)
+
+
+# ─── Routing: fallbacks and hedged requests ──────────────────────────────────
+# An attempt that loses a hedge is already running in its worker thread and
+# can't be interrupted; it is left to finish so its latency still counts
+# towards the model's p95.
+
+_orphans = set()
+
+
+def _orphan(attempt):
+    _orphans.add(attempt)
+    attempt.add_done_callback(_orphans.discard)
+    attempt.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+async def _attempt(side, task, context, sink, started, stage):
+    model = task.agent.llm.model
+    prompt_tokens = estimate_tokens(task.description + (context or "")) + PROMPT_OVERHEAD_TOKENS
+    began = time.monotonic()
+    try:
+        output = await run_llm(_execute_stage, stage, task, context, sink, started)
+    except Exception:
+        elapsed = time.monotonic() - began
+        router.record(model, elapsed, ok=False)
+        record_llm_call(model, side, elapsed, ok=False, prompt_tokens=prompt_tokens)
+        raise
+    elapsed = time.monotonic() - began
+    router.record(model, elapsed, ok=True)
+    record_llm_call(model, side, elapsed, ok=True, prompt_tokens=prompt_tokens,
+                    completion_tokens=estimate_tokens(str(output.raw)))
+    return output
+
+
+async def _run_routed(side, task, context, on_event, started, allow_fallback, stage=None):
+    """Run one stage, falling back down the model's chain on errors and hedging
+    with the next model once the current one passes its p95 deadline.
+
+    Returns (TaskOutput, model ID that produced it).
+    """
+    stage = stage or side
+    primary = task.agent.llm.model
+    models = router.attempt_order(primary) if allow_fallback else [primary]
+    stream = getattr(task.agent.llm, "stream", False)
+    tokens = estimate_tokens(task.description + (context or "")) + PROMPT_OVERHEAD_TOKENS + expected_completion_tokens(side)
+    claim = _StreamClaim() if on_event is not None else None
+    running = {}        # attempt future -> (model, sink, launched at)
+    next_index = 0
+    can_hedge = True
+    last_error = None
+
+    def launch(force):
+        nonlocal next_index
+        model = models[next_index]
+        # The debate was admitted against the requested model; anything else is charged as it goes
+        if model != primary and not scheduler.queue(model).charge(1, tokens, force=force):
+            return False
+        stage_task = task if model == primary else retarget_task(task, side, llm_for(model, stream=stream))
+        sink = _AnswerFilter(side, on_event, claim) if on_event is not None else None
+        future = asyncio.ensure_future(_attempt(side, stage_task, context, sink, started, stage))
+        running[future] = (model, sink, time.monotonic())
+        next_index += 1
+        return True
+
+    try:
+        launch(force=True)
+        while True:
+            timeout = None
+            if can_hedge and len(running) == 1 and next_index < len(models):
+                model, _, launched = next(iter(running.values()))
+                deadline = router.hedge_deadline(model)
+                if deadline is not None:
+                    timeout = max(0.0, launched + deadline - time.monotonic())
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if launch(force=False):
+                    router.counters["hedges"] += 1
+                else:
+                    can_hedge = False   # backup is out of budget; let the slow call finish
+                continue
+
+            for future in done:
+                model, sink, _ = running.pop(future)
+                if future.exception() is None:
+                    if claim is not None:
+                        claim.close()
+                    if model != primary:
+                        router.counters["hedges_won" if running else "fallbacks"] += 1
+                    for loser in running:
+                        _orphan(loser)
+                    running.clear()
+                    return future.result(), model
+                last_error = future.exception()
+                if claim is not None and claim.release(sink):
+                    # Its half-streamed answer is void; the next attempt streams afresh
+                    on_event({"type": "reset", "agent": side})
+            if not running:
+                if next_index >= len(models):
+                    raise last_error
+                launch(force=True)
+    except asyncio.CancelledError:
+        # Attempts still waiting for a worker are dropped, as in run_debate_pipeline
+        for future in running:
+            future.cancel()
+        raise
+
+
+# ─── Argument-count repair ───────────────────────────────────────────────────
+# A side that returns the wrong number of arguments is fixed on its own
+# instead of the user rerunning all three calls: extra arguments are trimmed,
+# and missing ones are asked for in one short call to REPAIR_MODEL, which
+# gets the arguments already written. Outcomes are counted per model that
+# produced the bad answer, so /api/pipeline/stats shows which models waste calls.
+
+REPAIR_MODEL = os.getenv("REPAIR_MODEL", "groq/llama-3.1-8b-instant")
+
+repair_stats = {}   # model -> {"checked", "ok", "trimmed", "reissued", "failed"}
+REPAIRS = registry.counter("mads_argument_repairs_total",
+                           "Argument-count checks by the model that answered and their outcome", ("model", "outcome"))
+
+
+def _record_repair(model, outcome):
+    with _stats_lock:
+        counts = repair_stats.setdefault(model, {"checked": 0, "ok": 0, "trimmed": 0, "reissued": 0, "failed": 0})
+        counts["checked"] += 1
+        counts[outcome] += 1
+    REPAIRS.inc(model=model, outcome=outcome)
+
+
+def repair_snapshot():
+    with _stats_lock:
+        return {
+            model: {**counts, "repair_rate": round((counts["checked"] - counts["ok"]) / counts["checked"], 3)}
+            for model, counts in repair_stats.items()
+        }
+
+
+# ─── Provider token usage ────────────────────────────────────────────────────
+# Token counts as the provider reports them, rather than estimate_tokens'
+# guesses. cached_tokens is the part of the prompt the provider served from
+# its prefix cache (Groq reports it for the models that support caching), so
+# cached_tokens / prompt_tokens shows how much the prefix-stable templates in
+# tasks.py are paying off. Collected by a LiteLLM success callback, installed
+# from llm_stack.load(); FakeLLM calls don't go through LiteLLM.
+
+provider_usage = {}   # model -> {"calls", "prompt_tokens", "cached_tokens", "completion_tokens"}
+PROVIDER_TOKENS = registry.counter("mads_llm_provider_tokens_total",
+                                   "Prompt, cached prompt and completion tokens as reported by the provider",
+                                   ("model", "kind"))
+
+
+def _record_provider_usage(kwargs, response, start_time, end_time):
+    # A streamed call reports usage on the assembled response, not the last chunk
+    response = kwargs.get("complete_streaming_response") or response
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    model = kwargs.get("model", "unknown")
+    provider = (kwargs.get("litellm_params") or {}).get("custom_llm_provider")
+    if provider and not model.startswith(provider + "/"):
+        model = f"{provider}/{model}"   # match the groq/... IDs used everywhere else
+    details = getattr(usage, "prompt_tokens_details", None)
+    tokens = {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+    with _stats_lock:
+        counts = provider_usage.setdefault(model, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0})
+        counts["calls"] += 1
+        for key, value in tokens.items():
+            counts[key] += value
+    for key, kind in (("prompt_tokens", "prompt"), ("cached_tokens", "cached_prompt"), ("completion_tokens", "completion")):
+        if tokens[key]:
+            PROVIDER_TOKENS.inc(tokens[key], model=model, kind=kind)
+
+
+_usage_tracking = False
+
+
+def install_usage_tracking():
+    """Register _record_provider_usage with LiteLLM, once; a no-op without LiteLLM."""
+    global _usage_tracking
+    with _forwarding_lock:
+        if _usage_tracking:
+            return
+        try:
+            import litellm
+        except ImportError:
+            return
+        litellm.success_callback.append(_record_provider_usage)
+        _usage_tracking = True
+
+
+def usage_snapshot():
+    with _stats_lock:
+        return {
+            model: {**counts, "cached_share": round(counts["cached_tokens"] / counts["prompt_tokens"], 3)
+                    if counts["prompt_tokens"] else None}
+            for model, counts in provider_usage.items()
+        }
+
+
+def number_arguments(arguments):
+    return "\n".join(f"{i}. {text}" for i, text in enumerate(arguments, start=1))
+
+
+async def _repair_arguments(side, task, output, model, expected, on_event, started, allow_fallback, stage=None):
+    """output with exactly `expected` numbered arguments, trimmed or topped up if it had the wrong count."""
+    arguments = parse_arguments(str(output.raw), expected)["arguments"]
+    if len(arguments) == expected:
+        _record_repair(model, "ok")
+        return output
+    if len(arguments) > expected:
+        _record_repair(model, "trimmed")
+        return output.model_copy(update={"raw": number_arguments(arguments[:expected])})
+
+    if on_event is not None:
+        on_event({"type": "repairing", "agent": side, "missing": expected - len(arguments)})
+    repair = missing_arguments_task(task, side, llm_for(REPAIR_MODEL), arguments, expected)
+    tokens = estimate_tokens(repair.description) + PROMPT_OVERHEAD_TOKENS + expected_completion_tokens(side)
+    # Not covered by the debate's admission; charged like a fallback call
+    scheduler.queue(REPAIR_MODEL).charge(1, tokens, force=True)
+    try:
+        extra, _ = await _run_routed(side, repair, None, None, started, allow_fallback, stage)
+    except Exception as e:
+        log("argument_repair_failed", model=model, side=side, error=repr(e))
+        _record_repair(model, "failed")
+        return output
+    arguments = (arguments + parse_arguments(str(extra.raw))["arguments"])[:expected]
+    _record_repair(model, "reissued" if len(arguments) == expected else "failed")
+    return output.model_copy(update={"raw": number_arguments(arguments)})
+
+
+async def run_stage(side, task, context=None, on_event=None, started=None, models=None, allow_fallback=True,
+                    expected_arguments=None, round_no=None):
+    if started is None:
+        started = set()
+    if on_event is not None:
+        install_stream_forwarding()
+    stage = stage_name(side, round_no)
+    output, model = await _run_routed(side, task, context, on_event, started, allow_fallback, stage)
+    if expected_arguments is not None:
+        output = await _repair_arguments(side, task, output, model, expected_arguments, on_event, started,
+                                         allow_fallback, stage)
+    _record_completion(side, output)
+    if models is not None:
+        models[side] = model
+    if on_event is not None:
+        event = {"type": "agent_complete", "agent": side, "content": str(output.raw), "model": model}
+        if round_no is not None:
+            event["round"] = round_no
+        on_event(event)
+    return output
+
+
+async def _run_rounds(for_output, against_output, rounds, on_event, started, models, allow_fallback,
+                      args_per_side, transcript, opening_tokens):
+    """Rebuttal rounds 2..rounds.rounds after the openings; returns the judge's context.
+
+    Each round runs both sides at once against the other's previous round.
+    transcript gets a {"round", "for", "against", "prompt_tokens"} entry per round.
+    """
+    latest = {"for": str(for_output.raw), "against": str(against_output.raw)}
+    digests = {"for": SideDigest(), "against": SideDigest()}
+
+    def finish_round(round_no, prompt_tokens):
+        for side in ("for", "against"):
+            digests[side].record(round_no, latest[side])
+        entry = {"round": round_no, **latest, "prompt_tokens": prompt_tokens}
+        transcript.append(entry)
+        if on_event is not None:
+            on_event({"type": "round_complete", **entry})
+
+    finish_round(1, opening_tokens)
+    for round_no in range(2, rounds.rounds + 1):
+        if on_event is not None:
+            on_event({"type": "round_start", "round": round_no})
+        for_task = rounds.task("for", round_no, digests, latest)
+        against_task = rounds.task("against", round_no, digests, latest)
+        prompt_tokens = estimate_tokens(for_task.description) + estimate_tokens(against_task.description)
+        for_output, against_output = await asyncio.gather(
+            run_stage("for", for_task, on_event=on_event, started=started, models=models,
+                      allow_fallback=allow_fallback, expected_arguments=args_per_side, round_no=round_no),
+            run_stage("against", against_task, on_event=on_event, started=started, models=models,
+                      allow_fallback=allow_fallback, expected_arguments=args_per_side, round_no=round_no),
+        )
+        latest = {"for": str(for_output.raw), "against": str(against_output.raw)}
+        finish_round(round_no, prompt_tokens)
+    return judge_context(digests, latest)
+
+
+async def run_debate_pipeline(tasks, on_event=None, models=None, allow_fallback=True, args_per_side=None,
+                              rounds=None, transcript=None):
+    """Run FOR and AGAINST concurrently, then the judge once both have finished.
+
+    Takes the [for_task, against_task, judge_task] list from tasks.debate_tasks
+    and returns their TaskOutputs in the same order. If on_event is given it
+    receives a "token" event for every streamed piece of an answer (from the
+    worker thread) and an "agent_complete" event with the full answer when a
+    stage finishes. Both are tagged with agent "for", "against" or "judge".
+
+    Each stage may be answered by a fallback or hedge model (see routing.py)
+    unless allow_fallback is False; if a models dict is given, it is filled
+    with the model ID that actually answered each side.
+
+    With args_per_side, a FOR or AGAINST answer with the wrong number of
+    arguments is trimmed or topped up before the judge sees it.
+
+    With rounds (a debate_rounds.RoundSettings of more than one round), the
+    openings are followed by rebuttal rounds, each streamed as it finishes
+    ("round_start", then "round_complete"). The FOR and AGAINST outputs
+    returned then hold every round under round headings, and transcript, if
+    given, is filled with one entry per round.
+
+    Cancelling the coroutine (client gone, Stop pressed) drops any stage that
+    hasn't reached an LLM worker yet and records the savings in cancel_stats.
+    """
+    for_task, against_task, judge_task = tasks
+    started = set()   # stage names whose LLM call has begun
+
+    try:
+        for_output, against_output = await asyncio.gather(
+            run_stage("for", for_task, on_event=on_event, started=started, models=models,
+                      allow_fallback=allow_fallback, expected_arguments=args_per_side),
+            run_stage("against", against_task, on_event=on_event, started=started, models=models,
+                      allow_fallback=allow_fallback, expected_arguments=args_per_side),
+        )
+        if rounds is not None and rounds.rounds > 1:
+            transcript = [] if transcript is None else transcript
+            opening_tokens = estimate_tokens(for_task.description) + estimate_tokens(against_task.description)
+            context = await _run_rounds(for_output, against_output, rounds, on_event, started, models,
+                                        allow_fallback, args_per_side, transcript, opening_tokens)
+            for_output = for_output.model_copy(update={"raw": round_transcript(transcript, "for")})
+            against_output = against_output.model_copy(update={"raw": round_transcript(transcript, "against")})
+        else:
+            context = build_judge_context(for_output, against_output)
+        judge_output = await run_stage(
+            "judge", judge_task,
+            context=context,
+            on_event=on_event, started=started, models=models, allow_fallback=allow_fallback,
+        )
+    except asyncio.CancelledError:
+        multi_round = rounds if rounds is not None and rounds.rounds > 1 else None
+        _record_cancelled(_planned_stages(tasks, multi_round), started)
+        raise
+    return [for_output, against_output, judge_output]
+
+
+def debate_results(task_outputs, transcript=None) -> dict:
+    """The stored results of a debate from run_debate_pipeline's outputs and transcript."""
+    results = {
+        "for_arguments":     str(task_outputs[0].raw),
+        "against_arguments": str(task_outputs[1].raw),
+        "summary":           str(task_outputs[2].raw),
+    }
+    if transcript:
+        # Multi-round: the fields above hold every round under headings; this keeps them apart
+        results["rounds"] = [{"round": r["round"], "for": r["for"], "against": r["against"]} for r in transcript]
+    return results
@@ -0,0 +1,119 @@
+import json
+import os
+import time
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Per-model latency and error tracking behind each debate stage. Every LLM
+# call reports how long it took and whether it failed; from a rolling window
+# of those we derive
+#   - the order models are tried in: a model failing most of its recent calls
+#     moves behind its fallbacks. Outcomes older than ROUTING_OUTCOME_TTL are
+#     forgotten, so a demoted model that gets no traffic is tried first again
+#     once its failures age out, and
+#   - a hedge deadline: once a call has run longer than the model's p95, the
+#     pipeline sends the same stage to the next model in the chain and takes
+#     whichever answer arrives first.
+
+# Tried in order when a model errors, or raced against it when it is slow.
+# Override with MODEL_FALLBACKS='{"groq/qwen/qwen3-32b": ["groq/llama-3.1-8b-instant"]}'.
+FALLBACK_CHAINS = {
+    "groq/moonshotai/kimi-k2-instruct-0905":          ["groq/llama-3.3-70b-versatile", "groq/llama-3.1-8b-instant"],
+    "groq/qwen/qwen3-32b":                            ["groq/llama-3.3-70b-versatile", "groq/llama-3.1-8b-instant"],
+    "groq/meta-llama/llama-4-scout-17b-16e-instruct": ["groq/llama-3.3-70b-versatile", "groq/llama-3.1-8b-instant"],
+    "groq/openai/gpt-oss-20b":                        ["groq/llama-3.3-70b-versatile", "groq/llama-3.1-8b-instant"],
+    "groq/llama-3.3-70b-versatile":                   ["groq/llama-3.1-8b-instant"],
+}
+FALLBACK_CHAINS.update(json.loads(os.getenv("MODEL_FALLBACKS", "{}")))
+
+ROUTING_WINDOW      = int(os.getenv("ROUTING_WINDOW", "50"))           # calls remembered per model
+ROUTING_OUTCOME_TTL = float(os.getenv("ROUTING_OUTCOME_TTL", "120"))   # seconds an error counts against a model
+HEDGE_REQUESTS     = os.getenv("HEDGE_REQUESTS", "1") == "1"
+HEDGE_MIN_SAMPLES  = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))        # no hedging on a cold p95
+HEDGE_MIN_DEADLINE = float(os.getenv("HEDGE_MIN_DEADLINE", "5"))      # seconds
+UNHEALTHY_ERROR_RATE = 0.5
+UNHEALTHY_MIN_SAMPLES = 5
+
+class RollingStats:
+    def __init__(self, window=ROUTING_WINDOW, ttl=ROUTING_OUTCOME_TTL):
+        self.ttl = ttl
+        self.latencies = deque(maxlen=window)   # successful calls only
+        self._outcomes = deque(maxlen=window)   # (monotonic time, True for success)
+
+    def record(self, latency: float, ok: bool):
+        self._outcomes.append((time.monotonic(), ok))
+        if ok:
+            self.latencies.append(latency)
+
+    @property
+    def outcomes(self) -> list:
+        """Outcomes of the calls in the window made within the last ttl seconds."""
+        cutoff = time.monotonic() - self.ttl
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+        return [ok for _, ok in self._outcomes]
+
+    def percentile(self, q: float):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        outcomes = self.outcomes
+        if not outcomes:
+            return 0.0
+        return 1 - sum(outcomes) / len(outcomes)
+
+    def healthy(self) -> bool:
+        outcomes = self.outcomes
+        return len(outcomes) < UNHEALTHY_MIN_SAMPLES or 1 - sum(outcomes) / len(outcomes) < UNHEALTHY_ERROR_RATE
+
+class Router:
+    def __init__(self, chains=FALLBACK_CHAINS):
+        self.chains = chains
+        self._stats = {}
+        self.counters = {"fallbacks": 0, "hedges": 0, "hedges_won": 0, "rerouted": 0}
+
+    def stats(self, model: str) -> RollingStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = RollingStats()
+        return stats
+
+    def record(self, model: str, latency: float, ok: bool):
+        self.stats(model).record(latency, ok)
+
+    def attempt_order(self, model: str) -> list:
+        """The requested model followed by its fallbacks, unhealthy models last."""
+        chain = [model] + [m for m in self.chains.get(model, []) if m != model]
+        healthy = {m: self.stats(m).healthy() for m in chain}
+        ordered = [m for m in chain if healthy[m]] + [m for m in chain if not healthy[m]]
+        if ordered[0] != model:
+            self.counters["rerouted"] += 1
+        return ordered
+
+    def hedge_deadline(self, model: str):
+        """Seconds after which a call to model gets a hedge, or None if it shouldn't."""
+        stats = self.stats(model)
+        if not HEDGE_REQUESTS or len(stats.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DEADLINE, stats.percentile(0.95))
+
+    def snapshot(self):
+        models = {}
+        for model, stats in self._stats.items():
+            p50, p95 = stats.percentile(0.5), stats.percentile(0.95)
+            models[model] = {
+                "calls": len(stats.outcomes),
+                "error_rate": round(stats.error_rate, 3),
+                "p50_seconds": round(p50, 3) if p50 is not None else None,
+                "p95_seconds": round(p95, 3) if p95 is not None else None,
+                "healthy": stats.healthy(),
+            }
+        return {**self.counters, "models": models}
+
+router = Router()
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Admission control in front of the LLM provider. Each model gets two token
+# buckets, requests/min and tokens/min, sized to the provider's limits. A
+# debate is admitted once both buckets can cover it; until then it waits in a
+# bounded per-model queue served round-robin across users, so one user firing
+# ten debates can't starve everyone else. When the queue is full, or the
+# expected wait is longer than SCHEDULER_MAX_WAIT, the caller gets
+# RateLimited with a retry_after instead of a provider 429 halfway through.
+
+# Groq free-tier limits per model: (requests/min, tokens/min).
+# Override with RATE_LIMITS='{"groq/llama-3.1-8b-instant": [30, 6000]}'.
+MODEL_LIMITS = {
+    "groq/llama-3.1-8b-instant":                     (30, 6000),
+    "groq/llama-3.3-70b-versatile":                  (30, 12000),
+    "groq/meta-llama/llama-4-scout-17b-16e-instruct": (30, 30000),
+    "groq/moonshotai/kimi-k2-instruct-0905":         (60, 10000),
+    "groq/qwen/qwen3-32b":                           (60, 6000),
+    "groq/openai/gpt-oss-20b":                       (30, 8000),
+}
+MODEL_LIMITS.update({k: tuple(v) for k, v in json.loads(os.getenv("RATE_LIMITS", "{}")).items()})
+DEFAULT_LIMITS = (30, 6000)
+
+MAX_QUEUE = int(os.getenv("SCHEDULER_QUEUE_SIZE", "50"))       # waiting debates per model
+MAX_WAIT  = float(os.getenv("SCHEDULER_MAX_WAIT", "30"))       # seconds before we'd rather say 429
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True if exc, or anything it was raised from, is a provider 429."""
+    while exc is not None:
+        if getattr(exc, "status_code", None) == 429:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until amount is available; requests bigger than the bucket wait for a full one."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def drain(self):
+        # The provider says we're over; trust it over our own arithmetic
+        self.level = 0.0
+        self.updated = time.monotonic()
+
+class Ticket:
+    def __init__(self, queue, user_id, requests, tokens, position, estimated_wait):
+        self.queue = queue
+        self.user_id = user_id
+        self.requests = requests
+        self.tokens = tokens
+        self.position = position              # debates ahead of this one when it was queued
+        self.estimated_wait = estimated_wait
+        self.enqueued_at = time.monotonic()
+        self.waited = 0.0
+        self.future = asyncio.get_running_loop().create_future()
+
+    @property
+    def admitted(self) -> bool:
+        return self.future.done()
+
+    async def wait(self) -> float:
+        """Block until admitted; returns the seconds spent queued."""
+        try:
+            await self.future
+        except asyncio.CancelledError:
+            self.queue.withdraw(self)
+            raise
+        return self.waited
+
+class ModelQueue:
+    def __init__(self, model: str, rpm: int, tpm: int, max_queue=MAX_QUEUE, max_wait=MAX_WAIT):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._waiting = OrderedDict()   # user_id -> deque of tickets; first key is served next
+        self._depth = 0
+        self._pump = None
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "provider_429s": 0,
+                      "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    def _time_until(self, requests, tokens, now):
+        return max(self.requests.time_until(requests, now), self.tokens.time_until(tokens, now))
+
+    def retry_after(self, requests: int, tokens: int) -> float:
+        """Rough time until a request of this size could be admitted behind the current queue."""
+        head_wait = self._time_until(requests, tokens, time.monotonic())   # also refills both buckets
+        queued = [t for tickets in self._waiting.values() for t in tickets]
+        req_wait = (sum(t.requests for t in queued) + requests - self.requests.level) / self.requests.rate
+        tok_wait = (sum(t.tokens for t in queued) + min(tokens, self.tokens.capacity) - self.tokens.level) / self.tokens.rate
+        return max(0.0, req_wait, tok_wait, head_wait)
+
+    def submit(self, user_id: str, requests: int, tokens: int) -> Ticket:
+        now = time.monotonic()
+        if self._depth == 0 and self._time_until(requests, tokens, now) == 0:
+            ticket = Ticket(self, user_id, requests, tokens, 0, 0.0)
+            self._admit(ticket)
+            return ticket
+
+        estimated = self.retry_after(requests, tokens)
+        if self._depth >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise RateLimited(estimated, f"{self.model} queue is full ({self._depth} waiting)")
+        if estimated > self.max_wait:
+            self.stats["rejected"] += 1
+            raise RateLimited(estimated, f"{self.model} is at its rate limit (about {estimated:.0f}s wait)")
+
+        ticket = Ticket(self, user_id, requests, tokens, self._depth, estimated)
+        self._waiting.setdefault(user_id, deque()).append(ticket)
+        self._depth += 1
+        self.stats["queued"] += 1
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+        return ticket
+
+    def withdraw(self, ticket: Ticket):
+        tickets = self._waiting.get(ticket.user_id)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            self._depth -= 1
+            if not tickets:
+                del self._waiting[ticket.user_id]
+
+    def charge(self, requests: int, tokens: int, force: bool = False) -> bool:
+        """Spend budget for a call made outside the queue (hedges, fallbacks).
+
+        Unless forced, only succeeds if nothing is queued and the budget is there now.
+        """
+        if not force and (self._depth or self._time_until(requests, tokens, time.monotonic()) > 0):
+            return False
+        self.requests.take(requests)
+        self.tokens.take(tokens)
+        return True
+
+    def penalize(self):
+        self.stats["provider_429s"] += 1
+        self.requests.drain()
+        self.tokens.drain()
+
+    def _admit(self, ticket: Ticket):
+        self.requests.take(ticket.requests)
+        self.tokens.take(ticket.tokens)
+        ticket.waited = time.monotonic() - ticket.enqueued_at
+        self.stats["admitted"] += 1
+        self.stats["wait_seconds_total"] += ticket.waited
+        self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], ticket.waited)
+        ticket.future.set_result(None)
+
+    async def _run(self):
+        while self._waiting:
+            user_id, tickets = next(iter(self._waiting.items()))
+            ticket = tickets[0]
+            delay = self._time_until(ticket.requests, ticket.tokens, time.monotonic())
+            if delay > 0:
+                # Re-pick afterwards: the head ticket may have been withdrawn meanwhile
+                await asyncio.sleep(delay)
+                continue
+            tickets.popleft()
+            self._depth -= 1
+            # Round-robin: this user goes to the back of the line
+            del self._waiting[user_id]
+            if tickets:
+                self._waiting[user_id] = tickets
+            self._admit(ticket)
+
+    def snapshot(self):
+        admitted = self.stats["admitted"]
+        now = time.monotonic()
+        oldest = min((t.enqueued_at for q in self._waiting.values() for t in q), default=now)
+        return {
+            **self.stats,
+            "wait_seconds_total": round(self.stats["wait_seconds_total"], 3),
+            "wait_seconds_max": round(self.stats["wait_seconds_max"], 3),
+            "wait_seconds_avg": round(self.stats["wait_seconds_total"] / admitted, 3) if admitted else 0.0,
+            "queue_depth": self._depth,
+            "oldest_wait_seconds": round(now - oldest, 3),
+            "requests_available": round(self.requests.level, 1),
+            "tokens_available": round(self.tokens.level),
+        }
+
+class Scheduler:
+    def __init__(self, limits=MODEL_LIMITS, default=DEFAULT_LIMITS):
+        self.limits = limits
+        self.default = default
+        self._queues = {}
+
+    def queue(self, model: str) -> ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            rpm, tpm = self.limits.get(model, self.default)
+            queue = self._queues[model] = ModelQueue(model, rpm, tpm)
+        return queue
+
+    def submit(self, model: str, user_id: str, requests: int, tokens: int) -> Ticket:
+        """Queue an LLM job of `requests` calls and about `tokens` tokens; raises RateLimited."""
+        return self.queue(model).submit(user_id, requests, tokens)
+
+    def snapshot(self):
+        return {model: queue.snapshot() for model, queue in self._queues.items()}
+
+scheduler = Scheduler()
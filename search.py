@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import math
+import os
+import re
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from dotenv import load_dotenv
+
+from topic_index import STOPWORDS, stem
+
+load_dotenv()
+
+# Keyword search over one user's debate history: topic, both sides'
+# arguments and the judge's verdict, ranked, with a highlighted snippet.
+#
+# The "mongo" backend is a MongoDB text index with user_id as its prefix key,
+# so a query only touches the user's own entries and pages are ranked and cut
+# by the server. Where text indexes aren't available (the index can't be
+# built, or the deployment doesn't support $text), "local" keeps a BM25
+# inverted index per user in memory, built from the user's debates on their
+# first search (those the write-behind writer still holds included) and
+# updated as debates are saved and deleted. Only postings are
+# kept; the text for snippets is read back for the page being returned.
+# DEBATE_SEARCH_BACKEND=auto picks mongo when the index can be built.
+SEARCH_BACKEND    = os.getenv("DEBATE_SEARCH_BACKEND", "auto")   # auto | mongo | local
+LOCAL_INDEX_USERS = int(os.getenv("SEARCH_LOCAL_USERS", "32"))   # per-user indexes kept, least recent dropped
+
+MAX_PAGE      = 50
+MAX_OFFSET    = 1000
+SNIPPET_CHARS = 180
+
+# Field -> weight, used by both backends; the topic counts most, then the verdict
+FIELD_WEIGHTS = {"topic": 10, "verdict": 4, "for_arguments": 1, "against_arguments": 1}
+# Where each field lives in a debate document
+FIELD_PATHS = {
+    "topic": "topic",
+    "verdict": "results.summary",
+    "for_arguments": "results.for_arguments",
+    "against_arguments": "results.against_arguments",
+}
+SNIPPET_ORDER = ("for_arguments", "against_arguments", "verdict", "topic")
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+def terms(text: str) -> list:
+    words = [w.lower() for w in _WORD.findall(text or "")]
+    return [stem(w) for w in words if w not in STOPWORDS]
+
+def document_fields(doc: dict) -> dict:
+    """A debate document (or its projection) as {field: text}."""
+    results = doc.get("results") or {}
+    return {
+        "topic": doc.get("topic") or "",
+        "verdict": results.get("summary") or "",
+        "for_arguments": results.get("for_arguments") or "",
+        "against_arguments": results.get("against_arguments") or "",
+    }
+
+def snippet(fields: dict, query_terms) -> dict:
+    """The window of SNIPPET_CHARS with the most query terms, preferring argument text.
+
+    Returns {"field", "text", "highlights": [[start, end], ...]} with offsets into text.
+    """
+    wanted = set(query_terms)
+    best = None
+    for field in SNIPPET_ORDER:
+        text = fields.get(field) or ""
+        hits = [m.span() for m in _WORD.finditer(text) if stem(m.group().lower()) in wanted]
+        if not hits:
+            continue
+        # The hit to start from so one window holds the most hits (two pointers over the hits)
+        count, first, last = 0, 0, 0
+        for i, (start, _) in enumerate(hits):
+            last = max(last, i)
+            while last + 1 < len(hits) and hits[last + 1][1] <= start + SNIPPET_CHARS:
+                last += 1
+            if last - i + 1 > count:
+                count, first = last - i + 1, i
+        if best is None or count > best[0]:
+            best = (count, field, text, hits, first)
+    if best is None:
+        return {"field": "topic", "text": fields.get("topic", "")[:SNIPPET_CHARS], "highlights": []}
+
+    _, field, text, hits, first = best
+    # Start a little before the first hit, on a word boundary
+    start = max(0, hits[first][0] - SNIPPET_CHARS // 4)
+    if start:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < hits[first][0] else hits[first][0]
+    end = min(len(text), start + SNIPPET_CHARS)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > hits[first][1] else end
+    prefix = "…" if start else ""
+    body = text[start:end].replace("\n", " ")
+    highlights = [[s - start + len(prefix), e - start + len(prefix)] for s, e in hits if start <= s and e <= end]
+    return {"field": field, "text": prefix + body + ("…" if end < len(text) else ""), "highlights": highlights}
+
+# ─── Local backend ───────────────────────────────────────────────────────────
+
+class LocalSearchIndex:
+    """BM25 over one user's debates, each term counted FIELD_WEIGHTS times per field occurrence."""
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.ids = []                         # slot -> debate ID, None once deleted
+        self.lengths = array("f")             # slot -> weighted term count
+        self.slots = {}                       # debate ID -> slot
+        self.postings = defaultdict(dict)     # term -> {slot: weighted term frequency}
+        self.total_length = 0.0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def add(self, debate_id: str, fields: dict):
+        if debate_id in self.slots:
+            return
+        weighted = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in terms(fields.get(field)):
+                weighted[term] += weight
+        slot = len(self.ids)
+        length = float(sum(weighted.values()))
+        self.ids.append(debate_id)
+        self.lengths.append(length)
+        self.slots[debate_id] = slot
+        self.total_length += length
+        for term, tf in weighted.items():
+            self.postings[term][slot] = tf
+
+    def remove(self, debate_id: str):
+        # The slot's postings stay behind and are skipped; deletes are rare
+        slot = self.slots.pop(debate_id, None)
+        if slot is not None:
+            self.ids[slot] = None
+            self.total_length -= self.lengths[slot]
+
+    def search(self, query_terms, limit: int) -> list:
+        """The top `limit` (debate ID, score) pairs, best first."""
+        n = len(self.slots)
+        if not n:
+            return []
+        avg_length = self.total_length / n or 1.0
+        k1, b = self.K1, self.B
+        norms = [k1 * (1 - b + b * length / avg_length) for length in self.lengths]
+        scores = {}
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5)) * (k1 + 1)
+            for slot, tf in postings.items():
+                scores[slot] = scores.get(slot, 0.0) + idf * tf / (tf + norms[slot])
+        top = heapq.nlargest(limit, ((score, slot) for slot, score in scores.items() if self.ids[slot] is not None))
+        return [(self.ids[slot], score) for score, slot in top]
+
+# ─── Search service ──────────────────────────────────────────────────────────
+
+class DebateSearch:
+    def __init__(self, backend=SEARCH_BACKEND, max_users=LOCAL_INDEX_USERS):
+        self.backend = backend
+        self.max_users = max_users
+        self._indexes = OrderedDict()   # user_id -> LocalSearchIndex, most recently used last
+        self._loading = {}              # user_id -> future of the index being built
+        self.stats = {"searches": 0, "local_builds": 0}
+        self._ready = None
+
+    def start(self):
+        """Run setup() in the background; searches that arrive first wait for it."""
+        self._ready = asyncio.ensure_future(self.setup())
+
+    async def setup(self):
+        """Build the text index, or settle on the local backend if that isn't possible."""
+        if self.backend == "local":
+            return
+        from database import ensure_text_index
+        if await ensure_text_index(FIELD_PATHS, FIELD_WEIGHTS):
+            self.backend = "mongo"
+        else:
+            self.use_local("the text index could not be built")
+
+    def use_local(self, reason):
+        if self.backend != "local":
+            print(f"⚠️ Debate search falls back to the local index: {reason}")
+        self.backend = "local"
+
+    async def search(self, user_id: str, query: str, limit: int = 20, offset: int = 0) -> dict:
+        """One page of the user's debates matching query, best first, each with a snippet."""
+        if self._ready is not None:
+            await asyncio.shield(self._ready)
+        query_terms = terms(query)
+        self.stats["searches"] += 1
+        if not query_terms:
+            return {"results": [], "next_offset": None, "backend": self.backend}
+
+        docs = None
+        if self.backend == "mongo":
+            from database import text_search_debates, is_text_index_error
+            try:
+                docs = await text_search_debates(user_id, query, offset, limit + 1, list(FIELD_PATHS.values()))
+            except Exception as e:
+                if not is_text_index_error(e):
+                    raise
+                self.use_local(e)
+        if docs is None:
+            from database import get_debates_for_search
+            index = await self._index_for(user_id)
+            ranked = index.search(query_terms, offset + limit + 1)[offset:]
+            found = await get_debates_for_search(user_id, [debate_id for debate_id, _ in ranked],
+                                                 list(FIELD_PATHS.values()))
+            docs = []
+            for debate_id, score in ranked:
+                if debate_id in found:
+                    docs.append({**found[debate_id], "score": score})
+
+        page = docs[:limit]
+        return {
+            "results": [{
+                "_id": str(doc["_id"]),
+                "topic": doc["topic"],
+                "model": doc.get("model"),
+                "created_at": doc["created_at"].isoformat(),
+                "verdict": doc.get("verdict"),
+                "score": round(doc["score"], 3),
+                "snippet": snippet(document_fields(doc), query_terms),
+            } for doc in page],
+            "next_offset": offset + limit if len(docs) > limit else None,
+            "backend": self.backend,
+        }
+
+    def add(self, user_id: str, debate_id: str, doc: dict):
+        """Index a just-saved debate, if the user's local index is loaded."""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add(debate_id, document_fields(doc))
+
+    def remove(self, user_id: str, debate_id: str):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(debate_id)
+
+    def snapshot(self):
+        return {**self.stats, "backend": self.backend, "local_indexes": len(self._indexes),
+                "local_debates": sum(len(index) for index in self._indexes.values())}
+
+    async def _index_for(self, user_id):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+            return index
+        # Concurrent searches by the same user share one build
+        loading = self._loading.get(user_id)
+        if loading is None:
+            loading = self._loading[user_id] = asyncio.ensure_future(self._build(user_id))
+            loading.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        return await asyncio.shield(loading)
+
+    async def _build(self, user_id):
+        from database import user_debates_for_search
+        index = LocalSearchIndex()
+        async for doc in user_debates_for_search(user_id, list(FIELD_PATHS.values())):
+            index.add(str(doc["_id"]), document_fields(doc))
+            if len(index) % 200 == 0:
+                await asyncio.sleep(0)   # let other requests through while a long history loads
+        self._indexes[user_id] = index
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+        self.stats["local_builds"] += 1
+        return index
+
+debate_search = DebateSearch()
@@ -46,86 +46,163 @@ function closeHistory() {
 }
 
 // ─── History Cache ────────────────────────────────────────────────────────────
-// Keyed by debate _id. Rebuilt fresh on every loadHistory() call.
+// Keyed by debate _id. The list endpoint only returns slim summaries; full
+// results are fetched from /api/history/{id} the first time an item is opened.
 const _historyCache = {};
+let _historyCursor = null;     // list: opaque cursor; search: result offset
+let _historyQuery = '';        // non-empty while the list shows search results
+let _historyRequest = 0;       // newest loadHistory() call, so a slow older one can't overwrite it
+let _historySearchTimer = null;
+
+const _LOAD_MORE_HTML = '<button id="historyLoadMore" onclick="loadMoreHistory()" style="width:100%; background:rgba(255,255,255,0.05); border:1px solid rgba(255,255,255,0.1); border-radius:12px; color:rgba(255,255,255,0.7); padding:10px; cursor:pointer; font-size:13px;">Load more</button>';
+
+function _historyItemHTML(debate) {
+    const debateId = debate._id;
+    const date = new Date(debate.created_at);
+    const dateStr = date.toLocaleDateString('en-US', { month: 'short', day: 'numeric', year: 'numeric' });
+    const timeStr = date.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' });
+
+    // The server extracts the verdict side once, when the debate is saved
+    let winnerBadge = '';
+    if (debate.verdict === 'AGAINST') {
+        winnerBadge = '<span style="background:rgba(239,68,68,0.2); border:1px solid rgba(239,68,68,0.4); border-radius:6px; padding:2px 8px; font-size:11px; color:#fca5a5;">&#127942; AGAINST wins</span>';
+    } else if (debate.verdict === 'FOR') {
+        winnerBadge = '<span style="background:rgba(34,197,94,0.2); border:1px solid rgba(34,197,94,0.4); border-radius:6px; padding:2px 8px; font-size:11px; color:#86efac;">&#127942; FOR wins</span>';
+    }
+
+    // Use data-debate-id attribute — no inline onclick strings with IDs
+    return `
+    <div class="history-item" id="hist-${debateId}" data-debate-id="${debateId}"
+        style="background:rgba(255,255,255,0.05); border:1px solid rgba(255,255,255,0.08); border-radius:14px; padding:16px; margin-bottom:12px; transition:all 0.2s; cursor:pointer;">
+        <div style="display:flex; align-items:flex-start; justify-content:space-between; gap:8px; margin-bottom:8px;">
+            <p style="color:white; font-size:14px; font-weight:600; line-height:1.4; flex:1; margin:0;">
+                ${escapeHtml(debate.topic)}
+            </p>
+            <div style="display:flex;align-items:center;gap:6px;flex-shrink:0;">
+                ${winnerBadge}
+                <button class="delete-btn" data-delete-id="${debateId}"
+                    title="Delete this debate"
+                    style="background:rgba(239,68,68,0.1);border:1px solid rgba(239,68,68,0.3);border-radius:7px;color:#fca5a5;width:28px;height:28px;display:flex;align-items:center;justify-content:center;cursor:pointer;font-size:11px;transition:all 0.15s;flex-shrink:0;"
+                    onmouseover="this.style.background='rgba(239,68,68,0.25)'"
+                    onmouseout="this.style.background='rgba(239,68,68,0.1)'">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </div>
+        </div>
+        <div style="display:flex; align-items:center; gap:10px; flex-wrap:wrap;">
+            <span style="color:rgba(255,255,255,0.4); font-size:11px;"><i class="fas fa-robot" style="margin-right:4px;"></i>${escapeHtml(debate.model)}</span>
+            <span style="color:rgba(255,255,255,0.3); font-size:11px;">•</span>
+            <span style="color:rgba(255,255,255,0.4); font-size:11px;"><i class="fas fa-calendar" style="margin-right:4px;"></i>${dateStr} at ${timeStr}</span>
+        </div>
+        ${_snippetHTML(debate.snippet)}
+    </div>`;
+}
+
+function _snippetHTML(snippet) {
+    // Search results only: the matching passage, with the matched words marked
+    if (!snippet || !snippet.text) return '';
+    let html = '';
+    let pos = 0;
+    for (const [start, end] of snippet.highlights) {
+        html += escapeHtml(snippet.text.slice(pos, start))
+            + '<mark style="background:rgba(245,158,11,0.3); color:#fde68a; border-radius:3px; padding:0 2px;">'
+            + escapeHtml(snippet.text.slice(start, end)) + '</mark>';
+        pos = end;
+    }
+    html += escapeHtml(snippet.text.slice(pos));
+    return `<p style="color:rgba(255,255,255,0.55); font-size:12px; line-height:1.5; margin:8px 0 0;">${html}</p>`;
+}
+
+function onHistorySearchInput(value) {
+    clearTimeout(_historySearchTimer);
+    _historySearchTimer = setTimeout(() => {
+        const query = value.trim();
+        if (query === _historyQuery) return;
+        _historyQuery = query;
+        loadHistory();
+    }, 250);
+}
+
+async function _fetchHistoryPage(cursor) {
+    const url = _historyQuery
+        ? '/api/history/search?limit=20&q=' + encodeURIComponent(_historyQuery) + (cursor ? '&offset=' + cursor : '')
+        : '/api/history?limit=20' + (cursor ? '&cursor=' + encodeURIComponent(cursor) : '');
+    const res = await fetch(url);
+    if (res.status === 401) { logout(); return null; }
+    const data = await res.json();
+    // Search pages by offset, ranked; the plain list by cursor, newest first
+    return _historyQuery ? { debates: data.results, next_cursor: data.next_offset } : data;
+}
 
 async function loadHistory() {
     const listEl = document.getElementById('historyList');
+    const request = ++_historyRequest;
     listEl.innerHTML = '<div style="text-align:center; color:rgba(255,255,255,0.4); padding:40px 0;"><i class="fas fa-spinner fa-spin" style="font-size:24px;"></i><p style="margin-top:12px;">Loading...</p></div>';
 
     try {
-        const res = await fetch('/api/history');
-        if (res.status === 401) { logout(); return; }
-        const data = await res.json();
+        const data = await _fetchHistoryPage(null);
+        if (!data || request !== _historyRequest) return;
 
         if (!data.debates || data.debates.length === 0) {
-            listEl.innerHTML = '<div style="text-align:center; color:rgba(255,255,255,0.4); padding:40px 0;"><i class="fas fa-comments" style="font-size:36px; margin-bottom:12px; display:block;"></i><p>No debates yet. Start your first one!</p></div>';
+            listEl.innerHTML = _historyQuery
+                ? '<div style="text-align:center; color:rgba(255,255,255,0.4); padding:40px 0;"><i class="fas fa-search" style="font-size:36px; margin-bottom:12px; display:block;"></i><p>No debates match your search.</p></div>'
+                : '<div style="text-align:center; color:rgba(255,255,255,0.4); padding:40px 0;"><i class="fas fa-comments" style="font-size:36px; margin-bottom:12px; display:block;"></i><p>No debates yet. Start your first one!</p></div>';
             return;
         }
 
         // Clear stale cache before repopulating
         Object.keys(_historyCache).forEach(k => delete _historyCache[k]);
+        _historyCursor = data.next_cursor;
 
-        listEl.innerHTML = data.debates.map(debate => {
-            const debateId = debate._id;
-            // Store a deep copy so external globals can never corrupt cached data
-            _historyCache[debateId] = JSON.parse(JSON.stringify(debate));
-
-            const date = new Date(debate.created_at);
-            const dateStr = date.toLocaleDateString('en-US', { month: 'short', day: 'numeric', year: 'numeric' });
-            const timeStr = date.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' });
-
-            let winnerBadge = '';
-            const summary = debate.results?.summary || '';
-            // Match the VERDICT line (case-insensitive label, but check winner word as whole word)
-            const verdictLineMatch = summary.match(/verdict\s*:\s*([^\n]+)/i);
-            if (verdictLineMatch) {
-                const verdictLine = verdictLineMatch[1];
-                // Use word boundaries so "for" doesn't match "therefore", "before", etc.
-                if (/\bAGAINST\b/i.test(verdictLine)) {
-                    winnerBadge = '<span style="background:rgba(239,68,68,0.2); border:1px solid rgba(239,68,68,0.4); border-radius:6px; padding:2px 8px; font-size:11px; color:#fca5a5;">&#127942; AGAINST wins</span>';
-                } else if (/\bFOR\b/i.test(verdictLine)) {
-                    winnerBadge = '<span style="background:rgba(34,197,94,0.2); border:1px solid rgba(34,197,94,0.4); border-radius:6px; padding:2px 8px; font-size:11px; color:#86efac;">&#127942; FOR wins</span>';
-                }
-            }
-
-            // Use data-debate-id attribute — no inline onclick strings with IDs
-            return `
-            <div class="history-item" id="hist-${debateId}" data-debate-id="${debateId}"
-                style="background:rgba(255,255,255,0.05); border:1px solid rgba(255,255,255,0.08); border-radius:14px; padding:16px; margin-bottom:12px; transition:all 0.2s; cursor:pointer;">
-                <div style="display:flex; align-items:flex-start; justify-content:space-between; gap:8px; margin-bottom:8px;">
-                    <p style="color:white; font-size:14px; font-weight:600; line-height:1.4; flex:1; margin:0;">
-                        ${escapeHtml(debate.topic)}
-                    </p>
-                    <div style="display:flex;align-items:center;gap:6px;flex-shrink:0;">
-                        ${winnerBadge}
-                        <button class="delete-btn" data-delete-id="${debateId}"
-                            title="Delete this debate"
-                            style="background:rgba(239,68,68,0.1);border:1px solid rgba(239,68,68,0.3);border-radius:7px;color:#fca5a5;width:28px;height:28px;display:flex;align-items:center;justify-content:center;cursor:pointer;font-size:11px;transition:all 0.15s;flex-shrink:0;"
-                            onmouseover="this.style.background='rgba(239,68,68,0.25)'"
-                            onmouseout="this.style.background='rgba(239,68,68,0.1)'">
-                            <i class="fas fa-trash"></i>
-                        </button>
-                    </div>
-                </div>
-                <div style="display:flex; align-items:center; gap:10px; flex-wrap:wrap;">
-                    <span style="color:rgba(255,255,255,0.4); font-size:11px;"><i class="fas fa-robot" style="margin-right:4px;"></i>${escapeHtml(debate.model)}</span>
-                    <span style="color:rgba(255,255,255,0.3); font-size:11px;">•</span>
-                    <span style="color:rgba(255,255,255,0.4); font-size:11px;"><i class="fas fa-calendar" style="margin-right:4px;"></i>${dateStr} at ${timeStr}</span>
-                </div>
-            </div>`;
-        }).join('');
+        listEl.innerHTML = data.debates.map(_historyItemHTML).join('') + (_historyCursor ? _LOAD_MORE_HTML : '');
 
         // Event delegation — one listener handles all items safely
         listEl.removeEventListener('click', _historyListClickHandler);
         listEl.addEventListener('click', _historyListClickHandler);
 
     } catch (e) {
+        if (request !== _historyRequest) return;
         console.error('loadHistory error:', e);
         listEl.innerHTML = '<div style="text-align:center; color:#fca5a5; padding:40px 0;"><i class="fas fa-exclamation-triangle" style="font-size:24px; margin-bottom:12px; display:block;"></i><p>Failed to load history</p></div>';
     }
 }
 
+async function loadMoreHistory() {
+    const button = document.getElementById('historyLoadMore');
+    if (!_historyCursor || !button) return;
+    button.disabled = true;
+    button.textContent = 'Loading...';
+
+    const request = _historyRequest;
+    try {
+        const data = await _fetchHistoryPage(_historyCursor);
+        if (!data || request !== _historyRequest) return;
+        _historyCursor = data.next_cursor;
+        button.insertAdjacentHTML('beforebegin', (data.debates || []).map(_historyItemHTML).join(''));
+        if (_historyCursor) {
+            button.disabled = false;
+            button.textContent = 'Load more';
+        } else {
+            button.remove();
+        }
+    } catch (e) {
+        console.error('loadMoreHistory error:', e);
+        button.disabled = false;
+        button.textContent = 'Load more';
+    }
+}
+
+async function _fetchDebate(debateId) {
+    if (_historyCache[debateId]) return _historyCache[debateId];
+    const res = await fetch(`/api/history/${debateId}`);
+    if (res.status === 401) { logout(); return null; }
+    if (!res.ok) return null;
+    const data = await res.json();
+    // Store a deep copy so external globals can never corrupt cached data
+    _historyCache[debateId] = JSON.parse(JSON.stringify(data.debate));
+    return _historyCache[debateId];
+}
+
 // ─── Event delegation handler for history list ────────────────────────────────
 function _historyListClickHandler(e) {
     // Delete button takes priority
@@ -140,12 +217,13 @@ function _historyListClickHandler(e) {
     const item = e.target.closest('.history-item');
     if (item) {
         const id = item.getAttribute('data-debate-id');
-        const debate = _historyCache[id];
-        if (debate) {
-            loadDebateFromHistory(debate);
-        } else {
-            console.error('No cached debate for id:', id);
-        }
+        _fetchDebate(id).then(debate => {
+            if (debate) {
+                loadDebateFromHistory(debate);
+            } else {
+                console.error('Could not load debate:', id);
+            }
+        });
     }
 }
 
@@ -223,9 +301,9 @@ function loadDebateFromHistory(debate) {
     if (debateResultsEl) {
         debateResultsEl.style.display = 'block';
         if (typeof formatSideBySideResults === 'function') {
-            debateResultsEl.innerHTML = formatSideBySideResults(debate.results);
+            debateResultsEl.innerHTML = formatSideBySideResults(debate.results, debate.structured);
         } else {
-            debateResultsEl.innerHTML = _renderDebateHTML(debate.results);
+            debateResultsEl.innerHTML = _renderDebateHTML(debate.results, debate.structured);
         }
     }
 
@@ -266,7 +344,7 @@ function loadDebateFromHistory(debate) {
 })();
 
 // ─── Self-contained debate HTML renderer ─────────────────────────────────────
-// Mirrors script.js formatSideBySideResults + formatText exactly.
+// Mirrors script.js formatSideBySideResults + formatArguments/formatVerdict exactly.
 function _fmtText(text) {
     if (!text) return '';
     return String(text)
@@ -278,7 +356,39 @@ function _fmtText(text) {
         .replace(/\*(.*?)\*/g, '<em>$1</em>');
 }
 
-function _renderDebateHTML(results) {
+const _JUDGE_SECTIONS = {
+    verdict: 'Verdict', reasoning: 'Reasoning', key_strengths: 'Key Strengths',
+    weaknesses: 'Weaknesses', final_recommendation: 'Final Recommendation'
+};
+
+function _argumentList(args) {
+    const items = args.map(arg => `<li>${_fmtText(arg)}</li>`).join('');
+    return `<ol class="argument-list" data-arguments="${args.length}">${items}</ol>`;
+}
+
+function _fmtArguments(side, text, structured) {
+    const rounds = structured && structured.rounds;
+    if (rounds && rounds.length) {
+        if (rounds.some(r => !r[side] || !r[side].arguments || !r[side].arguments.length)) return _fmtText(text);
+        return rounds.map(r => `<h4 class="round-heading">Round ${r.round} — ${r.round === 1 ? 'Opening' : 'Rebuttal'}</h4>`
+            + _argumentList(r[side].arguments)).join('');
+    }
+    const parsed = structured && structured[side];
+    if (!parsed || !parsed.arguments || !parsed.arguments.length) return _fmtText(text);
+    return _argumentList(parsed.arguments);
+}
+
+function _fmtVerdict(text, structured) {
+    const judge = structured && structured.judge;
+    if (!judge || !judge.sections || (judge.missing && judge.missing.length)) return _fmtText(text);
+    return Object.entries(_JUDGE_SECTIONS)
+        .map(([name, label]) => `<p><strong>${label}:</strong> ${_fmtText(judge.sections[name])}</p>`)
+        .join('');
+}
+
+function _renderDebateHTML(results, structured) {
+    const judge = structured && structured.judge;
+    const verdictAttrs = judge && judge.side ? ` data-verdict="${judge.side}" data-margin="${judge.margin || 'moderate'}"` : '';
     const forArgs     = results.for_arguments     || '';
     const againstArgs = results.against_arguments || '';
     const summary     = results.summary           || '';
@@ -290,22 +400,22 @@ function _renderDebateHTML(results) {
                         <div class="argument-icon"><i class="fas fa-thumbs-up"></i></div>
                         <h3>Arguments For</h3>
                     </div>
-                    <div class="argument-content">${_fmtText(forArgs)}</div>
+                    <div class="argument-content">${_fmtArguments('for', forArgs, structured)}</div>
                 </div>
                 <div class="argument-column against-column">
                     <div class="argument-header against-header">
                         <div class="argument-icon"><i class="fas fa-thumbs-down"></i></div>
                         <h3>Arguments Against</h3>
                     </div>
-                    <div class="argument-content">${_fmtText(againstArgs)}</div>
+                    <div class="argument-content">${_fmtArguments('against', againstArgs, structured)}</div>
                 </div>
             </div>
-            <div class="summary-section">
+            <div class="summary-section"${verdictAttrs}>
                 <div class="summary-header">
                     <div class="summary-icon"><i class="fas fa-balance-scale"></i></div>
                     <h3>Conclusion &amp; Analysis</h3>
                 </div>
-                <div class="summary-content">${_fmtText(summary)}</div>
+                <div class="summary-content">${_fmtVerdict(summary, structured)}</div>
             </div>
         </div>`;
 }
@@ -218,11 +218,16 @@ class LiveDebateMode {
     
     async streamDebate(topic, modelChoice) {
         try {
+            // Aborting the request tells the server to cancel the remaining agent calls
+            this.abortController = new AbortController();
+            window.currentDebateData = null;
+            this.totalRounds = (window.debateConfig && window.debateConfig.rounds) || 1;
+            
             // Store the promise so stop button can wait for it
             this.debatePromise = (async () => {
-                // Make actual API call to backend
-                const response = await fetch('/api/debate', {
+                const response = await fetch('/api/debate/stream', {
                     method: 'POST',
+                    signal: this.abortController.signal,
                     headers: {
                         'Content-Type': 'application/json',
                     },
@@ -232,21 +237,53 @@ class LiveDebateMode {
                         depth: (window.debateConfig && window.debateConfig.depth) || 'standard',
                         args_per_side: (window.debateConfig && window.debateConfig.args) || 4,
                         tone: (window.debateConfig && window.debateConfig.tone) || 'balanced',
-                        focus: (window.debateConfig && window.debateConfig.focus) || 'general'
+                        focus: (window.debateConfig && window.debateConfig.focus) || 'general',
+                        rounds: this.totalRounds,
+                        reuse_similar: !!(window.debateConfig && window.debateConfig.reuseSimilar)
                     })
                 });
                 
                 if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
+                    throw responseError(response);
                 }
                 
-                const result = await response.json();
+                this.showThinking('for');
+                this.showThinking('against');
+                
+                // Rounds so far, so a rebuttal streams in below the earlier rounds
+                this.completedRounds = [];
                 
-                if (result.status === 'success' && result.data && result.data.results) {
-                    // Stream the actual results
-                    await this.streamRealResults(result.data.results);
-                } else {
-                    throw new Error('Invalid response format');
+                let result = null;
+                await this.readEvents(response, (event) => {
+                    if (event.type === 'token') {
+                        this.appendToken(event.agent, event.content);
+                    } else if (event.type === 'reset') {
+                        // That model failed mid-answer; a fallback model starts over
+                        this.agentElements(event.agent).textEl.textContent = this.roundPrefix(event.agent, event.round);
+                        this.showThinking(event.agent);
+                    } else if (event.type === 'repairing') {
+                        // The side came back short; its missing arguments are being added
+                        this.agentElements(event.agent).statusEl.textContent = `Adding ${event.missing} missing argument${event.missing === 1 ? '' : 's'}...`;
+                    } else if (event.type === 'agent_complete') {
+                        this.completeAgent(event.agent, this.roundPrefix(event.agent, event.round) + event.content, event.round);
+                    } else if (event.type === 'round_complete') {
+                        this.completedRounds.push(event);
+                    } else if (event.type === 'round_start') {
+                        this.startRound(event.round);
+                    } else if (event.type === 'queued') {
+                        this.showQueued(event.estimated_wait);
+                    } else if (event.type === 'admitted') {
+                        this.showThinking('for');
+                        this.showThinking('against');
+                    } else if (event.type === 'debate_complete') {
+                        result = event;
+                    } else if (event.type === 'error') {
+                        throw new Error(event.message);
+                    }
+                });
+                
+                if (!result || !result.data) {
+                    throw new Error('Debate stream ended before the verdict');
                 }
                 
                 // Store results for export
@@ -261,85 +298,118 @@ class LiveDebateMode {
             this.completeLiveDebate();
             
         } catch (error) {
+            // Stopped by the user: stopLive() takes care of the UI
+            if (error.name === 'AbortError') return;
             console.error('Stream debate error:', error);
             throw error;
         } finally {
             this.debatePromise = null;
+            this.abortController = null;
         }
     }
     
-    async streamRealResults(results) {
-        // Phase 1: Stream FOR arguments
-        if (results.for_arguments) {
-            await this.streamAgentText('for', results.for_arguments);
+    async readEvents(response, onEvent) {
+        // Minimal SSE reader: frames are "data: <json>" separated by a blank line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const data = frame.split('\n')
+                    .filter(line => line.startsWith('data:'))
+                    .map(line => line.slice(5).trimStart())
+                    .join('\n');
+                if (data) onEvent(JSON.parse(data));
+            }
         }
-        
-        // Phase 2: Stream AGAINST arguments
-        if (results.against_arguments) {
-            await this.streamAgentText('against', results.against_arguments);
+    }
+    
+    agentElements(agent) {
+        if (agent === 'judge') {
+            document.getElementById('judgePanel').style.display = 'block';
         }
-        
-        // Phase 3: Stream Judge verdict
-        if (results.summary) {
-            await this.streamJudgeText(results.summary);
+        const outputEl = document.getElementById(`${agent}Output`);
+        return {
+            statusEl: document.getElementById(`${agent}Status`),
+            textEl: document.getElementById(`${agent}Text`),
+            typingIndicator: outputEl ? outputEl.querySelector('.typing-indicator') : null,
+            statusClass: agent === 'judge' ? 'judge-status' : 'agent-status'
+        };
+    }
+    
+    showThinking(agent) {
+        const { statusEl, typingIndicator, statusClass } = this.agentElements(agent);
+        statusEl.textContent = agent === 'judge' ? 'Analyzing arguments...' : 'Thinking...';
+        statusEl.className = `${statusClass} ${agent === 'judge' ? 'analyzing' : 'thinking'}`;
+        if (typingIndicator) typingIndicator.style.display = 'flex';
+    }
+    
+    showQueued(estimatedWait) {
+        // The model is at its rate limit; the debate starts once the scheduler admits it
+        for (const agent of ['for', 'against']) {
+            const { statusEl } = this.agentElements(agent);
+            statusEl.textContent = `Waiting for the model (~${Math.ceil(estimatedWait)}s)...`;
         }
     }
     
-    async streamAgentText(type, text) {
-        const statusEl = document.getElementById(`${type}Status`);
-        const textEl = document.getElementById(`${type}Text`);
-        const outputEl = document.getElementById(`${type}Output`);
-        const typingIndicator = outputEl.querySelector('.typing-indicator');
-        
-        // Show thinking
-        statusEl.textContent = 'Thinking...';
-        statusEl.className = 'agent-status thinking';
-        typingIndicator.style.display = 'flex';
-        
-        await this.delay(800);
-        
-        // Start speaking
-        statusEl.textContent = 'Speaking...';
-        statusEl.className = 'agent-status speaking';
-        typingIndicator.style.display = 'none';
-        
-        // Stream the actual text
-        await this.typeText(textEl, text, 20);
-        
-        // Complete
-        statusEl.textContent = 'Complete';
-        statusEl.className = 'agent-status complete';
-        
-        await this.delay(500);
+    appendToken(agent, text) {
+        if (!this.isSpeaking) return; // Stopped by the user
+        const { statusEl, textEl, typingIndicator, statusClass } = this.agentElements(agent);
+        if (!statusEl.classList.contains('speaking')) {
+            statusEl.textContent = agent === 'judge' ? 'Delivering verdict...' : 'Speaking...';
+            statusEl.className = `${statusClass} speaking`;
+            if (typingIndicator) typingIndicator.style.display = 'none';
+        }
+        textEl.textContent += text;
+        textEl.scrollTop = textEl.scrollHeight;
     }
     
-    async streamJudgeText(text) {
-        const judgePanel = document.getElementById('judgePanel');
-        judgePanel.style.display = 'block';
-        
-        const statusEl = document.getElementById('judgeStatus');
-        const textEl = document.getElementById('judgeText');
-        const outputEl = document.getElementById('judgeOutput');
-        const typingIndicator = outputEl.querySelector('.typing-indicator');
-        
-        // Show analyzing
-        statusEl.textContent = 'Analyzing arguments...';
-        statusEl.className = 'judge-status analyzing';
-        typingIndicator.style.display = 'flex';
-        
-        await this.delay(1500);
-        
-        // Start delivering verdict
-        statusEl.textContent = 'Delivering verdict...';
-        statusEl.className = 'judge-status speaking';
-        typingIndicator.style.display = 'none';
-        
-        // Stream the actual verdict
-        await this.typeText(textEl, text, 25);
-        
-        // Complete
+    roundPrefix(agent, round) {
+        // Earlier rounds plus this round's heading; empty for a single-round debate
+        if (!round || agent === 'judge') return '';
+        const earlier = this.completedRounds
+            .filter(r => r.round < round)
+            .map(r => `${this.roundHeading(r.round)}\n${r[agent]}\n\n`)
+            .join('');
+        return `${earlier}${this.roundHeading(round)}\n`;
+    }
+    
+    roundHeading(round) {
+        return `Round ${round} — ${round === 1 ? 'Opening' : 'Rebuttal'}`;
+    }
+    
+    startRound(round) {
+        for (const agent of ['for', 'against']) {
+            const { statusEl, textEl } = this.agentElements(agent);
+            textEl.textContent = this.roundPrefix(agent, round);
+            textEl.scrollTop = textEl.scrollHeight;
+            this.showThinking(agent);
+            statusEl.textContent = `Round ${round} of ${this.totalRounds}: thinking...`;
+        }
+    }
+    
+    completeAgent(agent, fullText, round) {
+        const { statusEl, textEl, typingIndicator, statusClass } = this.agentElements(agent);
+        // The final answer is authoritative; it also covers models that don't stream
+        textEl.textContent = fullText;
         statusEl.textContent = 'Complete';
-        statusEl.className = 'judge-status complete';
+        statusEl.className = `${statusClass} complete`;
+        if (typingIndicator) typingIndicator.style.display = 'none';
+        
+        const forDone = document.getElementById('forStatus').classList.contains('complete');
+        const againstDone = document.getElementById('againstStatus').classList.contains('complete');
+        const lastRound = (round || 1) >= this.totalRounds;
+        if (agent !== 'judge' && forDone && againstDone && lastRound) {
+            this.showThinking('judge');
+        }
     }
     
     async typeText(element, text, speed = 10) {
@@ -436,13 +506,14 @@ class LiveDebateMode {
         this.stopTimer();
         this.stopSpeaking();
         
-        // If debate is still running, wait for completion
+        // If debate is still running, cancel it and keep what has arrived so far
         if (this.debatePromise) {
-            this.showNotification('Waiting for debate to complete...', 'info');
+            this.showNotification('Stopping debate...', 'info');
+            if (this.abortController) this.abortController.abort();
             try {
                 await this.debatePromise;
             } catch (error) {
-                console.error('Error waiting for debate:', error);
+                if (error.name !== 'AbortError') console.error('Error stopping debate:', error);
             }
         }
         
@@ -518,11 +589,18 @@ class LiveDebateMode {
         const forText = document.getElementById('forText')?.textContent || '';
         const againstText = document.getElementById('againstText')?.textContent || '';
         const judgeText = document.getElementById('judgeText')?.textContent || '';
+        // Parsed by the server when the debate was saved (debate_complete)
+        const structured = (window.currentDebateData && window.currentDebateData.structured) || null;
+        const judge = structured && structured.judge;
+        const verdictAttrs = judge && judge.side ? ` data-verdict="${judge.side}" data-margin="${judge.margin || 'moderate'}"` : '';
         
         // Format text with line breaks
         const formatText = (text) => {
             return text.replace(/\n/g, '<br>').replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>');
         };
+        // Server-parsed arguments and verdict sections (script.js) when present, the panel text otherwise
+        const formatSide = (side, text) => typeof formatArguments === 'function' ? formatArguments(side, text, structured) : formatText(text);
+        const formatJudge = (text) => typeof formatVerdict === 'function' ? formatVerdict(text, structured) : formatText(text);
         
         // Create the full structure that matches normal debate results
         debateResults.innerHTML = `
@@ -536,7 +614,7 @@ class LiveDebateMode {
                             <h3>Arguments For</h3>
                         </div>
                         <div class="argument-content">
-                            ${formatText(forText)}
+                            ${formatSide('for', forText)}
                         </div>
                     </div>
                     
@@ -548,12 +626,12 @@ class LiveDebateMode {
                             <h3>Arguments Against</h3>
                         </div>
                         <div class="argument-content">
-                            ${formatText(againstText)}
+                            ${formatSide('against', againstText)}
                         </div>
                     </div>
                 </div>
                 
-                <div class="summary-section">
+                <div class="summary-section"${verdictAttrs}>
                     <div class="summary-header">
                         <div class="summary-icon">
                             <i class="fas fa-balance-scale"></i>
@@ -561,7 +639,7 @@ class LiveDebateMode {
                         <h3>Conclusion & Analysis</h3>
                     </div>
                     <div class="summary-content">
-                        ${formatText(judgeText)}
+                        ${formatJudge(judgeText)}
                     </div>
                 </div>
             </div>
@@ -569,11 +647,13 @@ class LiveDebateMode {
         
         // Store for export - set both window and global scope
         const debateData = {
+            debate_id: (window.currentDebateData && window.currentDebateData.debate_id) || null,
             results: {
                 for_arguments: forText,
                 against_arguments: againstText,
                 summary: judgeText
-            }
+            },
+            structured
         };
         
         window.currentDebateData = debateData;
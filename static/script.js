@@ -248,6 +248,11 @@ async function handleDebateSubmission(e) {
         return;
     }
     
+    // Offer a stored debate on a near-identical topic before paying for a new one
+    if (window.debateConfig) {
+        window.debateConfig.reuseSimilar = await offerSimilarDebate(topic);
+    }
+    
     cleanupBeforeDebate();
     
     // Check if live mode is enabled
@@ -288,6 +293,20 @@ async function handleDebateSubmission(e) {
     }
 }
 
+// Ask the server for a previous debate on (nearly) the same topic
+async function offerSimilarDebate(topic) {
+    try {
+        const res = await fetch('/api/topics/similar?topic=' + encodeURIComponent(topic));
+        if (!res.ok) return false;
+        const data = await res.json();
+        if (!data.match) return false;
+        return confirm(`A debate on a very similar topic already exists:\n\n"${data.match.topic}"\n\nShow that debate instead of running a new one?`);
+    } catch (error) {
+        console.warn('Similar topic lookup failed:', error);
+        return false;
+    }
+}
+
 // Add this function to capture debate context after live debate completes
 function setupFollowUpAfterLiveDebate(topic, modelChoice) {
     // Wait a bit for the DOM to be populated with debate results
@@ -360,12 +379,14 @@ async function startDebate(topic, modelChoice) {
                 depth: (window.debateConfig && window.debateConfig.depth) || 'standard',
                 args_per_side: (window.debateConfig && window.debateConfig.args) || 4,
                 tone: (window.debateConfig && window.debateConfig.tone) || 'balanced',
-                focus: (window.debateConfig && window.debateConfig.focus) || 'general'
+                focus: (window.debateConfig && window.debateConfig.focus) || 'general',
+                rounds: (window.debateConfig && window.debateConfig.rounds) || 1,
+                reuse_similar: !!(window.debateConfig && window.debateConfig.reuseSimilar)
             })
         });
         
         if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+            throw responseError(response);
         }
         
         const result = await response.json();
@@ -503,7 +524,7 @@ function displayDebateResults(data) {
     // Show results
     if (debateResults) {
         debateResults.style.display = 'block';
-        debateResults.innerHTML = formatSideBySideResults(data.results || data);
+        debateResults.innerHTML = formatSideBySideResults(data.results || data, data.structured);
     }
     
     // Show export section
@@ -563,8 +584,54 @@ ${data.results.summary || ''}
     }, 500);
 }
 
+// The server parses each debate once (verdict, margin, numbered arguments);
+// visualization.js reads the verdict from these attributes instead of guessing
+function verdictAttributes(structured) {
+    const judge = structured && structured.judge;
+    if (!judge || !judge.side) return '';
+    return ` data-verdict="${judge.side}" data-margin="${judge.margin || 'moderate'}"`;
+}
+
+// Headings of the judge's sections, in the order the server parses them
+const JUDGE_SECTIONS = {
+    verdict: 'Verdict',
+    reasoning: 'Reasoning',
+    key_strengths: 'Key Strengths',
+    weaknesses: 'Weaknesses',
+    final_recommendation: 'Final Recommendation'
+};
+
+function argumentList(args) {
+    const items = args.map(arg => `<li>${formatText(escapeHtml(arg))}</li>`).join('');
+    return `<ol class="argument-list" data-arguments="${args.length}">${items}</ol>`;
+}
+
+// One side's arguments as the server numbered them, round by round for a
+// multi-round debate (structured[side] is then only the openings); the raw
+// text when the debate predates structured results or a round has no arguments
+function formatArguments(side, text, structured) {
+    const rounds = structured && structured.rounds;
+    if (rounds && rounds.length) {
+        if (rounds.some(r => !r[side] || !r[side].arguments || !r[side].arguments.length)) return formatText(text);
+        return rounds.map(r => `<h4 class="round-heading">Round ${r.round} — ${r.round === 1 ? 'Opening' : 'Rebuttal'}</h4>`
+            + argumentList(r[side].arguments)).join('');
+    }
+    const parsed = structured && structured[side];
+    if (!parsed || !parsed.arguments || !parsed.arguments.length) return formatText(text);
+    return argumentList(parsed.arguments);
+}
+
+// The judge's labelled sections; the raw text if any of them is missing
+function formatVerdict(text, structured) {
+    const judge = structured && structured.judge;
+    if (!judge || !judge.sections || (judge.missing && judge.missing.length)) return formatText(text);
+    return Object.entries(JUDGE_SECTIONS)
+        .map(([name, label]) => `<p><strong>${label}:</strong> ${formatText(escapeHtml(judge.sections[name]))}</p>`)
+        .join('');
+}
+
 // Format debate results side by side
-function formatSideBySideResults(results) {
+function formatSideBySideResults(results, structured) {
     // Handle both new structured format and old format
     let forArguments = '';
     let againstArguments = '';
@@ -609,7 +676,7 @@ function formatSideBySideResults(results) {
                         <h3>Arguments For</h3>
                     </div>
                     <div class="argument-content">
-                        ${formatText(forArguments)}
+                        ${formatArguments('for', forArguments, structured)}
                     </div>
                 </div>
                 
@@ -621,12 +688,12 @@ function formatSideBySideResults(results) {
                         <h3>Arguments Against</h3>
                     </div>
                     <div class="argument-content">
-                        ${formatText(againstArguments)}
+                        ${formatArguments('against', againstArguments, structured)}
                     </div>
                 </div>
             </div>
             
-            <div class="summary-section">
+            <div class="summary-section"${verdictAttributes(structured)}>
                 <div class="summary-header">
                     <div class="summary-icon">
                         <i class="fas fa-balance-scale"></i>
@@ -634,7 +701,7 @@ function formatSideBySideResults(results) {
                     <h3>Conclusion & Analysis</h3>
                 </div>
                 <div class="summary-content">
-                    ${formatText(summary)}
+                    ${formatVerdict(summary, structured)}
                 </div>
             </div>
         </div>
@@ -986,6 +1053,15 @@ function closeModal(modalId) {
     }
 }
 
+// Turn a failed fetch response into an Error; 429 means the model's queue is full
+function responseError(response) {
+    if (response.status === 429) {
+        const retryAfter = response.headers.get('Retry-After');
+        return new Error(`The model is busy right now, please try again${retryAfter ? ` in ${retryAfter}s` : ' shortly'}`);
+    }
+    return new Error(`HTTP error! status: ${response.status}`);
+}
+
 // Notification functions
 function showError(message) {
     showNotification(message, 'error');
@@ -1157,13 +1233,22 @@ async function handleFollowUpQuestion(e) {
     const sendBtn = document.getElementById('followupBtn');
     sendBtn.disabled = true;
     
+    const debateData = window.currentDebateData || currentDebateData;
+    const debateId = debateData && debateData.debate_id;
+    
     try {
         const response = await fetch('/api/followup', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
+            // With a saved debate the server already holds the context, so only
+            // the question goes over the wire
+            body: JSON.stringify(debateId ? {
+                question: question,
+                debate_id: debateId,
+                model_choice: currentModelChoice
+            } : {
                 question: question,
                 debate_context: debateContext,
                 model_choice: currentModelChoice
@@ -1171,7 +1256,7 @@ async function handleFollowUpQuestion(e) {
         });
         
         if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+            throw responseError(response);
         }
         
         const result = await response.json();
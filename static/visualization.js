@@ -137,15 +137,21 @@ class DebateVisualization {
             toggleBtn.innerHTML = '<i class="fas fa-eye-slash"></i> Hide Visualization';
         }
         
-        // Analyze content
+        // Analyze content; argument counts come from the server's parse when the renderer listed them
         const analysis = {
-            for: this.analyzeText(forContent),
-            against: this.analyzeText(againstContent),
+            for: this.analyzeText(forContent, this.parsedArgumentCount('.for-column')),
+            against: this.analyzeText(againstContent, this.parsedArgumentCount('.against-column')),
             summary: this.analyzeText(summaryContent)
         };
         
+        // Verdict parsed by the server, when the renderer attached it
+        const summarySection = document.querySelector('.summary-section');
+        const parsedVerdict = summarySection && summarySection.dataset.verdict
+            ? { winner: summarySection.dataset.verdict, margin: summarySection.dataset.margin || 'moderate' }
+            : null;
+        
         // Generate visualizations
-        this.createStrengthChart(analysis, summaryContent);
+        this.createStrengthChart(analysis, summaryContent, parsedVerdict);
 
         this.createComparisonChart(analysis);
     }
@@ -197,7 +203,14 @@ class DebateVisualization {
         return { winner, margin };
     }
     
-    analyzeText(text) {
+    parsedArgumentCount(column) {
+        // One list per round in a multi-round debate
+        const lists = document.querySelectorAll(`${column} .argument-content [data-arguments]`);
+        if (!lists.length) return null;
+        return Array.from(lists).reduce((total, list) => total + parseInt(list.dataset.arguments, 10), 0);
+    }
+    
+    analyzeText(text, argumentCount = null) {
         const words = text.toLowerCase().split(/\s+/);
         const sentences = text.split(/[.!?]+/).filter(s => s.trim().length > 0);
         
@@ -215,6 +228,7 @@ class DebateVisualization {
         return {
             wordCount: words.length,
             sentenceCount: sentences.length,
+            argumentCount: argumentCount ?? sentences.length,
             avgWordsPerSentence: words.length / Math.max(sentences.length, 1),
             strongCount,
             weakCount,
@@ -226,7 +240,7 @@ class DebateVisualization {
         };
     }
     
-    createStrengthChart(analysis, summaryText) {
+    createStrengthChart(analysis, summaryText, parsedVerdict = null) {
         const canvas = document.getElementById('strengthChart');
         if (!canvas) return;
         
@@ -234,8 +248,8 @@ class DebateVisualization {
         canvas.width = canvas.offsetWidth;
         canvas.height = 350;
         
-        // Determine winner from verdict in summary
-        const verdict = this.extractVerdict(summaryText || '');
+        // Determine winner from verdict in summary; text heuristics only for debates the server didn't parse
+        const verdict = parsedVerdict || this.extractVerdict(summaryText || '');
         
         let forStrength, againstStrength, winner;
         if (verdict.winner === 'FOR') {
@@ -508,8 +522,8 @@ class DebateVisualization {
                 </div>
                 <div class="metric-row">
                     <span class="metric-label">Arguments</span>
-                    <span class="metric-for">${analysis.for.sentenceCount}</span>
-                    <span class="metric-against">${analysis.against.sentenceCount}</span>
+                    <span class="metric-for">${analysis.for.argumentCount}</span>
+                    <span class="metric-against">${analysis.against.argumentCount}</span>
                 </div>
                 <div class="metric-row">
                     <span class="metric-label">Avg Words/Sentence</span>
@@ -0,0 +1,152 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+try:
+    import brotli
+except ImportError:   # optional; without it only gzip variants are served
+    brotli = None
+
+# Pages and static files are read, rendered and compressed once at startup and
+# served from memory. Assets are linked from the pages by fingerprinted URLs
+# (static/script.3f2a9c01d4.js) that are cached for a year; the pages
+# themselves revalidate with an ETag, so a repeat visit costs a few 304s.
+
+FINGERPRINT_LEN  = 10
+MIN_COMPRESS     = 512      # bytes; smaller bodies aren't worth a Content-Encoding
+GZIP_LEVEL       = 9
+BROTLI_QUALITY   = 11
+
+# Each encoding is a different byte sequence, so it gets its own strong ETag
+ETAG_SUFFIX = {None: "", "gzip": "-gz", "br": "-br"}
+
+IMMUTABLE   = "public, max-age=31536000, immutable"
+REVALIDATE  = "no-cache"    # cache, but check the ETag every time
+
+# href="static/x.css" or src="/static/x.js?v=123" in the pages
+ASSET_REF = re.compile(r'(?P<attr>href|src)="(?P<slash>/?)static/(?P<path>[^"?#]+)(?:\?[^"#]*)?"')
+FINGERPRINTED = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./]+)$" % FINGERPRINT_LEN)
+
+
+@dataclass
+class Asset:
+    body: bytes
+    content_type: str
+    etag: str                                                  # of the identity body
+    encoded: Dict[str, bytes] = field(default_factory=dict)   # "br"/"gzip" -> compressed body
+
+    @classmethod
+    def build(cls, body: bytes, content_type: str) -> "Asset":
+        asset = cls(body, content_type, '"%s"' % hashlib.sha256(body).hexdigest()[:16])
+        if len(body) >= MIN_COMPRESS:
+            compressed = gzip.compress(body, GZIP_LEVEL, mtime=0)
+            if len(compressed) < len(body):
+                asset.encoded["gzip"] = compressed
+        return asset
+
+    def add_brotli(self):
+        if brotli is None or len(self.body) < MIN_COMPRESS or "br" in self.encoded:
+            return
+        compressed = brotli.compress(self.body, quality=BROTLI_QUALITY)
+        if len(compressed) < len(self.body):
+            self.encoded["br"] = compressed
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return self.etag[:-1] + ETAG_SUFFIX[encoding] + '"'
+
+    def pick(self, accept_encoding: str):
+        """(encoding or None, body) for the client's Accept-Encoding."""
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in self.encoded and encoding in accepted:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Proxies that re-encode weaken the tag (W/"..."); the content is the same
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+class StaticBundle:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.assets: Dict[str, Asset] = {}       # "script.js" -> Asset
+        self.fingerprints: Dict[str, str] = {}   # "script.js" -> "script.3f2a9c01d4.js"
+        self.pages: Dict[str, Asset] = {}
+        self._page_sources = {}                  # name -> (file, transform)
+        self._lock = threading.Lock()
+
+    def page(self, name: str, filename: str, transform: Optional[Callable[[str], str]] = None):
+        """Serve filename as page `name`, rendered through transform(html) at build time."""
+        self._page_sources[name] = (filename, transform)
+
+    def build(self):
+        """Read and gzip every file, then render the pages. Call again after MODELS or a file changes."""
+        assets, fingerprints = {}, {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                full = os.path.join(root, filename)
+                rel = os.path.relpath(full, self.directory).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    body = f.read()
+                content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+                    content_type += "; charset=utf-8"
+                assets[rel] = Asset.build(body, content_type)
+                stem, ext = os.path.splitext(rel)
+                fingerprints[rel] = f"{stem}.{hashlib.sha256(body).hexdigest()[:FINGERPRINT_LEN]}{ext}"
+
+        def link(match):
+            path = match.group("path")
+            target = fingerprints.get(path, path)
+            return f'{match.group("attr")}="{match.group("slash")}static/{target}"'
+
+        pages = {}
+        for name, (filename, transform) in self._page_sources.items():
+            html = assets[filename].body.decode("utf-8")
+            if transform is not None:
+                html = transform(html)
+            pages[name] = Asset.build(ASSET_REF.sub(link, html).encode("utf-8"), "text/html; charset=utf-8")
+
+        with self._lock:
+            self.assets, self.fingerprints, self.pages = assets, fingerprints, pages
+
+    def compress_brotli(self):
+        """Add brotli variants; slow at quality 11, so app.py runs it in a thread after startup."""
+        with self._lock:
+            targets = list(self.assets.values()) + list(self.pages.values())
+        for asset in targets:
+            asset.add_brotli()
+
+    def asset(self, path: str):
+        """(Asset, immutable) for a plain or fingerprinted static path; (None, False) if unknown."""
+        asset = self.assets.get(path)
+        if asset is not None:
+            return asset, False
+        match = FINGERPRINTED.match(path)
+        if match:
+            original = match.group("stem") + match.group("ext")
+            if self.fingerprints.get(original) == path:
+                return self.assets[original], True
+        return None, False
+
+    def respond(self, asset: Asset, headers, cache_control: str):
+        """(status, body, response headers) for a GET of asset with the request's headers."""
+        encoding, body = asset.pick(headers.get("accept-encoding", ""))
+        etag = asset.etag_for(encoding)
+        common = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if _etag_matches(headers.get("if-none-match", ""), etag):
+            return 304, b"", common
+        if encoding is not None:
+            common["Content-Encoding"] = encoding
+        return 200, body, {**common, "Content-Type": asset.content_type}
+
+
+static_bundle = StaticBundle(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
@@ -1,8 +1,11 @@
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
 from dotenv import load_dotenv
 load_dotenv()
 
-from crewai import Task
-from agents import agent_for, agent_against, summarizer
+from agents import build_agent
+from metrics import span
 
 TONE_INSTRUCTIONS = {
     "balanced":   "Use a measured, fair, and objective tone.",
@@ -26,93 +29,191 @@ DEPTH_INSTRUCTIONS = {
     "deep":     "Each argument should have a detailed claim, supporting evidence with examples or data, and a conclusion sentence.",
 }
 
-def debate_tasks(topic, llm, depth="standard", args_per_side=4, tone="balanced", focus="general"):
-    agent_for.llm = llm
-    agent_against.llm = llm
-    summarizer.llm = llm
-
-    tone_instr  = TONE_INSTRUCTIONS.get(tone, TONE_INSTRUCTIONS["balanced"])
-    focus_instr = FOCUS_INSTRUCTIONS.get(focus, FOCUS_INSTRUCTIONS["general"])
-    depth_instr = DEPTH_INSTRUCTIONS.get(depth, DEPTH_INSTRUCTIONS["standard"])
-    n = int(args_per_side)
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for English prompts on Llama-family tokenizers
+    return max(1, len(text) // 4)
 
-    # Build a numbered template so the LLM knows exactly what structure is required
-    for_template = "\n".join([f"{i}. [Argument {i} supporting the statement]" for i in range(1, n+1)])
-    against_template = "\n".join([f"{i}. [Counterargument {i} against the statement]" for i in range(1, n+1)])
+def retarget_task(task, kind, llm):
+    """The same task for agent kind ("for", "against", "judge"), run by a different model."""
+    from crewai import Task
+    return Task(description=task.description, expected_output=task.expected_output, agent=build_agent(kind, llm))
 
-    for_task = Task(
+def missing_arguments_task(task, kind, llm, arguments, expected):
+    """Ask for just the arguments a side is short of, given the ones it already wrote."""
+    from crewai import Task
+    have = len(arguments)
+    written = "\n".join(f"{i}. {text}" for i, text in enumerate(arguments, start=1)) or "(none)"
+    first = have + 1
+    return Task(
         description=(
-            f"You are arguing FOR the statement: '{topic}'\n\n"
-            f"STRICT RULES — YOU MUST FOLLOW THESE EXACTLY:\n"
-            f"- Write EXACTLY {n} numbered argument{'s' if n != 1 else ''}. No more, no less.\n"
-            f"- Number them 1 through {n}.\n"
-            f"- DO NOT write argument number {n+1} or beyond.\n"
-            f"- Stop after argument {n}.\n\n"
-            f"TONE: {tone_instr}\n"
-            f"FOCUS: {focus_instr}\n"
-            f"DEPTH: {depth_instr}\n\n"
-            f"Your response must follow this exact structure:\n"
-            f"{for_template}"
+            f"{task.description}\n\n"
+            f"You have already written these {have} argument{'s' if have != 1 else ''}:\n{written}\n\n"
+            f"Write ONLY the missing argument{'s' if expected - have != 1 else ''}, numbered {first} through {expected}. "
+            f"Do not repeat or rewrite the arguments above."
         ),
-        agent=agent_for,
-        expected_output=(
-            f"Exactly {n} numbered arguments (1 through {n}) FOR the statement '{topic}'. "
-            f"No argument numbered {n+1} or higher must appear."
-        )
+        expected_output=f"Exactly {expected - have} numbered argument{'s' if expected - have != 1 else ''}, {first} through {expected}.",
+        agent=build_agent(kind, llm),
     )
 
-    against_task = Task(
-        description=(
-            f"You are arguing AGAINST the statement: '{topic}'\n\n"
-            f"STRICT RULES — YOU MUST FOLLOW THESE EXACTLY:\n"
-            f"- Write EXACTLY {n} numbered counterargument{'s' if n != 1 else ''}. No more, no less.\n"
-            f"- Number them 1 through {n}.\n"
-            f"- DO NOT write argument number {n+1} or beyond.\n"
-            f"- Stop after argument {n}.\n\n"
-            f"TONE: {tone_instr}\n"
-            f"FOCUS: {focus_instr}\n"
-            f"DEPTH: {depth_instr}\n\n"
-            f"Your response must follow this exact structure:\n"
-            f"{against_template}"
-        ),
-        agent=agent_against,
-        expected_output=(
-            f"Exactly {n} numbered counterarguments (1 through {n}) AGAINST the statement '{topic}'. "
-            f"No argument numbered {n+1} or higher must appear."
-        )
+# ─── Prompt templates ────────────────────────────────────────────────────────
+# Everything in a debate prompt except the topic depends only on the side and
+# the (tone, focus, depth, n) settings, so each combination is rendered once
+# and cached. The topic goes last: providers that cache prompt prefixes (Groq
+# does for several models) then reuse the whole template across debates with
+# the same settings, and only the topic and the judge's context are new tokens.
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    prefix: str             # identical for every debate with these settings
+    expected_output: str
+    prefix_tokens: int
+
+    def render(self, topic):
+        return f"{self.prefix}'{topic}'"
+
+def normalize_settings(tone, focus, depth):
+    # Unknown values fall back like the instruction lookups do, so they share a cache entry
+    return (tone if tone in TONE_INSTRUCTIONS else "balanced",
+            focus if focus in FOCUS_INSTRUCTIONS else "general",
+            depth if depth in DEPTH_INSTRUCTIONS else "standard")
+
+def _template(prefix, expected_output):
+    return PromptTemplate(prefix, expected_output, estimate_tokens(prefix))
+
+@lru_cache(maxsize=512)
+def side_template(side, tone, focus, depth, n):
+    """The FOR or AGAINST prompt for these settings, up to the topic."""
+    stance, noun = ("FOR", "argument") if side == "for" else ("AGAINST", "counterargument")
+    if side == "for":
+        structure = "\n".join(f"{i}. [Argument {i} supporting the statement]" for i in range(1, n + 1))
+    else:
+        structure = "\n".join(f"{i}. [Counterargument {i} against the statement]" for i in range(1, n + 1))
+    return _template(
+        f"You are arguing {stance} the statement given at the end of this prompt.\n\n"
+        f"TONE: {TONE_INSTRUCTIONS[tone]}\n"
+        f"FOCUS: {FOCUS_INSTRUCTIONS[focus]}\n"
+        f"DEPTH: {DEPTH_INSTRUCTIONS[depth]}\n\n"
+        f"STRICT RULES — YOU MUST FOLLOW THESE EXACTLY:\n"
+        f"- Write EXACTLY {n} numbered {noun}{'s' if n != 1 else ''}. No more, no less.\n"
+        f"- Number them 1 through {n}.\n"
+        f"- DO NOT write argument number {n+1} or beyond.\n"
+        f"- Stop after argument {n}.\n\n"
+        f"Your response must follow this exact structure:\n"
+        f"{structure}\n\n"
+        f"THE STATEMENT: ",
+        f"Exactly {n} numbered {noun}s (1 through {n}) {stance} the statement. "
+        f"No argument numbered {n+1} or higher must appear.",
     )
 
-    judge_task = Task(
-        description=(
-            f"Based on the debate about: '{topic}', deliver a final verdict.\n\n"
-            f"TONE: {tone_instr}\n\n"
-            f"Structure your verdict with these exact labeled sections:\n"
-            f"VERDICT: State which side won (FOR or AGAINST) and by what margin.\n"
-            f"REASONING: Why that side's arguments were stronger (2-3 sentences).\n"
-            f"KEY STRENGTHS: What made the winning side's arguments effective.\n"
-            f"WEAKNESSES: What the losing side failed to address.\n"
-            f"FINAL RECOMMENDATION: A clear, actionable conclusion.\n\n"
-            f"Be decisive. Always name a winner. Do not be neutral."
-        ),
-        agent=summarizer,
-        expected_output=(
-            "A structured verdict with 5 labeled sections: VERDICT, REASONING, KEY STRENGTHS, WEAKNESSES, FINAL RECOMMENDATION."
-        )
+@lru_cache(maxsize=16)
+def judge_template(tone):
+    """The judge's prompt for this tone, up to the topic; the debate itself follows as context."""
+    return _template(
+        f"Deliver a final verdict on the debate about the statement given at the end of this prompt.\n\n"
+        f"TONE: {TONE_INSTRUCTIONS[tone]}\n\n"
+        f"Structure your verdict with these exact labeled sections:\n"
+        f"VERDICT: State which side won (FOR or AGAINST) and by what margin.\n"
+        f"REASONING: Why that side's arguments were stronger (2-3 sentences).\n"
+        f"KEY STRENGTHS: What made the winning side's arguments effective.\n"
+        f"WEAKNESSES: What the losing side failed to address.\n"
+        f"FINAL RECOMMENDATION: A clear, actionable conclusion.\n\n"
+        f"Be decisive. Always name a winner. Do not be neutral.\n\n"
+        f"THE STATEMENT: ",
+        "A structured verdict with 5 labeled sections: VERDICT, REASONING, KEY STRENGTHS, WEAKNESSES, FINAL RECOMMENDATION.",
+    )
+
+@lru_cache(maxsize=512)
+def rebuttal_template(side, tone, focus, depth, n):
+    """A rebuttal round's prompt for these settings, up to the topic; the round and both sides' points follow."""
+    stance, opponent = ("FOR", "AGAINST") if side == "for" else ("AGAINST", "FOR")
+    structure = "\n".join(f"{i}. [Rebuttal {i}]" for i in range(1, n + 1))
+    return _template(
+        f"You are arguing {stance} the statement given below, in a later round of the debate: "
+        f"rebut the {opponent} side's latest arguments, shown at the end of this prompt.\n\n"
+        f"TONE: {TONE_INSTRUCTIONS[tone]}\n"
+        f"FOCUS: {FOCUS_INSTRUCTIONS[focus]}\n"
+        f"DEPTH: {DEPTH_INSTRUCTIONS[depth]}\n\n"
+        f"STRICT RULES — YOU MUST FOLLOW THESE EXACTLY:\n"
+        f"- Write EXACTLY {n} numbered rebuttal{'s' if n != 1 else ''}. No more, no less.\n"
+        f"- Number them 1 through {n}.\n"
+        f"- Answer specific points from their latest round; do not repeat your earlier points.\n\n"
+        f"Your response must follow this exact structure:\n"
+        f"{structure}\n\n"
+        f"THE STATEMENT: ",
+        f"Exactly {n} numbered rebuttals (1 through {n}) {stance} the statement.",
     )
 
-    return [for_task, against_task, judge_task]
+# Estimated prompt tokens across every debate built, and how many of them were template prefix
+template_stats = {"debates": 0, "prompt_tokens": 0, "prefix_tokens": 0}
+_template_stats_lock = threading.Lock()
+
+def template_snapshot():
+    with _template_stats_lock:
+        stats = dict(template_stats)
+    stats["prefix_share"] = round(stats["prefix_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else None
+    for name, fn in (("side_templates", side_template), ("judge_templates", judge_template),
+                     ("rebuttal_templates", rebuttal_template)):
+        info = fn.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+    return stats
+
+@span("tasks.build")
+def debate_tasks(topic, llm, depth="standard", args_per_side=4, tone="balanced", focus="general"):
+    # crewai is imported on first use so importing this module stays cheap; see llm_stack.py
+    from crewai import Task
+    tone, focus, depth = normalize_settings(tone, focus, depth)
+    n = int(args_per_side)
+    templates = {
+        "for":     side_template("for", tone, focus, depth, n),
+        "against": side_template("against", tone, focus, depth, n),
+        "judge":   judge_template(tone),
+    }
+    tasks = [
+        Task(description=template.render(topic), expected_output=template.expected_output, agent=build_agent(kind, llm))
+        for kind, template in templates.items()
+    ]
+
+    with _template_stats_lock:
+        template_stats["debates"] += 1
+        template_stats["prompt_tokens"] += sum(estimate_tokens(task.description) for task in tasks)
+        template_stats["prefix_tokens"] += sum(t.prefix_tokens for t in templates.values())
+    return tasks
+
+def rebuttal_task(topic, side, llm, round_no, total_rounds, own_points, opponent_points, opponent_latest,
+                  depth="standard", args_per_side=4, tone="balanced", focus="general"):
+    """A later round for one side: rebut the opponent's latest round, given compacted summaries of both sides."""
+    from crewai import Task
+    tone, focus, depth = normalize_settings(tone, focus, depth)
+    template = rebuttal_template(side, tone, focus, depth, int(args_per_side))
+    opponent = "AGAINST" if side == "for" else "FOR"
+    # Template, then the topic, then what changes every round
+    description = (
+        f"{template.render(topic)}\n\n"
+        f"This is round {round_no} of {total_rounds}.\n\n"
+        f"YOUR POINTS SO FAR (summary):\n{own_points}\n\n"
+        f"{opponent} SIDE'S POINTS SO FAR (summary):\n{opponent_points}\n\n"
+        f"{opponent} SIDE'S LATEST ROUND:\n{opponent_latest}"
+    )
+    with _template_stats_lock:
+        template_stats["prompt_tokens"] += estimate_tokens(description)
+        template_stats["prefix_tokens"] += template.prefix_tokens
+    return Task(description=description, expected_output=template.expected_output, agent=build_agent(side, llm))
 
 
-def create_followup_task(question, debate_context, llm):
-    from agents import followup_agent
-    followup_agent.llm = llm
+def create_followup_task(question, debate_context, llm, history=""):
+    from crewai import Task
+    followup_agent = build_agent("followup", llm)
+    earlier = f"EARLIER QUESTIONS IN THIS CONVERSATION:\n{history}\n\n" if history else ""
 
+    # Instructions, then the session's context and earlier turns, which only grow
+    # between turns; the question comes last so the rest is a stable prompt prefix
     return Task(
         description=(
-            f"Based on this debate context, answer the following question:\n"
-            f"QUESTION: {question}\n\n"
+            f"Answer the question at the end using this debate context. "
+            f"Give a clear, concise answer referencing specific arguments from the debate.\n\n"
             f"DEBATE CONTEXT:\n{debate_context}\n\n"
-            f"Give a clear, concise answer referencing specific arguments from the debate."
+            f"{earlier}"
+            f"QUESTION: {question}"
         ),
         agent=followup_agent,
         expected_output="A clear, direct answer to the question based on the debate context."
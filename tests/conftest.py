@@ -0,0 +1,8 @@
+import os
+
+# Modules read these at import time; no test talks to Groq, fetches LiteLLM's
+# cost map or sends crewai telemetry
+os.environ.setdefault("GROQ_API_KEY", "test-placeholder")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
@@ -0,0 +1,35 @@
+import asyncio
+
+from agents import MODEL_MAP
+from fake_llm import FakeLLM
+from pipeline import run_debate_pipeline
+from tasks import debate_tasks
+
+DEBATES = 36
+
+
+def test_concurrent_debates_keep_their_own_model():
+    """Interleaved debates on every model at once: each stage answers with its own debate's model."""
+    models = list(MODEL_MAP.values())
+    llms = {model: FakeLLM(model=f"fake/{model}", latency=0.02) for model in models}
+
+    async def one_debate(i):
+        model = models[i % len(models)]
+        tasks = debate_tasks(f"Topic number {i}", llms[model], args_per_side=1 + i % 6)
+        assert all(task.agent.llm is llms[model] for task in tasks)
+        outputs = await run_debate_pipeline(tasks)
+        return model, [str(output.raw) for output in outputs]
+
+    async def run():
+        return await asyncio.gather(*(one_debate(i) for i in range(DEBATES)))
+
+    for model, answers in asyncio.run(run()):
+        # FakeLLM puts its model name in every answer
+        assert all(f"fake/{model} " in answer for answer in answers), (model, answers)
+
+
+def test_agents_are_not_shared_between_models():
+    first = debate_tasks("Same topic", FakeLLM(model="fake/a", latency=0))
+    second = debate_tasks("Same topic", FakeLLM(model="fake/b", latency=0))
+    assert [t.agent.llm.model for t in first] == ["fake/a"] * 3
+    assert [t.agent.llm.model for t in second] == ["fake/b"] * 3
@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from analytics import ROLLUP_COLLECTION, backfill, debate_stats, record_debates, restructure
+from parsing import STRUCTURE_VERSION, structure_debate
+
+SUMMARY = "VERDICT: FOR wins, clearly outclassing AGAINST\nREASONING: Better evidence."
+
+
+def debate(summary=SUMMARY, **fields):
+    results = {"for_arguments": "1. a", "against_arguments": "1. b", "summary": summary}
+    return {"_id": ObjectId(), "user_id": "u1", "topic": "t", "model": "m", "status": "completed",
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None), "results": results, "structured": structure_debate(results),
+            "settings": {"tone": "balanced", "focus": "general", "depth": "standard", "args_per_side": 1},
+            "usage": {"latency_ms": 1000, "prompt_tokens": 10, "completion_tokens": 5}, **fields}
+
+
+def test_backfill_counts_each_debate_once():
+    async def run():
+        db = AsyncMongoMockClient()["mads"]
+        await db.debates.insert_many([debate(), debate(status="cancelled")])
+        assert await backfill(db) == 1
+        assert await backfill(db) == 0
+        totals = (await debate_stats(db[ROLLUP_COLLECTION], days=1))["totals"]
+        assert totals["debates"] == 1 and totals["verdicts"]["FOR"] == 1
+    asyncio.run(run())
+
+
+def test_restructure_moves_counted_debates_to_their_corrected_verdict():
+    async def run():
+        db = AsyncMongoMockClient()["mads"]
+        stale = debate(analytics=1)
+        # As stored by version 1, which read AGAINST off any line naming it
+        stale["structured"]["version"] = 1
+        stale["structured"]["judge"]["side"] = "AGAINST"
+        stale["verdict"] = "AGAINST"
+        current = debate(analytics=1)
+        await db.debates.insert_many([stale, current])
+        await record_debates(db[ROLLUP_COLLECTION], [stale, current])
+
+        assert await restructure(db) == 1
+        assert await restructure(db) == 0
+        doc = await db.debates.find_one({"_id": stale["_id"]})
+        assert doc["verdict"] == "FOR" and doc["structured"]["version"] == STRUCTURE_VERSION
+        totals = (await debate_stats(db[ROLLUP_COLLECTION], days=1))["totals"]
+        assert totals["debates"] == 2
+        assert totals["verdicts"]["FOR"] == 2 and totals["verdicts"]["AGAINST"] == 0
+    asyncio.run(run())
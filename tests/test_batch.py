@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import agents
+import batch
+from fake_llm import FakeLLM, FakeLLMError
+import scheduler
+
+TOPIC = "Should cities ban cars from their centres?"
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    monkeypatch.setattr(agents, "select_model",
+                        lambda name, stream=False: FakeLLM(latency=0.01, stream=stream, token_rate=0))
+    monkeypatch.setattr(batch, "RATE_LIMIT_BACKOFF_BASE", 0.001)
+    # Budgets no test comes near, so nothing waits for admission
+    monkeypatch.setattr(scheduler, "scheduler", scheduler.Scheduler(limits={}, default=(10_000, 10_000_000)))
+
+
+def test_row_runs_every_round(fake_models):
+    record = asyncio.run(batch.run_debate_row({"topic": TOPIC, "args_per_side": 2, "rounds": 3, "use_cache": False}))
+    assert [r["round"] for r in record["results"]["rounds"]] == [1, 2, 3]
+    assert len(record["structured"]["rounds"]) == 3
+    assert "Round 3 — Rebuttal" in record["results"]["for_arguments"]
+    assert not record["cached"] and record["tokens"] > 0
+
+
+def test_row_rejects_too_many_rounds(fake_models):
+    with pytest.raises(ValueError, match="rounds must be between"):
+        asyncio.run(batch.run_debate_row({"topic": TOPIC, "rounds": 99}))
+
+
+def test_row_honours_use_cache(fake_models):
+    row = {"topic": f"{TOPIC} (cache)", "args_per_side": 2}
+
+    async def run():
+        first = await batch.run_debate_row(row)
+        again = await batch.run_debate_row(row)
+        fresh = await batch.run_debate_row({**row, "use_cache": False})
+        return first, again, fresh
+
+    first, again, fresh = asyncio.run(run())
+    assert not first["cached"] and again["cached"] and not fresh["cached"]
+    assert again["results"] == first["results"] and again["tokens"] == 0
+
+
+def test_provider_429_is_retried_with_backoff(fake_models):
+    queue = scheduler.scheduler.queue(agents.MODEL_MAP["Llama 3.1 8B Instant"])
+    penalties = queue.stats["provider_429s"]
+    calls = []
+
+    async def flaky():
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise RuntimeError("debate failed") from FakeLLMError("rate limit exceeded", status_code=429)
+        return "done"
+
+    assert asyncio.run(batch.retry_rate_limited(flaky, "Llama 3.1 8B Instant")) == "done"
+    assert len(calls) == 3
+    assert queue.stats["provider_429s"] == penalties + 2
+
+
+def test_other_errors_and_exhausted_retries_are_raised(fake_models):
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise FakeLLMError("server error", status_code=500)
+
+    async def limited():
+        calls.append(1)
+        raise FakeLLMError("rate limit exceeded", status_code=429)
+
+    with pytest.raises(FakeLLMError, match="server error"):
+        asyncio.run(batch.retry_rate_limited(broken, "Llama 3.1 8B Instant"))
+    assert len(calls) == 1
+    with pytest.raises(FakeLLMError, match="rate limit"):
+        asyncio.run(batch.retry_rate_limited(limited, "Llama 3.1 8B Instant", retries=3))
+    assert len(calls) == 4
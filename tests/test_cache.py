@@ -0,0 +1,19 @@
+from cache import cache_key
+
+
+def test_unknown_settings_share_the_default_entry():
+    default = cache_key("Ban homework?", "m", "standard", 4, "balanced", "general")
+    assert cache_key("  ban HOMEWORK ", "m", "bottomless", 4, "sarcastic", "astrology") == default
+    assert cache_key("Ban homework?", "m", "standard", "4", "balanced", "general") == default
+
+
+def test_known_settings_and_rounds_keep_their_own_entries():
+    default = cache_key("Ban homework?", "m", "standard", 4, "balanced", "general")
+    others = {
+        cache_key("Ban homework?", "m", "deep", 4, "balanced", "general"),
+        cache_key("Ban homework?", "m", "standard", 4, "academic", "general"),
+        cache_key("Ban homework?", "m", "standard", 4, "balanced", "economic"),
+        cache_key("Ban homework?", "m", "standard", 3, "balanced", "general"),
+        cache_key("Ban homework?", "m", "standard", 4, "balanced", "general", rounds=2),
+    }
+    assert default not in others and len(others) == 5
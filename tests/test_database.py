@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+import database
+from persistence import DebateWriter
+
+
+def debate(user_id="db-user"):
+    return {"_id": ObjectId(), "user_id": user_id, "topic": "Topic", "model": "fake", "status": "completed",
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None), "verdict": "FOR",
+            "results": {"for_arguments": "1. a", "against_arguments": "1. b", "summary": "VERDICT: FOR"}}
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    db = AsyncMongoMockClient()["mads"]
+    writer = DebateWriter(lambda: db.debates, spill_path=str(tmp_path / "spill.jsonl"))
+    monkeypatch.setattr(database, "db", db)
+    monkeypatch.setattr(database, "debate_writer", writer)
+    return db, writer
+
+
+def test_followup_state_reaches_queued_spilled_and_stored_debates(storage, capsys):
+    db, writer = storage
+    queued, spilled, stored = debate(), debate(), debate()
+    state = {"digest": "Q&A so far", "turns": 3}
+
+    async def run():
+        await db.debates.insert_one(stored)
+        writer.enqueue(queued)
+        writer._spill([spilled])
+        for doc in (queued, spilled, stored):
+            await database.save_followup_state(str(doc["_id"]), state)
+        return [await database.get_user_debate(str(doc["_id"]), "db-user") for doc in (queued, spilled, stored)]
+
+    for doc in asyncio.run(run()):
+        assert doc["followup"] == state
+    assert "not found" not in capsys.readouterr().out
+
+
+def test_followup_state_for_a_missing_debate_is_reported(storage, capsys):
+    missing = ObjectId()
+    asyncio.run(database.save_followup_state(str(missing), {"turns": 1}))
+    assert f"debate {missing} was not found" in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from export import CSV_COLUMNS, EXPORT_BATCH_SIZE, FLUSH_BYTES, stream_export
+
+TOTAL = 2 * EXPORT_BATCH_SIZE + 37   # several cursor batches and output flushes, plus a partial one
+
+
+class MockCursor:
+    """Stands in for a Motor cursor: yields `total` debates a batch at a time and records close()."""
+
+    def __init__(self, total=TOTAL, batch_size=EXPORT_BATCH_SIZE):
+        self.total = total
+        self.batch_size = batch_size
+        self.yielded = 0
+        self.closed = False
+
+    def _debate(self, i):
+        return {
+            "_id": f"{i:024x}", "user_id": "export-user", "topic": f"Topic {i}, with \"quotes\"\nand a newline",
+            "model": "fake", "created_at": datetime(2025, 1, 1) + timedelta(seconds=i), "status": "completed",
+            "verdict": "FOR" if i % 2 else "AGAINST", "settings": {"depth": "standard", "rounds": 1},
+            "results": {"for_arguments": "1. Yes " * 40, "against_arguments": "1. No " * 40, "summary": "VERDICT: FOR"},
+        }
+
+    async def __aiter__(self):
+        for start in range(0, self.total, self.batch_size):
+            await asyncio.sleep(0)
+            for i in range(start, min(start + self.batch_size, self.total)):
+                self.yielded += 1
+                yield self._debate(i)
+
+    async def close(self):
+        self.closed = True
+
+
+async def collect(cursor, fmt, compress=False):
+    return [chunk async for chunk in stream_export(cursor, fmt, compress=compress)]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_ndjson_export_has_one_line_per_debate(compress):
+    cursor = MockCursor()
+    chunks = asyncio.run(collect(cursor, "ndjson", compress))
+    body = b"".join(chunks)
+    if compress:
+        body = gzip.decompress(body)
+    records = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert len(records) == TOTAL
+    assert [r["debate_id"] for r in records] == [f"{i:024x}" for i in range(TOTAL)]
+    assert records[0]["created_at"] == "2025-01-01T00:00:00"
+    assert cursor.closed
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_csv_export_has_header_and_one_row_per_debate(compress):
+    cursor = MockCursor()
+    chunks = asyncio.run(collect(cursor, "csv", compress))
+    if compress:
+        # Each chunk decompresses as it arrives, as a streaming client would
+        inflate = zlib.decompressobj(31)
+        body = b"".join(inflate.decompress(chunk) for chunk in chunks) + inflate.flush()
+        assert inflate.eof
+    else:
+        body = b"".join(chunks)
+        assert max(len(chunk) for chunk in chunks[:-1]) < 2 * FLUSH_BYTES
+    rows = list(csv.reader(io.StringIO(body.decode("utf-8"))))
+    assert tuple(rows[0]) == CSV_COLUMNS
+    assert len(rows) == TOTAL + 1
+    assert rows[1][CSV_COLUMNS.index("topic")] == "Topic 0, with \"quotes\"\nand a newline"
+    assert cursor.closed
+
+
+def test_export_closes_the_cursor_when_the_client_disconnects():
+    cursor = MockCursor()
+
+    async def read_first_chunk():
+        stream = stream_export(cursor, "ndjson", compress=True)
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(read_first_chunk())
+    assert cursor.closed
+    assert cursor.yielded < TOTAL
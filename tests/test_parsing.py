@@ -0,0 +1,50 @@
+import pytest
+
+from parsing import STRUCTURE_VERSION, parse_arguments, parse_judge, structure_debate, verdict_side
+
+JUDGE = """VERDICT: FOR wins narrowly.
+REASONING: Better evidence.
+KEY STRENGTHS: Data.
+WEAKNESSES: Few sources.
+FINAL RECOMMENDATION: Regulate carefully."""
+
+
+@pytest.mark.parametrize("line, side", [
+    ("VERDICT: FOR", "FOR"),
+    ("VERDICT: AGAINST wins by a clear margin", "AGAINST"),
+    ("VERDICT: FOR wins, clearly outclassing AGAINST", "FOR"),
+    ("VERDICT: The AGAINST side won narrowly over FOR", "AGAINST"),
+    ("VERDICT: Although AGAINST made good points, FOR prevails", "FOR"),
+    ("VERDICT: AGAINST, though FOR came close", "AGAINST"),
+    ("**VERDICT:** for", "FOR"),
+    ("VERDICT: therefore a draw", None),
+    ("No verdict line here", None),
+])
+def test_verdict_side(line, side):
+    assert verdict_side(line) == side
+
+
+def test_parse_arguments_folds_continuations():
+    parsed = parse_arguments("Final Answer:\n1. First\n   more on first\n2) Second\n**3.** Third", expected=4)
+    assert parsed["arguments"] == ["First\nmore on first", "Second", "Third"]
+    assert parsed["count"] == 3 and parsed["complete"] is False
+
+
+def test_parse_judge_sections():
+    judge = parse_judge(JUDGE)
+    assert judge["side"] == "FOR" and judge["margin"] == "slight"
+    assert judge["sections"]["final_recommendation"] == "Regulate carefully."
+    assert judge["missing"] == []
+
+
+def test_structure_debate_keeps_rounds():
+    results = {
+        "for_arguments": "Round 1 — Opening\n1. a\n\nRound 2 — Rebuttal\n1. b",
+        "against_arguments": "Round 1 — Opening\n1. c\n\nRound 2 — Rebuttal\n1. d",
+        "summary": JUDGE,
+        "rounds": [{"round": 1, "for": "1. a", "against": "1. c"}, {"round": 2, "for": "1. b", "against": "1. d"}],
+    }
+    structured = structure_debate(results, args_per_side=1)
+    assert structured["version"] == STRUCTURE_VERSION
+    assert structured["for"]["arguments"] == ["a"]
+    assert [r["against"]["arguments"] for r in structured["rounds"]] == [["c"], ["d"]]
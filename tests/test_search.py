@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+import database
+from persistence import DebateWriter
+from search import DebateSearch
+
+
+def debate(topic, user_id="search-user", status="completed"):
+    return {"_id": ObjectId(), "user_id": user_id, "topic": topic, "model": "fake", "status": status,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None), "verdict": "FOR",
+            "results": {"for_arguments": f"1. {topic} helps", "against_arguments": f"1. {topic} hurts",
+                        "summary": "VERDICT: FOR wins"}}
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    db = AsyncMongoMockClient()["mads"]
+    writer = DebateWriter(lambda: db.debates, spill_path=str(tmp_path / "spill.jsonl"))
+    monkeypatch.setattr(database, "db", db)
+    monkeypatch.setattr(database, "debate_writer", writer)
+    return db, writer
+
+
+def test_local_index_covers_queued_and_spilled_debates(storage):
+    db, writer = storage
+    stored = debate("Stored volcano tax")
+    queued = debate("Queued volcano tax")
+    spilled = debate("Spilled volcano tax")
+    someone_elses = debate("Other volcano tax", user_id="someone-else")
+
+    async def run():
+        await db.debates.insert_one(stored)
+        writer.enqueue(queued)
+        writer.enqueue(someone_elses)
+        writer._spill([spilled])   # as a MongoDB outage would
+        search = DebateSearch(backend="local")
+        return await search.search("search-user", "volcano")
+
+    page = asyncio.run(run())
+    assert {result["_id"] for result in page["results"]} == {str(d["_id"]) for d in (stored, queued, spilled)}
+    assert page["backend"] == "local"
+    assert all("volcano" in result["snippet"]["text"].lower() for result in page["results"])
+
+
+def test_debate_landing_during_the_build_is_indexed_once(storage):
+    db, writer = storage
+    doc = debate("Landing volcano tax")
+
+    async def run():
+        writer.enqueue(doc)
+        # Inserted but not yet popped from pending, as in the middle of a flush
+        await db.debates.insert_one(dict(doc))
+        return [d["_id"] async for d in database.user_debates_for_search("search-user", ["topic"])]
+
+    assert asyncio.run(run()) == [doc["_id"]]
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+import pipeline
+from auth import get_current_user
+from fake_llm import FakeLLM, FakeLLMError
+from jobs import JobWorkers, MemoryJobStore
+from routing import router
+
+TOPIC = "Should homework be banned?"
+ANSWERS = {"for": "for_arguments", "against": "against_arguments", "judge": "summary"}
+
+
+class MidStreamFailure(FakeLLM):
+    """Streams most of its answer, then fails like a dropped provider connection."""
+
+    def call(self, messages, *args, **kwargs):
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+        reply = self._reply(messages if isinstance(messages, str) else "\n".join(m["content"] for m in messages))
+        for chunk in re.findall(r"\S+\s*", reply)[:-3]:
+            crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=chunk, from_task=kwargs.get("from_task"),
+                                                                   from_agent=kwargs.get("from_agent")))
+        raise FakeLLMError(f"{self.model}: connection reset", status_code=503)
+
+
+class Connected:
+    async def is_disconnected(self):
+        return False
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    async def save_debate(**kwargs):
+        return "test-debate"
+    monkeypatch.setattr(app_module, "save_debate", save_debate)
+    monkeypatch.setattr(app_module, "select_model",
+                        lambda choice, stream=False: FakeLLM(latency=0.01, stream=stream, token_rate=0))
+
+
+def parse(frame):
+    """(id or None, event) of one SSE frame, which must be well formed."""
+    assert frame.endswith("\n\n"), f"unterminated frame {frame!r}"
+    lines = frame[:-2].split("\n")
+    event_id = int(lines.pop(0)[len("id: "):]) if lines[0].startswith("id: ") else None
+    assert len(lines) == 1 and lines[0].startswith("data: "), f"malformed frame {frame!r}"
+    return event_id, json.loads(lines[0][len("data: "):])
+
+
+async def stream_debate(user_id="stream-user", **fields):
+    request = app_module.DebateRequest(topic=TOPIC, model_choice="1", args_per_side=3, use_cache=False, **fields)
+    plan = await app_module.plan_debate(request, user_id, stream=True)
+    return [parse(frame)[1] async for frame in app_module.run_debate_stream(request, plan, user_id, Connected())]
+
+
+def answer_tokens(events, agent):
+    """The agent's streamed answer, counting only tokens after its last reset."""
+    text = ""
+    for event in events:
+        if event.get("agent") != agent:
+            continue
+        if event["type"] == "reset":
+            text = ""
+        elif event["type"] == "token":
+            text += event["content"]
+    return text
+
+
+def test_tokens_stream_per_agent_in_order(fake_models):
+    events = asyncio.run(stream_debate())
+    types = [e["type"] for e in events]
+    assert types[:2] == ["status", "debate_start"] and types[-1] == "debate_complete"
+
+    results = events[-1]["data"]["results"]
+    completed = {}
+    for agent, key in ANSWERS.items():
+        assert answer_tokens(events, agent).strip() == results[key].strip()
+        completed[agent] = next(i for i, e in enumerate(events) if e["type"] == "agent_complete" and e["agent"] == agent)
+    first_judge_token = next(i for i, e in enumerate(events) if e["type"] == "token" and e["agent"] == "judge")
+    assert first_judge_token > max(completed["for"], completed["against"])
+    assert "reset" not in types
+
+
+def test_failover_mid_answer_resets_the_agent(monkeypatch, fake_models):
+    primary = "fake/drops-connection"
+    monkeypatch.setitem(router.chains, primary, ["fake/backup"])
+    monkeypatch.setattr(app_module, "select_model",
+                        lambda choice, stream=False: MidStreamFailure(model=primary, latency=0, stream=stream))
+    monkeypatch.setattr(pipeline, "llm_for",
+                        lambda model, stream=False: FakeLLM(model=model, latency=0.01, stream=stream, token_rate=0))
+
+    events = asyncio.run(stream_debate(user_id="failover-user"))
+    data = events[-1]["data"]
+    for agent, key in ANSWERS.items():
+        reset = next(i for i, e in enumerate(events) if e["type"] == "reset" and e["agent"] == agent)
+        assert any(e["type"] == "token" and e["agent"] == agent for e in events[:reset]), "nothing streamed before reset"
+        # Only the backup's answer counts once the client has cleared the void one
+        assert answer_tokens(events, agent).strip() == data["results"][key].strip()
+        assert "fake/backup" in data["results"][key]
+    assert set(data["models_used"].values()) == {"fake/backup"}
+
+
+def test_job_events_replay_after_last_event_id(monkeypatch, fake_models):
+    workers = JobWorkers(MemoryJobStore(), concurrency=1)
+    workers.register("debate", app_module.run_debate_job)
+    monkeypatch.setattr(app_module, "job_workers", workers)
+
+    async def run_job():
+        await workers.start()
+        try:
+            job = await workers.submit("job-user", "debate", app_module.DebateRequest(
+                topic=TOPIC, model_choice="1", args_per_side=2, use_cache=False).model_dump())
+            for _ in range(500):
+                if (await workers.store.get(job["_id"]))["status"] == "completed":
+                    return job["_id"]
+                await asyncio.sleep(0.01)
+            raise AssertionError("job did not complete")
+        finally:
+            await workers.shutdown()
+
+    job_id = asyncio.run(run_job())
+    app_module.app.dependency_overrides[get_current_user] = lambda: {"user_id": "job-user", "username": "job-user"}
+    try:
+        client = TestClient(app_module.app)
+
+        def read(**headers):
+            response = client.get(f"/api/jobs/{job_id}/events", headers=headers)
+            assert response.status_code == 200
+            return [parse(frame + "\n\n") for frame in response.text.split("\n\n") if frame]
+
+        full = read()
+        ids = [event_id for event_id, _ in full]
+        assert ids == list(range(1, len(full) + 1))
+        assert full[-1][1]["type"] == "debate_complete"
+
+        cut = len(full) // 2
+        assert read(**{"Last-Event-ID": str(cut)}) == full[cut:]
+        assert read(**{"Last-Event-ID": str(len(full))}) == []
+        assert client.get(f"/api/jobs/{job_id}/events?last_event_id={cut}").text == \
+            "".join(f"id: {i}\ndata: {json.dumps(e)}\n\n" for i, e in full[cut:])
+    finally:
+        app_module.app.dependency_overrides.clear()
@@ -0,0 +1,177 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+import persistence
+from persistence import DebateWriter
+
+
+class FlakyCollection:
+    """A mongomock-motor collection whose inserts fail while `down`."""
+
+    def __init__(self):
+        self.collection = AsyncMongoMockClient()["mads"]["debates"]
+        self.down = False
+
+    async def insert_many(self, docs, ordered=False):
+        if self.down:
+            raise ConnectionError("server selection timeout")
+        return await self.collection.insert_many(docs, ordered=ordered)
+
+    async def delete_many(self, query):
+        return await self.collection.delete_many(query)
+
+    async def stored_ids(self):
+        return [doc["_id"] async for doc in self.collection.find({}, {"_id": 1})]
+
+
+def debate(i, user_id="writer-user"):
+    return {"_id": ObjectId(), "user_id": user_id, "topic": f"Topic {i}", "model": "fake",
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None), "verdict": "FOR",
+            "status": "completed", "results": {"summary": "VERDICT: FOR"}}
+
+
+async def settle(writer):
+    for _ in range(500):
+        on_disk = any(os.path.exists(path) for path in (writer.spill_path, writer.spill_path + ".replay"))
+        if not (writer.pending or writer.spilled or writer._batch or on_disk) and writer.queue.empty():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"writer did not settle: {writer.snapshot()}")
+
+
+@pytest.fixture
+def spill_path(monkeypatch, tmp_path):
+    monkeypatch.setattr(persistence, "BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(persistence, "FLUSH_INTERVAL", 0.02)
+    monkeypatch.setattr(persistence, "SPILL_RETRY_INTERVAL", 0.05)
+    return str(tmp_path / "spill.jsonl")
+
+
+def test_flush_writes_queued_debates_once_in_order(spill_path):
+    collection = FlakyCollection()
+    written = []
+
+    async def on_written(docs):
+        written.extend(doc["_id"] for doc in docs)
+
+    async def run():
+        writer = DebateWriter(lambda: collection, batch_size=3, spill_path=spill_path, on_written=on_written)
+        writer.start()
+        docs = [debate(i) for i in range(8)]
+        for doc in docs:
+            writer.enqueue(doc)
+        assert writer.get_pending(docs[0]["_id"]) is docs[0]
+        await settle(writer)
+        await writer.shutdown()
+        return writer, [doc["_id"] for doc in docs]
+
+    writer, ids = asyncio.run(run())
+    assert asyncio.run(collection.stored_ids()) == ids
+    assert written == ids
+    assert writer.stats["written"] == 8 and writer.stats["spilled"] == 0
+    assert not os.path.exists(spill_path)
+
+
+def test_outage_spills_and_replay_skips_cancelled_debates(spill_path):
+    collection = FlakyCollection()
+    collection.down = True
+
+    async def outage():
+        writer = DebateWriter(lambda: collection, batch_size=4, max_retries=2, spill_path=spill_path)
+        writer.start()
+        docs = [debate(i) for i in range(6)]
+        for doc in docs:
+            writer.enqueue(doc)
+        for _ in range(500):
+            if len(writer.spilled) == len(docs):
+                break
+            await asyncio.sleep(0.01)
+        assert set(writer.spilled) == {doc["_id"] for doc in docs}
+
+        spilled = docs[1]
+        assert writer.get_pending(spilled["_id"]) is None
+        assert writer.get_spilled(spilled["_id"])["results"] == spilled["results"]
+        assert [doc["_id"] for doc in writer.unwritten("writer-user")] == [doc["_id"] for doc in docs]
+        assert not writer.cancel(spilled["_id"], "someone-else")
+        assert writer.cancel(spilled["_id"], "writer-user")
+        assert writer.get_spilled(spilled["_id"]) is None
+
+        queued = debate(6)
+        writer.enqueue(queued)
+        assert writer.cancel(queued["_id"], "writer-user")
+        late = debate(7)
+        writer.enqueue(late)
+        await asyncio.sleep(0.1)
+        await writer.shutdown()
+        return [doc["_id"] for doc in docs + [late] if doc is not spilled], [spilled["_id"], queued["_id"]]
+
+    async def restart():
+        # A fresh writer only has the spill file, tombstones included
+        collection.down = False
+        writer = DebateWriter(lambda: collection, batch_size=4, spill_path=spill_path)
+        writer.start()
+        await settle(writer)
+        await writer.shutdown()
+        return writer
+
+    expected, cancelled = asyncio.run(outage())
+    assert asyncio.run(collection.stored_ids()) == []
+
+    writer = asyncio.run(restart())
+    stored = asyncio.run(collection.stored_ids())
+    assert stored == expected
+    assert not set(cancelled) & set(stored)
+    assert writer.stats["replayed"] == len(expected)
+    assert not os.path.exists(spill_path) and not os.path.exists(spill_path + ".replay")
+
+
+def test_debate_cancelled_mid_insert_is_removed_once_it_lands(spill_path):
+    collection = FlakyCollection()
+    doc = debate(0)
+
+    class CancelDuringInsert:
+        async def insert_many(self, docs, ordered=False):
+            # The user deletes the debate while its insert is in flight
+            assert writer.cancel(doc["_id"], "writer-user")
+            return await collection.insert_many(docs, ordered=ordered)
+
+        async def delete_many(self, query):
+            return await collection.delete_many(query)
+
+    writer = DebateWriter(lambda: CancelDuringInsert(), spill_path=spill_path)
+
+    async def run():
+        writer.enqueue(doc)
+        await writer.shutdown()
+
+    asyncio.run(run())
+    assert asyncio.run(collection.stored_ids()) == []
+    assert not writer.deleted and not writer.pending
+
+
+def test_spilled_update_is_read_back_and_replayed(spill_path):
+    collection = FlakyCollection()
+    doc, other = debate(0), debate(1)
+    writer = DebateWriter(lambda: collection, spill_path=spill_path)
+    writer._spill([doc, other])
+
+    assert writer.update_spilled(doc["_id"], {"followup": {"turns": 1}})
+    assert writer.update_spilled(doc["_id"], {"followup": {"turns": 2}})
+    assert not writer.update_spilled(ObjectId(), {"followup": {}})
+    assert writer.get_spilled(doc["_id"])["followup"] == {"turns": 2}
+
+    async def restart():
+        writer = DebateWriter(lambda: collection, spill_path=spill_path)
+        writer.start()
+        await settle(writer)
+        await writer.shutdown()
+        return [d async for d in collection.collection.find({})]
+
+    stored = asyncio.run(restart())
+    assert [d["_id"] for d in stored] == [doc["_id"], other["_id"]]
+    assert stored[0]["followup"] == {"turns": 2} and "followup" not in stored[1]
@@ -0,0 +1,290 @@
+import asyncio
+import os
+import re
+import sys
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Near-duplicate lookup over each user's previously debated topics, fully offline.
+#
+# Topics are normalized (case, punctuation, stopwords, a few abbreviations,
+# implied agents such as "by governments", light stemming); their distinct
+# words, sorted, are cut into character 3-gram shingles and summarized by a
+# 32-value MinHash signature.
+# Locality-sensitive hashing over 8 bands of 4 values, keyed by user, means a
+# query only looks at the user's own topics sharing at least one band; the few
+# candidates that collide most often are then scored by similarity() below,
+# which rejects topics that ask the opposite question (negations, negating
+# prefixes, antonyms, swapped sides of a comparison). Signatures live in one
+# flat array and over-shared bands are dropped, so a million topics over a
+# thousand users fit in roughly 1.3 GB and a lookup stays well under 1 ms
+# (see benchmarks/topic_index.py).
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE = 3
+MAX_VERIFY = 5                   # candidates scored against the full signature
+MAX_BUCKET = 64                  # bands shared by more topics than this carry no signal
+# Chosen on the labelled pairs in benchmarks/topic_pairs.py
+DEFAULT_THRESHOLD = float(os.getenv("TOPIC_MATCH_THRESHOLD", "0.8"))
+TOPIC_INDEX_LIMIT = int(os.getenv("TOPIC_INDEX_LIMIT", "100000"))   # debates loaded at startup
+
+_BIN_BITS = NUM_PERM.bit_length() - 1
+SATURATED = -1
+
+STOPWORDS = frozenset(
+    "a an the is are was were be been being should would could can will do does did "
+    "of to in on for by with at from as and or but if than that this these those it its "
+    "we us our you your they them their he she his her i me my more most".split()
+)
+
+ABBREVIATIONS = {
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "govt": "government",
+    "gov": "government",
+    "govts": "governments",
+    "ev": "electric vehicle",
+    "evs": "electric vehicles",
+    "ubi": "universal basic income",
+    "uk": "united kingdom",
+}
+
+# Who regulates, bans or funds is usually implied: "Should AI be regulated (by
+# governments)?" asks the same question either way
+IMPLIED_AGENTS = frozenset({"government", "lawmaker", "legislator", "policymaker", "politician",
+                            "regulator", "authority"})
+
+# Polarity: topics that differ in any of these ask opposite questions
+NEGATIONS = frozenset({"not", "no", "never", "nor", "without", "against", "anti", "non", "de", "un"})
+NEGATING_PREFIXES = ("anti", "non", "dis", "de", "un", "il", "im", "in", "ir")
+COMPARATORS = frozenset({"than", "vs", "versus"})
+KEEP = frozenset({"more"})   # a stopword, but "more" / "less" flips the question
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    # Just enough to match plurals and -ed/-ing forms: "taxes", "taxed" and "tax"
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            word = word[:-len(suffix)]
+            if suffix != "s" and len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]   # "banned" -> "ban"
+            break
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    if len(word) > 5 and word.endswith("is"):
+        word = word[:-1] + "z"     # "subsidised" -> "subsidiz"
+    return word
+
+ANTONYMS = {frozenset(map(stem, pair)) for pair in (
+    ("ban", "allow"), ("ban", "permit"), ("ban", "legalize"), ("allow", "forbid"), ("allow", "prohibit"),
+    ("increase", "decrease"), ("increase", "reduce"), ("increase", "cut"), ("raise", "lower"),
+    ("expand", "restrict"), ("more", "less"), ("more", "fewer"), ("better", "worse"), ("good", "bad"),
+    ("harmful", "beneficial"), ("benefit", "harm"), ("support", "oppose"), ("pro", "anti"),
+    ("accept", "reject"), ("strengthen", "weaken"), ("join", "leave"), ("rejoin", "leave"),
+)}
+
+# "artificial intelligence" and "ai" become the one token "ai"
+PHRASES = {tuple(phrase.split()): short for short, phrase in ABBREVIATIONS.items() if " " in phrase}
+WORDS = {short: phrase for short, phrase in ABBREVIATIONS.items() if " " not in phrase}
+
+@dataclass(frozen=True)
+class TopicTerms:
+    text: str        # normalized topic in word order: the exact-match key
+    tokens: tuple    # stemmed content words, in order
+    sides: tuple     # (before, after) token sets around "than"/"vs", or None
+
+    @property
+    def bag(self) -> str:
+        """The distinct tokens in sorted order, what is shingled, so reordered topics collide."""
+        return " ".join(sorted(set(self.tokens)))
+
+def _content(words):
+    kept = [w for w in words if w not in STOPWORDS or w in KEEP]
+    stems = [stem(w) for w in kept or words]
+    without_agents = [w for w in stems if w not in IMPLIED_AGENTS]
+    return without_agents or stems
+
+def _words(topic):
+    raw = re.findall(r"[a-z0-9]+", topic.lower().replace("n't", " not"))
+    words, i = [], 0
+    while i < len(raw):
+        for phrase, short in PHRASES.items():
+            if tuple(raw[i:i + len(phrase)]) == phrase:
+                words.append(short)
+                i += len(phrase)
+                break
+        else:
+            words.extend(WORDS.get(raw[i], raw[i]).split())
+            i += 1
+    return words
+
+@lru_cache(maxsize=8192)
+def analyze(topic: str) -> TopicTerms:
+    words = _words(topic)
+    sides = None
+    split = next((i for i, w in enumerate(words) if w in COMPARATORS), None)
+    if split is not None:
+        sides = (frozenset(_content(words[:split])), frozenset(_content(words[split + 1:])))
+        words = [w for w in words if w not in COMPARATORS]
+    tokens = tuple(_content(words))
+    return TopicTerms(" ".join(tokens), tokens, sides)
+
+def normalize(topic: str) -> str:
+    return analyze(topic).text
+
+def _negated(word, others):
+    return any(word.startswith(p) and len(word) - len(p) >= 3 and word[len(p):] in others for p in NEGATING_PREFIXES)
+
+def opposed(a: TopicTerms, b: TopicTerms) -> bool:
+    """True if the topics ask opposite questions however many words they share."""
+    set_a, set_b = set(a.tokens), set(b.tokens)
+    if set_a & NEGATIONS != set_b & NEGATIONS:
+        return True
+    only_a, only_b = set_a - set_b, set_b - set_a
+    if any(_negated(w, only_b) for w in only_a) or any(_negated(w, only_a) for w in only_b):
+        return True   # "deregulate" / "regulate", "illegal" / "legal"
+    if any(frozenset((x, y)) in ANTONYMS for x in only_a for y in only_b):
+        return True
+    if a.sides and b.sides:
+        # "Is remote work better than office work?" vs "Is office work better than remote work?"
+        (left_a, right_a), (left_b, right_b) = a.sides, b.sides
+        return len(left_a & right_b) + len(right_a & left_b) > len(left_a & left_b) + len(right_a & right_b)
+    return False
+
+def similarity(a: TopicTerms, b: TopicTerms) -> float:
+    """Jaccard similarity of the topics' content words, or 0 if they ask opposite questions.
+
+    Word order matters only where it changes the question (the two sides of a
+    comparison); "Should schools ban phones?" and "Should phones be banned in
+    schools?" are the same debate.
+    """
+    if a.text == b.text:
+        return 1.0
+    if opposed(a, b):
+        return 0.0
+    set_a, set_b = set(a.tokens), set(b.tokens)
+    return len(set_a & set_b) / len(set_a | set_b)
+
+def shingles(text: str) -> set:
+    if len(text) <= SHINGLE:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + SHINGLE].encode("utf-8")) for i in range(len(text) - SHINGLE + 1)}
+
+def signature(text: str) -> list:
+    # One-permutation MinHash: a single hash per shingle, whose low bits pick
+    # one of NUM_PERM bins and whose high bits compete for that bin's minimum.
+    # That is one pass over the shingles instead of NUM_PERM passes.
+    sig = [-1] * NUM_PERM
+    for h in shingles(text):
+        b, v = h & (NUM_PERM - 1), h >> _BIN_BITS
+        if sig[b] < 0 or v < sig[b]:
+            sig[b] = v
+    # Densify: an empty bin borrows the next filled bin (cyclically), tagged
+    # with the distance so borrowed values don't collide with real ones.
+    if -1 in sig:
+        filled = [i for i, v in enumerate(sig) if v >= 0]
+        for i in range(NUM_PERM):
+            if sig[i] < 0:
+                j = next((f for f in filled if f > i), filled[0])
+                sig[i] = sig[j] ^ (((j - i) % NUM_PERM) << 27)
+    return sig
+
+def _band_keys(user_id, sig):
+    return [hash((user_id, band) + tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+@dataclass
+class TopicMatch:
+    topic: str
+    debate_id: str
+    similarity: float
+
+class TopicIndex:
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._signatures = array("I")
+        self._topics = []
+        self._debate_ids = []
+        self._exact = {}      # (user_id, normalized topic) -> slot
+        self._buckets = {}    # band key -> slot, list of slots, or SATURATED
+
+    def __len__(self):
+        return len(self._topics)
+
+    def add(self, user_id: str, topic: str, debate_id: str, replace=True):
+        user_id = sys.intern(user_id)   # one copy however many topics the user has
+        norm = normalize(topic)
+        slot = self._exact.get((user_id, norm))
+        if slot is not None:
+            # Same topic debated again: point at the newest debate
+            if replace:
+                self._debate_ids[slot] = debate_id
+            return
+        sig = signature(analyze(topic).bag)
+        slot = len(self._topics)
+        self._signatures.extend(sig)
+        self._topics.append(topic)
+        self._debate_ids.append(debate_id)
+        self._exact[(user_id, norm)] = slot
+        for key in _band_keys(user_id, sig):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = slot
+            elif isinstance(bucket, list):
+                if len(bucket) >= MAX_BUCKET:
+                    self._buckets[key] = SATURATED
+                else:
+                    bucket.append(slot)
+            elif bucket != SATURATED:
+                self._buckets[key] = [bucket, slot]
+
+    def best_match(self, user_id: str, topic: str, threshold=None):
+        """Return the user's most similar indexed topic at or above threshold, or None."""
+        threshold = self.threshold if threshold is None else threshold
+        terms = analyze(topic)
+        slot = self._exact.get((user_id, terms.text))
+        if slot is not None:
+            return TopicMatch(self._topics[slot], self._debate_ids[slot], 1.0)
+
+        sig = signature(terms.bag)
+        collisions = Counter()
+        for key in _band_keys(user_id, sig):
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket == SATURATED:
+                continue
+            if isinstance(bucket, list):
+                collisions.update(bucket)
+            else:
+                collisions[bucket] += 1
+
+        best, best_sim = None, 0.0
+        for slot, _ in collisions.most_common(MAX_VERIFY):
+            sim = similarity(terms, analyze(self._topics[slot]))
+            if sim > best_sim:
+                best, best_sim = slot, sim
+        if best is None or best_sim < threshold:
+            return None
+        return TopicMatch(self._topics[best], self._debate_ids[best], best_sim)
+
+topic_index = TopicIndex()
+
+async def load_recent_topics(limit=TOPIC_INDEX_LIMIT):
+    """Index the newest debates at startup; new ones are added as they are saved."""
+    from database import recent_debate_topics
+    count = 0
+    async for user_id, debate_id, topic in recent_debate_topics(limit):
+        # Newest first, so an existing entry already points at the latest debate
+        topic_index.add(user_id, topic, debate_id, replace=False)
+        count += 1
+        if count % 500 == 0:
+            await asyncio.sleep(0)   # let requests through while a big history loads
+    print(f"✅ Topic index ready: {len(topic_index)} topics")